@@ -0,0 +1,79 @@
+# Micro-benchmark of the per-request overhead of DashConfig.auth_settings().
+#
+# auth_settings() runs before every low level API call, so status polling loops
+# and bulk uploads call it thousands of times.  This compares the previous
+# implementation, which decoded the JWT on every call, with the current one,
+# which decodes the expiry once per token.
+#
+# Run from the repository root with:
+#
+#   python benchmarks/auth_settings_benchmark.py
+
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta
+from os.path import abspath, dirname, join
+
+import jwt
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), 'src'))
+
+import comodash_api_client_lowlevel  # noqa: E402
+from comotion.auth import Auth  # noqa: E402
+from comotion.dash import DashConfig  # noqa: E402
+
+
+def legacy_check_and_refresh_token(config):
+    """The token check as it was before the expiry was cached: a full jwt.decode per call."""
+    if not config.access_token:
+        config.access_token = config.auth.get_access_token()
+        return
+    try:
+        payload = jwt.decode(config.access_token, options={"verify_signature": False})
+        now = datetime.utcnow()
+        exp = datetime.fromtimestamp(payload['exp'])
+        if now >= (exp - timedelta(seconds=30)):
+            config.access_token = config.auth.get_access_token()
+    except (jwt.ExpiredSignatureError, jwt.DecodeError, KeyError):
+        config.access_token = config.auth.get_access_token()
+
+
+def legacy_auth_settings(config):
+    legacy_check_and_refresh_token(config)
+    return comodash_api_client_lowlevel.Configuration.auth_settings(config)
+
+
+def make_config():
+    auth = Auth(
+        orgname='benchmark',
+        entity_type=Auth.APPLICATION,
+        application_client_id='benchmark_client',
+        application_client_secret='benchmark_secret'
+    )
+    config = DashConfig(auth)
+    # a valid token for the next hour, so no call reaches the token endpoint
+    config.access_token = jwt.encode(
+        {'exp': time.time() + 3600, 'sub': 'benchmark', 'scope': 'query:read query:write'},
+        'a-benchmark-secret-key-of-32-bytes!',
+        algorithm='HS256'
+    )
+    return config
+
+
+def run(number=20000, repeat=5):
+    config = make_config()
+    results = {
+        'before (jwt.decode per call)': min(timeit.repeat(lambda: legacy_auth_settings(config), number=number, repeat=repeat)),
+        'after (cached expiry)': min(timeit.repeat(config.auth_settings, number=number, repeat=repeat)),
+    }
+    print(f"DashConfig.auth_settings() overhead, best of {repeat} x {number} calls")
+    for name, total in results.items():
+        print(f"  {name:<30} {total / number * 1e6:8.2f} us/call")
+    before, after = results.values()
+    print(f"  speedup: {before / after:.1f}x")
+    return results
+
+
+if __name__ == '__main__':
+    run()
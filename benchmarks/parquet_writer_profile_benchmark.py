@@ -0,0 +1,89 @@
+# Benchmark of the parquet writer profiles of Load uploads.
+#
+# Every chunk uploaded by Load is written to parquet with its ParquetWriterOptions,
+# which trade the CPU time spent encoding a chunk against the bytes uploaded.  This
+# compares the named profiles, and gzip, on a policy-like table of mixed columns:
+#
+# - encode: the time to write the chunks to parquet
+# - bytes: the total size of the parquet files uploaded
+# - end to end: the time of Load.upload_df over all chunks, where the upload to S3
+#   is replaced by a sleep for the time the file takes at the given bandwidth
+#
+# Run from the repository root with:
+#
+#   python benchmarks/parquet_writer_profile_benchmark.py [bandwidth in Mbit/s, default 100]
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os.path import abspath, dirname, join
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), 'src'))
+
+from comodash_api_client_lowlevel.models.file_upload_response import FileUploadResponse  # noqa: E402
+from comotion import dash  # noqa: E402
+
+PROFILES = {
+    **{name: dash.ParquetWriterOptions.profile(name) for name in dash.ParquetWriterOptions.PROFILES},
+    'gzip level 6': dash.ParquetWriterOptions(compression='gzip', compression_level=6),
+}
+
+
+def make_chunks(rows=1000000, chunksize=100000, seed=0):
+    random = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'policy_number': np.arange(rows),
+        'face_amount': random.integers(1000, 1000000, rows) / 100,
+        'premium': random.normal(500, 150, rows).round(2),
+        'status': random.choice(['ACTIVE', 'LAPSED', 'SURRENDERED', 'CLAIMED'], rows),
+        'product': random.choice([f'product_{i}' for i in range(40)], rows),
+        'start_date': pd.Timestamp('2010-01-01') + pd.to_timedelta(random.integers(0, 5000, rows), unit='D'),
+        'client_reference': [f'CR{value:010d}' for value in random.integers(0, 10 ** 10, rows)],
+    })
+    return [data.iloc[start:start + chunksize].reset_index(drop=True) for start in range(0, rows, chunksize)]
+
+
+def encode(chunks, options):
+    start = time.perf_counter()
+    nbytes = sum(dash._dataframe_to_parquet_buffer(chunk.copy(), writer_options=options).getbuffer().nbytes for chunk in chunks)
+    return time.perf_counter() - start, nbytes
+
+
+def end_to_end(chunks, options, bandwidth_bytes_per_second, max_workers=4):
+    def upload(parquet_buffer, file_upload_response):
+        # the uploads of all workers share the bandwidth
+        time.sleep(parquet_buffer.getbuffer().nbytes * max_workers / bandwidth_bytes_per_second)
+
+    with patch.object(dash, 'LoadsApi'), \
+            patch.object(dash, '_upload_parquet_buffer_to_s3', side_effect=upload), \
+            patch.object(dash.Load, 'generate_presigned_url_for_file_upload', return_value=FileUploadResponse(
+                presigned_url={}, sts_credentials={}, path='path/key', bucket='bucket')), \
+            patch('builtins.print'):
+        load = dash.Load(config=MagicMock(spec=dash.DashConfig), load_id='benchmark', parquet_writer_options=options)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(lambda chunk: load.upload_df(chunk.copy()), chunks))
+        return time.perf_counter() - start
+
+
+def run(bandwidth_mbps=100.0):
+    chunks = make_chunks()
+    bandwidth_bytes_per_second = bandwidth_mbps * 1e6 / 8
+    rows = sum(len(chunk) for chunk in chunks)
+    print(f"Writing {rows:,} rows in {len(chunks)} chunks, uploading at {bandwidth_mbps:g} Mbit/s with 4 threads")
+    print(f"  {'profile':<14} {'encode':>9} {'bytes':>10} {'end to end':>11}")
+    results = {}
+    for name, options in PROFILES.items():
+        encode_seconds, nbytes = encode(chunks, options)
+        total_seconds = end_to_end(chunks, options, bandwidth_bytes_per_second)
+        results[name] = (encode_seconds, nbytes, total_seconds)
+        print(f"  {name:<14} {encode_seconds:8.2f}s {nbytes / 1e6:8.1f}MB {total_seconds:10.2f}s")
+    return results
+
+
+if __name__ == '__main__':
+    run(*(float(arg) for arg in sys.argv[1:2]))
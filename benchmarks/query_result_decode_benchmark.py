@@ -0,0 +1,77 @@
+# Benchmark of decoding a page of query results.
+#
+# Query.get_result_page() decodes the response into the QueryResult models of the
+# low level client, which creates a pydantic model for every row and cell.
+# ResultPage.from_json() reads the raw JSON body column by column instead,
+# parsing it with orjson when it is installed.  This compares the two on a page
+# of 10,000 rows and 50 columns.
+#
+# Run from the repository root with:
+#
+#   python benchmarks/query_result_decode_benchmark.py
+
+import json
+import sys
+import timeit
+from os.path import abspath, dirname, join
+from unittest.mock import patch
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), 'src'))
+
+from comodash_api_client_lowlevel import ApiClient  # noqa: E402
+from comotion import dash  # noqa: E402
+
+COLUMN_TYPES = ['varchar', 'bigint', 'double', 'date', 'timestamp']
+SAMPLE_VALUES = {
+    'varchar': 'a string value',
+    'bigint': '1234567',
+    'double': '1234.5678',
+    'date': '2013-04-10',
+    'timestamp': '2013-04-10 01:02:03.456',
+}
+
+
+def make_page(rows=10000, columns=50):
+    column_info = [
+        {'Name': f'column_{i}', 'Type': COLUMN_TYPES[i % len(COLUMN_TYPES)]}
+        for i in range(columns)
+    ]
+    header = {'Data': [{'VarCharValue': column['Name']} for column in column_info]}
+    row = {'Data': [
+        {'VarCharValue': SAMPLE_VALUES[column['Type']]} if i % 7 else {}
+        for i, column in enumerate(column_info)
+    ]}
+    return json.dumps({
+        'resultSet': {'Rows': [header] + [row] * rows},
+        'ResultSetMetaData': {'ColumnInfo': column_info}
+    }).encode()
+
+
+def model_path(body, api_client):
+    """The current path: the generated client deserializes into QueryResult models."""
+    result = api_client.deserialize(body.decode('utf-8'), 'QueryResult', 'application/json')
+    return [[cell.var_char_value for cell in row.data] for row in result.result_set.rows]
+
+
+def run(number=3, repeat=3):
+    body = make_page()
+    api_client = ApiClient()
+    results = {
+        'QueryResult models': min(timeit.repeat(lambda: model_path(body, api_client), number=number, repeat=repeat)),
+    }
+    if dash.orjson is not None:
+        results['ResultPage (orjson)'] = min(timeit.repeat(lambda: dash.ResultPage.from_json(body, skip_header=True), number=number, repeat=repeat))
+    with patch.object(dash, 'orjson', None):
+        results['ResultPage (json)'] = min(timeit.repeat(lambda: dash.ResultPage.from_json(body, skip_header=True), number=number, repeat=repeat))
+    if dash.pa is not None:
+        results['ResultPage + to_arrow()'] = min(timeit.repeat(lambda: dash.ResultPage.from_json(body, skip_header=True).to_arrow(), number=number, repeat=repeat))
+
+    print(f"Decoding a page of 10,000 rows x 50 columns ({len(body) / 1e6:.1f} MB), best of {repeat} x {number}")
+    baseline = results['QueryResult models']
+    for name, total in results.items():
+        print(f"  {name:<26} {total / number * 1e3:9.1f} ms/page  {baseline / total:6.1f}x")
+    return results
+
+
+if __name__ == '__main__':
+    run()
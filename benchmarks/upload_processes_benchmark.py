@@ -0,0 +1,80 @@
+# Benchmark of converting upload chunks to parquet in worker processes.
+#
+# Load.upload_file(processes=n) writes chunks to parquet in n spawned worker
+# processes instead of threads of the uploading process.  Each chunk is pickled to
+# a worker and its parquet bytes are pickled back, and the workers import the SDK
+# when the pool starts, so processes only pay off when encoding, rather than
+# copying, is the bottleneck and there are cores to spare.  This compares the
+# time to convert the same chunks with threads and with processes, with the
+# upload to S3 replaced by a no-op:
+#
+# - pandas: chunks are pandas.DataFrames, as read by upload_file with pandas
+# - arrow: chunks are pyarrow.Tables, as read by upload_file with pyarrow
+#
+# Run from the repository root with:
+#
+#   python benchmarks/upload_processes_benchmark.py [worker counts, default 1 2 4]
+
+import os
+import sys
+import time
+from os.path import abspath, dirname, join
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), 'src'))
+
+from comodash_api_client_lowlevel.models.file_upload_response import FileUploadResponse  # noqa: E402
+from comotion import dash  # noqa: E402
+
+
+def make_chunks(rows=2000000, chunksize=200000, seed=0):
+    random = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'policy_number': np.arange(rows),
+        'premium': random.normal(500, 150, rows).round(2),
+        'status': random.choice(['ACTIVE', 'LAPSED', 'SURRENDERED', 'CLAIMED'], rows),
+        'client_reference': [f'CR{value:010d}' for value in random.integers(0, 10 ** 10, rows)],
+    })
+    return [data.iloc[start:start + chunksize].reset_index(drop=True) for start in range(0, rows, chunksize)]
+
+
+def convert(chunks, workers, processes):
+    with patch.object(dash, 'LoadsApi'), \
+            patch.object(dash, '_upload_parquet_buffer_to_s3'), \
+            patch.object(dash.Load, 'generate_presigned_url_for_file_upload', return_value=FileUploadResponse(
+                presigned_url={}, sts_credentials={}, path='path/key', bucket='bucket')), \
+            patch('builtins.print'):
+        load = dash.Load(config=MagicMock(spec=dash.DashConfig), load_id='benchmark')
+        start = time.perf_counter()
+        load._upload_chunks(
+            ((f"chunk_{i}", chunk) for i, chunk in enumerate(chunks)),
+            max_workers=workers,
+            processes=workers if processes else None
+        )
+        return time.perf_counter() - start
+
+
+def run(worker_counts=(1, 2, 4)):
+    frames = make_chunks()
+    tables = [pa.Table.from_pandas(frame, preserve_index=False) for frame in frames]
+    print(f"Converting {sum(len(frame) for frame in frames):,} rows in {len(frames)} chunks on {os.cpu_count()} cores")
+    print(f"  {'chunks':<7} {'workers':>7} {'threads':>9} {'processes':>10}")
+    results = {}
+    for name, chunks in (('pandas', frames), ('arrow', tables)):
+        for workers in worker_counts:
+            # a DataFrame chunk is changed in place when it is written, so every run gets copies
+            copies = [chunk.copy() if isinstance(chunk, pd.DataFrame) else chunk for chunk in chunks]
+            thread_seconds = convert(copies, workers, processes=False)
+            copies = [chunk.copy() if isinstance(chunk, pd.DataFrame) else chunk for chunk in chunks]
+            process_seconds = convert(copies, workers, processes=True)
+            results[(name, workers)] = (thread_seconds, process_seconds)
+            print(f"  {name:<7} {workers:>7} {thread_seconds:8.2f}s {process_seconds:9.2f}s")
+    return results
+
+
+if __name__ == '__main__':
+    run(tuple(int(arg) for arg in sys.argv[1:]) or (1, 2, 4))
@@ -0,0 +1,319 @@
+"""
+Splitting of parquet files into parts on row group boundaries, without decoding their pages.
+
+Used by `comotion.dash.Load.upload_parquet_file`.
+"""
+
+import copy
+import io
+import os
+import struct
+from typing import List, Optional
+
+# A parquet footer is a thrift FileMetaData struct in the compact protocol.  The functions below read and
+# write any compact protocol struct as {field_id: (type, value)}, which is enough to copy row groups
+# between parquet files without decoding their pages.
+THRIFT_BOOL_TRUE, THRIFT_BOOL_FALSE, THRIFT_BYTE, THRIFT_I16, THRIFT_I32, THRIFT_I64 = 1, 2, 3, 4, 5, 6
+THRIFT_DOUBLE, THRIFT_BINARY, THRIFT_LIST, THRIFT_SET, THRIFT_MAP, THRIFT_STRUCT = 7, 8, 9, 10, 11, 12
+
+
+def thrift_read_varint(data: bytes, position: int):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position = position + 1
+        result = result | (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, position
+        shift = shift + 7
+
+
+def thrift_read_value(data: bytes, position: int, value_type: int):
+    if value_type in (THRIFT_BOOL_TRUE, THRIFT_BOOL_FALSE):
+        # only reached for collection elements, which hold the type as a byte
+        return data[position] == THRIFT_BOOL_TRUE, position + 1
+    if value_type == THRIFT_BYTE:
+        return struct.unpack_from('<b', data, position)[0], position + 1
+    if value_type in (THRIFT_I16, THRIFT_I32, THRIFT_I64):
+        value, position = thrift_read_varint(data, position)
+        return (value >> 1) ^ -(value & 1), position
+    if value_type == THRIFT_DOUBLE:
+        return struct.unpack_from('<d', data, position)[0], position + 8
+    if value_type == THRIFT_BINARY:
+        length, position = thrift_read_varint(data, position)
+        return bytes(data[position:position + length]), position + length
+    if value_type in (THRIFT_LIST, THRIFT_SET):
+        header = data[position]
+        position = position + 1
+        size = header >> 4
+        if size == 15:
+            size, position = thrift_read_varint(data, position)
+        items = []
+        for _ in range(size):
+            item, position = thrift_read_value(data, position, header & 0x0f)
+            items.append(item)
+        return (header & 0x0f, items), position
+    if value_type == THRIFT_MAP:
+        size, position = thrift_read_varint(data, position)
+        if not size:
+            return (0, 0, []), position
+        types = data[position]
+        position = position + 1
+        items = []
+        for _ in range(size):
+            key, position = thrift_read_value(data, position, types >> 4)
+            value, position = thrift_read_value(data, position, types & 0x0f)
+            items.append((key, value))
+        return (types >> 4, types & 0x0f, items), position
+    if value_type == THRIFT_STRUCT:
+        return thrift_read_struct(data, position)
+    raise ValueError(f"Invalid thrift compact protocol type {value_type}")
+
+
+def thrift_read_struct(data: bytes, position: int = 0):
+    """Returns a struct as {field_id: (type, value)} and the position after it."""
+    fields = {}
+    field_id = 0
+    while True:
+        header = data[position]
+        position = position + 1
+        if header == 0:
+            return fields, position
+        value_type = header & 0x0f
+        if header >> 4:
+            field_id = field_id + (header >> 4)
+        else:
+            field_id, position = thrift_read_value(data, position, THRIFT_I16)
+        if value_type in (THRIFT_BOOL_TRUE, THRIFT_BOOL_FALSE):
+            fields[field_id] = (value_type, value_type == THRIFT_BOOL_TRUE)
+        else:
+            value, position = thrift_read_value(data, position, value_type)
+            fields[field_id] = (value_type, value)
+
+
+def thrift_write_varint(out: bytearray, value: int):
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value = value >> 7
+    out.append(value)
+
+
+def thrift_write_value(out: bytearray, value_type: int, value):
+    if value_type in (THRIFT_BOOL_TRUE, THRIFT_BOOL_FALSE):
+        out.append(THRIFT_BOOL_TRUE if value else THRIFT_BOOL_FALSE)
+    elif value_type == THRIFT_BYTE:
+        out += struct.pack('<b', value)
+    elif value_type in (THRIFT_I16, THRIFT_I32, THRIFT_I64):
+        thrift_write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+    elif value_type == THRIFT_DOUBLE:
+        out += struct.pack('<d', value)
+    elif value_type == THRIFT_BINARY:
+        thrift_write_varint(out, len(value))
+        out += value
+    elif value_type in (THRIFT_LIST, THRIFT_SET):
+        item_type, items = value
+        if len(items) < 15:
+            out.append(len(items) << 4 | item_type)
+        else:
+            out.append(0xf0 | item_type)
+            thrift_write_varint(out, len(items))
+        for item in items:
+            thrift_write_value(out, item_type, item)
+    elif value_type == THRIFT_MAP:
+        key_type, item_type, items = value
+        thrift_write_varint(out, len(items))
+        if items:
+            out.append(key_type << 4 | item_type)
+        for key, item in items:
+            thrift_write_value(out, key_type, key)
+            thrift_write_value(out, item_type, item)
+    elif value_type == THRIFT_STRUCT:
+        thrift_write_struct(out, value)
+    else:
+        raise ValueError(f"Invalid thrift compact protocol type {value_type}")
+
+
+def thrift_write_struct(out: bytearray, fields: dict):
+    last_field_id = 0
+    for field_id in sorted(fields):
+        value_type, value = fields[field_id]
+        if value_type in (THRIFT_BOOL_TRUE, THRIFT_BOOL_FALSE):
+            value_type = THRIFT_BOOL_TRUE if value else THRIFT_BOOL_FALSE
+        if 0 < field_id - last_field_id <= 15:
+            out.append((field_id - last_field_id) << 4 | value_type)
+        else:
+            out.append(value_type)
+            thrift_write_value(out, THRIFT_I16, field_id)
+        if value_type not in (THRIFT_BOOL_TRUE, THRIFT_BOOL_FALSE):
+            thrift_write_value(out, value_type, value)
+        last_field_id = field_id
+    out.append(0)
+
+
+class ParquetFileParts():
+    """Splits a parquet file into parts of whole row groups, by copying their column chunks without decoding them.
+
+    Each part is a valid parquet file with the schema and key-value metadata of the file.  Page indexes and
+    bloom filters, which are stored outside the column chunks, are not copied to parts.
+
+    Parameters
+    ----------
+    path : str
+        Path to the parquet file
+
+    Raises
+    ------
+    ValueError
+        If the file is not a parquet file, or is encrypted or refers to column chunks in other files.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            magic = f.read(4)
+            if self.size >= 12:
+                f.seek(self.size - 8)
+            tail = f.read(8)
+            if magic != b'PAR1' or len(tail) != 8 or tail[4:] not in (b'PAR1', b'PARE'):
+                raise ValueError(f"{path} is not a parquet file")
+            if tail[4:] == b'PARE':
+                raise ValueError(f"{path} is an encrypted parquet file, which cannot be split")
+            footer_length = struct.unpack('<I', tail[:4])[0]
+            if footer_length > self.size - 12:
+                raise ValueError(f"{path} is not a parquet file")
+            f.seek(self.size - 8 - footer_length)
+            footer = f.read(footer_length)
+        try:
+            self.metadata = thrift_read_struct(footer)[0]
+            self.row_groups = self.metadata.get(4, (THRIFT_LIST, (THRIFT_STRUCT, [])))[1][1]
+            for row_group in self.row_groups:
+                for column in row_group[1][1][1]:
+                    if 1 in column or 8 in column:
+                        raise ValueError(f"{path} has column chunks in other files or encrypted column chunks, which cannot be split")
+                    if 3 not in column:
+                        raise ValueError(f"{path} has column chunks without metadata")
+        except (IndexError, KeyError, TypeError, struct.error) as e:
+            raise ValueError(f"{path} has an invalid parquet footer: {e}")
+        # the bytes of each row group in a part are its column chunks and its metadata in the footer,
+        # and every part also holds the rest of the footer, i.e. the schema, and the magic numbers
+        self._row_group_bytes = []
+        self._part_overhead = 12 + footer_length
+        for row_group in self.row_groups:
+            row_group_metadata = bytearray()
+            thrift_write_struct(row_group_metadata, row_group)
+            column_chunk_bytes = sum(self._column_chunk_range(column[3][1])[1] for column in row_group[1][1][1])
+            self._row_group_bytes.append(column_chunk_bytes + len(row_group_metadata))
+            self._part_overhead = self._part_overhead - len(row_group_metadata)
+
+    @property
+    def num_rows(self) -> int:
+        return self.metadata[3][1]
+
+    def column_names(self) -> List[str]:
+        """The names of the top level columns in the schema.  Raises ValueError if the schema is invalid."""
+        try:
+            schema = self.metadata[2][1][1]
+            names = []
+            position = 1
+            for _ in range(schema[0].get(5, (THRIFT_I32, 0))[1]):
+                names.append(schema[position][4][1].decode('utf-8'))
+                # skip over the descendants of nested columns
+                remaining = schema[position].get(5, (THRIFT_I32, 0))[1]
+                position = position + 1
+                while remaining:
+                    remaining = remaining - 1 + schema[position].get(5, (THRIFT_I32, 0))[1]
+                    position = position + 1
+        except (IndexError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"{self.path} has an invalid parquet schema: {e}")
+        return names
+
+    @staticmethod
+    def _column_chunk_range(column_metadata: dict):
+        """The (offset, length) of a column chunk, which starts with its dictionary page if it has one."""
+        offset = column_metadata[9][1]
+        if column_metadata.get(11, (THRIFT_I64, 0))[1] > 0:
+            offset = min(offset, column_metadata[11][1])
+        return offset, column_metadata[7][1]
+
+    def parts(self, max_part_bytes: int) -> List[Optional[List[int]]]:
+        """Groups consecutive row groups into parts of at most `max_part_bytes` bytes.
+
+        Returns a list of row group indexes for each part, or [None] if the file is not larger than
+        `max_part_bytes` and is uploaded as it is.  A row group larger than `max_part_bytes` is a part on its own.
+        """
+        if self.size <= max_part_bytes:
+            return [None]
+        parts = []
+        part = []
+        part_bytes = self._part_overhead
+        for index, row_group_bytes in enumerate(self._row_group_bytes):
+            if part and part_bytes + row_group_bytes > max_part_bytes:
+                parts.append(part)
+                part = []
+                part_bytes = self._part_overhead
+            part.append(index)
+            part_bytes = part_bytes + row_group_bytes
+        if part or not parts:
+            parts.append(part)
+        return parts
+
+    def part_bytes(self, part: Optional[List[int]]) -> int:
+        """The approximate size of a part."""
+        if part is None:
+            return self.size
+        return self._part_overhead + sum(self._row_group_bytes[index] for index in part)
+
+    def part_rows(self, part: Optional[List[int]]) -> int:
+        if part is None:
+            return self.num_rows
+        return sum(self.row_groups[index][3][1] for index in part)
+
+    def read_part(self, part: Optional[List[int]]) -> io.BytesIO:
+        """Returns a part as an in-memory parquet file: the file itself if `part` is None, or else its
+        row groups copied byte for byte after a new header, and followed by a new footer."""
+        with open(self.path, 'rb') as f:
+            if part is None:
+                return io.BytesIO(f.read())
+
+            out = io.BytesIO()
+            out.write(b'PAR1')
+            row_groups = []
+            for ordinal, index in enumerate(part):
+                row_group = copy.deepcopy(self.row_groups[index])
+                for column in row_group[1][1][1]:
+                    column_metadata = column[3][1]
+                    offset, length = self._column_chunk_range(column_metadata)
+                    f.seek(offset)
+                    chunk = f.read(length)
+                    if len(chunk) != length:
+                        raise ValueError(f"{self.path} ends within a column chunk")
+                    shift = out.tell() - offset
+                    out.write(chunk)
+                    for field_id in (9, 10, 11):
+                        if column_metadata.get(field_id, (THRIFT_I64, 0))[1] > 0:
+                            column_metadata[field_id] = (THRIFT_I64, column_metadata[field_id][1] + shift)
+                    column[2] = (THRIFT_I64, offset + shift)
+                    # page indexes and bloom filters are not copied
+                    for field_id in (4, 5, 6, 7):
+                        column.pop(field_id, None)
+                    for field_id in (14, 15):
+                        column_metadata.pop(field_id, None)
+                columns = row_group[1][1][1]
+                if columns:
+                    row_group[5] = (THRIFT_I64, columns[0][2][1])
+                if 7 in row_group:
+                    row_group[7] = (THRIFT_I16, ordinal)
+                row_groups.append(row_group)
+
+        metadata = dict(self.metadata)
+        metadata[3] = (THRIFT_I64, sum(row_group[3][1] for row_group in row_groups))
+        metadata[4] = (THRIFT_LIST, (THRIFT_STRUCT, row_groups))
+        footer = bytearray()
+        thrift_write_struct(footer, metadata)
+        out.write(footer)
+        out.write(struct.pack('<I', len(footer)))
+        out.write(b'PAR1')
+        out.seek(0)
+        return out
@@ -6,10 +6,14 @@ import json
 import os
 import re
 import requests
+import threading
+import time
 import webbrowser
 import jwt
 
 from abc import ABC, abstractmethod
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from urllib.parse import urlparse, parse_qs, urlencode
 import uuid
@@ -82,7 +86,7 @@ class OIDCredirectHandler(BaseHTTPRequestHandler):
         )
 
         try:
-            self.server.como_authenticator.credentials_cache.set_refresh_token(
+            self.server.como_authenticator.set_refresh_token(
                 self.id_token_decoded['preferred_username'],
                 json.loads(str(response.text))['refresh_token'])
         except CredentialsCacheException as e:
@@ -207,6 +211,25 @@ class CredentialsCacheInterface():
         """
         pass
 
+    def get_refresh_token(self):
+        """
+        Get refresh token for the current user from cache
+        """
+        pass
+
+    def set_refresh_token(self, username, token):
+        """
+        Set refresh token for user and update current user
+        """
+        pass
+
+    def invalidate(self):
+        """
+        Drop any copy of the credentials held in memory, so that the next call reads from the
+        underlying store.  Called by `Auth` when the stored credentials are rejected.
+        """
+        pass
+
 
 class KeyringCredentialCache(CredentialsCacheInterface):
     """
@@ -253,6 +276,321 @@ class KeyringCredentialCache(CredentialsCacheInterface):
         except keyring.errors.KeyringError as e:
             raise CredentialsCacheException(e)
 
+DEFAULT_TIMEOUT = (10, 30)
+"""
+Default (connect, read) timeout in seconds for requests to the auth provider.
+"""
+
+DEFAULT_MAX_RETRIES = 3
+"""
+Default number of retries, with exponential backoff, for requests to the auth provider that fail
+with a connection error or a 5xx response.
+"""
+
+_http_sessions = {}
+_http_sessions_lock = threading.Lock()
+
+def get_http_session(max_retries=DEFAULT_MAX_RETRIES, backoff_factor=0.5):
+    """
+    Returns a pooled ``requests.Session`` for calls to the auth provider.
+
+    The session is shared by the whole process for the given retry settings, so connections to the
+    issuer are kept alive and reused.  Requests that fail to connect are retried up to `max_retries`
+    times with exponential backoff.  GET requests are also retried on read errors and 5xx responses,
+    but POST requests are not, as the issuer may already have processed a token request and a refresh
+    token or authorization code can only be used once.
+
+    Args:
+        max_retries (int): Number of retries. Defaults to DEFAULT_MAX_RETRIES.
+        backoff_factor (float): Backoff factor between retries, see ``urllib3.util.retry.Retry``. Defaults to 0.5.
+
+    Returns:
+        requests.Session
+    """
+    with _http_sessions_lock:
+        session = _http_sessions.get((max_retries, backoff_factor))
+        if session is None:
+            retry = Retry(
+                total=max_retries,
+                connect=max_retries,
+                read=max_retries,
+                status=max_retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=[500, 502, 503, 504],
+                # connection errors are retried for every method, as the request was not sent
+                allowed_methods=frozenset(['GET']),
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=16)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_sessions[(max_retries, backoff_factor)] = session
+        return session
+
+
+ACCESS_TOKEN_EXPIRY_MARGIN = 30
+"""
+Number of seconds before expiry at which an access token is treated as expired and refreshed.
+"""
+
+def _get_access_token_expiry(token_response, access_token):
+    """
+    Works out when an access token expires, as a unix timestamp.
+
+    Uses `expires_in` from the token endpoint response if available, otherwise the `exp`
+    claim of the token itself.  Returns None if the expiry cannot be determined.
+    """
+    expires_in = token_response.get('expires_in')
+    if expires_in is not None:
+        try:
+            return time.time() + float(expires_in)
+        except (TypeError, ValueError):
+            pass
+    try:
+        return float(jwt.decode(access_token, options={"verify_signature": False})['exp'])
+    except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+        return None
+
+
+class AccessTokenCache():
+    """
+    Thread-safe cache of access tokens, shared by all `Auth` instances in the process.
+
+    Tokens are keyed by `Auth._get_token_cache_key`, i.e. (issuer, orgname, entity_type, client_id), and for
+    users also the credentials cache and refresh token, and are only returned while they are valid for more
+    than `ACCESS_TOKEN_EXPIRY_MARGIN` seconds.
+
+    The cache also keeps counters that can be used to check how often the token endpoint is called,
+    available from `get_stats()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._fetch_locks = {}
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.token_requests = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def get(self, key, margin=ACCESS_TOKEN_EXPIRY_MARGIN, record_stats=True):
+        """
+        Returns the cached access token for key, or None if there is no token valid for more than `margin` seconds.
+        If `record_stats` is False, the lookup is not counted as a hit or miss.
+        """
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is not None and time.time() < entry[1] - margin:
+                if record_stats:
+                    self.cache_hits += 1
+                return entry[0]
+            if record_stats:
+                self.cache_misses += 1
+            return None
+
+    def get_expiry(self, key):
+        """
+        Returns the expiry (unix timestamp) of the cached access token for key, or None if there is none.
+        """
+        with self._lock:
+            entry = self._tokens.get(key)
+            return entry[1] if entry is not None else None
+
+    def set(self, key, access_token, expires_at):
+        """
+        Stores an access token that expires at `expires_at` (unix timestamp).
+        Tokens without a known expiry are not cached.
+        """
+        if expires_at is None:
+            return
+        with self._lock:
+            self._tokens[key] = (access_token, expires_at)
+
+    def get_fetch_lock(self, key):
+        """
+        Returns the lock that must be held while requesting a new token for key.
+        This makes token requests single-flight: one thread fetches while the others wait for its result.
+        """
+        with self._lock:
+            return self._fetch_locks.setdefault(key, threading.Lock())
+
+    def record_token_request(self):
+        """
+        Records a call to the token endpoint.
+        """
+        with self._lock:
+            self.token_requests += 1
+
+    def invalidate(self, key):
+        """
+        Removes the cached token for key.
+        """
+        with self._lock:
+            self._tokens.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all cached tokens and resets the counters.
+        """
+        with self._lock:
+            self._tokens.clear()
+            self._reset_counters()
+
+    def get_stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: with keys `token_requests` (calls made to the token endpoint), `cache_hits` and `cache_misses`.
+        """
+        with self._lock:
+            return {
+                'token_requests': self.token_requests,
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses
+            }
+
+
+class FileCredentialCache(CredentialsCacheInterface):
+    """
+    Credential cache that saves credentials to a json file readable only by the current user.
+
+    This is useful on servers, containers and batch nodes, where no keyring is available or
+    the keyring backend is slow.
+
+    The file defaults to ``~/.comotion/credentials.json``, and can be changed with the
+    ``COMOTION_CREDENTIALS_FILE`` environment variable.
+    """
+
+    CREDENTIALS_FILE_ENVIRONMENT_VARIABLE = 'COMOTION_CREDENTIALS_FILE'
+
+    _file_lock = threading.Lock()
+
+    def __init__(self, issuer, orgname, credentials_file=None):
+        super().__init__(issuer, orgname)
+        if credentials_file is None:
+            credentials_file = os.environ.get(
+                FileCredentialCache.CREDENTIALS_FILE_ENVIRONMENT_VARIABLE,
+                os.path.join(os.path.expanduser('~'), '.comotion', 'credentials.json')
+            )
+        self.credentials_file = credentials_file
+
+    def _get_realm_key(self):
+        return "%s/auth/realms/%s" % (self.issuer, self.orgname)
+
+    def _read(self):
+        try:
+            with open(self.credentials_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            raise CredentialsCacheException(e)
+
+    def _write(self, credentials):
+        directory = os.path.dirname(os.path.abspath(self.credentials_file))
+        temp_file = "%s.%s.tmp" % (self.credentials_file, uuid.uuid4().hex)
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            file_descriptor = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(file_descriptor, 'w') as f:
+                json.dump(credentials, f)
+            # replace in one step so that other processes never see a partial file
+            os.replace(temp_file, self.credentials_file)
+        except OSError as e:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise CredentialsCacheException(e)
+
+    def get_current_user(self):
+        return self._read().get(self._get_realm_key(), {}).get('current_user')
+
+    def get_refresh_token(self):
+        realm = self._read().get(self._get_realm_key(), {})
+        return realm.get('refresh_tokens', {}).get(realm.get('current_user'))
+
+    def set_refresh_token(self, username, token):
+        with FileCredentialCache._file_lock:
+            credentials = self._read()
+            realm = credentials.setdefault(self._get_realm_key(), {})
+            realm['current_user'] = username
+            realm.setdefault('refresh_tokens', {})[username] = token
+            self._write(credentials)
+
+
+class MemoizingCredentialCache(CredentialsCacheInterface):
+    """
+    Credential cache that keeps the credentials read from another credential cache in memory.
+
+    The underlying cache (``KeyringCredentialCache`` by default) is read once per issuer and orgname
+    in the process; later calls are answered from memory.  Saving credentials writes through to
+    the underlying cache.  The memory copy is dropped when `Auth` finds the credentials are no longer valid.
+
+    To wrap a different cache, use ``MemoizingCredentialCache.with_backend``:
+
+    .. code-block:: python
+
+        auth = Auth(
+            'orgname',
+            credentials_cache_class=MemoizingCredentialCache.with_backend(FileCredentialCache)
+        )
+    """
+
+    _memo = {}
+    _memo_lock = threading.Lock()
+
+    def __init__(self, issuer, orgname, backend_class=None):
+        super().__init__(issuer, orgname)
+        if backend_class is None:
+            backend_class = KeyringCredentialCache
+        self.backend = backend_class(issuer, orgname)
+        self._memo_key = (backend_class, issuer, orgname)
+
+    @classmethod
+    def with_backend(cls, backend_class):
+        """
+        Returns a credential cache class, for use as `Auth.credentials_cache_class`, that memoizes `backend_class`.
+        """
+        return type(
+            "Memoizing%s" % (backend_class.__name__),
+            (cls,),
+            {'__init__': lambda self, issuer, orgname: cls.__init__(self, issuer, orgname, backend_class=backend_class)}
+        )
+
+    def _get(self, name, read):
+        with MemoizingCredentialCache._memo_lock:
+            entry = MemoizingCredentialCache._memo.get(self._memo_key, {})
+            if name in entry:
+                return entry[name]
+        value = read()
+        if value is not None:
+            with MemoizingCredentialCache._memo_lock:
+                MemoizingCredentialCache._memo.setdefault(self._memo_key, {})[name] = value
+        return value
+
+    def get_current_user(self):
+        return self._get('current_user', self.backend.get_current_user)
+
+    def get_refresh_token(self):
+        return self._get('refresh_token', self.backend.get_refresh_token)
+
+    def set_refresh_token(self, username, token):
+        self.backend.set_refresh_token(username, token)
+        with MemoizingCredentialCache._memo_lock:
+            MemoizingCredentialCache._memo[self._memo_key] = {
+                'current_user': username,
+                'refresh_token': token
+            }
+
+    def invalidate(self):
+        with MemoizingCredentialCache._memo_lock:
+            MemoizingCredentialCache._memo.pop(self._memo_key, None)
+        self.backend.invalidate()
+
+
 class AuthException(Exception):
     """
     Exception thrown by Auth class
@@ -273,9 +611,14 @@ class Auth():
         orgname (str): The name of the organization.
         issuer (str): The issuer URL for authentication. Defaults to 'https://auth.comotion.us'.
         credentials_cache_class (class): The class used for credential caching. Defaults to KeyringCredentialCache.
+            FileCredentialCache saves credentials to a file instead, and MemoizingCredentialCache keeps them in memory after the first read.
         entity_type (str): The type of entity being authenticated (Auth.USER or Auth.APPLICATION). Defaults to Auth.USER.
         application_client_id (str, optional): The client ID for the application on auth.comotion.us. When entity_type is Auth.USER, defaults to `comotion_cli`
         application_client_secret (str, optional): The client secret for the application on auth.comotion.us. Only valid when entity_type is Auth.APPLICATION.
+        timeout (tuple, optional): (connect, read) timeout in seconds for requests to the auth provider. Defaults to DEFAULT_TIMEOUT.
+        max_retries (int, optional): Number of retries, with exponential backoff, of requests to the auth provider that fail with a connection error or 5xx response. Defaults to DEFAULT_MAX_RETRIES.
+
+    Requests to the auth provider use a pooled session shared by the process (see `get_http_session`), so connections are kept alive between token requests.
     """
 
     USER='user'
@@ -287,13 +630,20 @@ class Auth():
     Constant for application entity type.
     """
 
+    token_cache = AccessTokenCache()
+    """
+    Process-wide cache of access tokens, shared by all `Auth` instances.
+    """
+
     def __init__(self,
                  orgname,
                  issuer='https://auth.comotion.us',
                  credentials_cache_class=None,
                  entity_type=None,
                  application_client_id=None,
-                 application_client_secret=None
+                 application_client_secret=None,
+                 timeout=DEFAULT_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES
                  ):
         
         
@@ -327,6 +677,8 @@ class Auth():
         self.logout_endpoint = "%s/auth/realms/%s/protocol/openid-connect/logout" % (issuer,orgname) # noqa
         self.delegated_endpoint = "%s/auth/realms/%s/account" % (issuer,orgname) # noqa
         self.refresh_token = None
+        self.timeout = timeout
+        self.http_session = get_http_session(max_retries=max_retries)
 
         self.credentials_cache = credentials_cache_class(issuer, orgname)
 
@@ -383,15 +735,50 @@ class Auth():
             server.socket.close()
 
     
-    def get_access_token(self):
+    def set_refresh_token(self, username, token):
+        """
+        Saves a new refresh token for username in the credentials cache, and drops the cached access token
+        of the previous one, so that logging in again, or as another user, takes effect straight away.
+
+        Args:
+            username (str): The user the refresh token belongs to.
+            token (str): The refresh token.
+        """
+        previous_cache_key = self._get_token_cache_key()
+        self.credentials_cache.set_refresh_token(username, token)
+        Auth.token_cache.invalidate(previous_cache_key)
+
+    def _get_token_cache_key(self):
+        if self.entity_type != Auth.USER:
+            return (self.issuer, self.orgname, self.entity_type, self.application_client_id)
+        # user access tokens belong to the refresh token they were issued for, so a token of the
+        # previous user is not returned after another user logs in
+        refresh_token = self.credentials_cache.get_refresh_token()
+        return (
+            self.issuer,
+            self.orgname,
+            self.entity_type,
+            self.application_client_id,
+            type(self.credentials_cache).__name__,
+            hashlib.sha256(refresh_token.encode()).hexdigest() if refresh_token else None
+        )
+
+    def get_access_token(self, force_refresh=False):
         """
         Retrieve an access token from the auth provider.
 
-        This method interacts with the authentication provider to retrieve an
-        access token. The access token is not cached and must be retrieved
-        each time this method is called. The method handles both user and
-        application entity types, using the appropriate authentication mechanism
-        for each.
+        Access tokens are cached for the process in `Auth.token_cache`, shared by all `Auth`
+        instances with the same issuer, orgname, entity type and client id, and for users the same
+        credentials cache and refresh token. A cached token is
+        returned until it is within `ACCESS_TOKEN_EXPIRY_MARGIN` seconds of expiry, after which a
+        new one is requested. The method handles both user and application entity types, using
+        the appropriate authentication mechanism for each.
+
+        Token requests are single-flight: if several threads need a new token at the same time,
+        one of them requests it and the others wait for and share the result.
+
+        Args:
+            force_refresh (bool): If True, ignore any cached token and request a new one. Defaults to False.
 
         Returns:
             str: The access token retrieved from the auth provider.
@@ -400,6 +787,21 @@ class Auth():
             UnAuthenticatedException: If there is an error retrieving the access token
                                       from the auth provider.
         """
+        cache_key = self._get_token_cache_key()
+        if not force_refresh:
+            access_token = Auth.token_cache.get(cache_key)
+            if access_token is not None:
+                return access_token
+
+        with Auth.token_cache.get_fetch_lock(cache_key):
+            if not force_refresh:
+                # another thread may have fetched a token while this one was waiting
+                access_token = Auth.token_cache.get(cache_key, record_stats=False)
+                if access_token is not None:
+                    return access_token
+            return self._request_access_token(cache_key)
+
+    def _request_access_token(self, cache_key):
         try: 
             if self.entity_type == Auth.USER:
                 refresh_token = self.credentials_cache.get_refresh_token()
@@ -415,17 +817,28 @@ class Auth():
                     "client_secret": self.application_client_secret
                 }
 
-            response = requests.post(
+            Auth.token_cache.record_token_request()
+            response = self.http_session.post(
                 self.token_endpoint,
-                data=payload
+                data=payload,
+                timeout=self.timeout
             )
 
             if response.status_code == requests.codes.ok:
-                return json.loads(str(response.text))['access_token']
+                json_response = json.loads(str(response.text))
+                access_token = json_response['access_token']
+                Auth.token_cache.set(
+                    cache_key,
+                    access_token,
+                    _get_access_token_expiry(json_response, access_token)
+                )
+                return access_token
             else:
+                Auth.token_cache.invalidate(cache_key)
                 json_response = json.loads(str(response.text))
                 if 'error' in json_response:
                     if json_response['error'] == 'invalid_grant':
+                        self.credentials_cache.invalidate()
                         raise UnAuthenticatedException("Your credentials are not valid. Run `comotion authenticate` to refresh your credentials.")
                     else:
                         raise UnAuthenticatedException("There was a problem with the request: " + json_response.get('error_description', "unknown system error. This is what the system is returning: " + response.text) + f" ({json_response['error']})")
@@ -2,10 +2,10 @@ import click
 import json
 import requests
 import os
-from .auth import Auth, KeyringCredentialCache
+from .auth import Auth, KeyringCredentialCache, FileCredentialCache
 from comotion.dash import DashConfig
 from comotion.auth import Auth
-from comotion.dash import Query, Load, Migration
+from comotion.dash import Query, Load, Migration, DEFAULT_MAX_PARQUET_PART_BYTES
 from comotion.auth import UnAuthenticatedException
 import comotion
 
@@ -26,6 +26,17 @@ class Config(object):
     def __init__(self):
         self.orgname = None
         self.issuer = None
+        self.credentials_cache_class = KeyringCredentialCache
+
+    def get_auth(self):
+        """
+        Returns an Auth object for the configured orgname, issuer and credentials cache
+        """
+        return Auth(
+            self.orgname,
+            issuer=self.issuer,
+            credentials_cache_class=self.credentials_cache_class
+        )
 
 
 # make a decorator the allows for config to be passed to multiple actions
@@ -33,27 +44,6 @@ class Config(object):
 pass_config = click.make_pass_decorator(Config, ensure=True)
 
 
-def _call_well_known(issuer, orgname):
-    return requests.get(
-        '%s/auth/realms/%s/.well-known/openid-configuration' % (issuer,orgname)) # noqa: E501
-
-
-def _validate_orgname(issuer, orgname):
-    """
-    Validates orgname by calling the well-known endpoint of the auth service.
-
-    If it doesnt exist, then a BadParameter exception will be thrown
-    If connection doesnt ecist, then will throw a UsageException
-    """
-    try:
-        # check that auth endpoint exists and is happy
-        well_known_response = _call_well_known(issuer, orgname)
-        if well_known_response.status_code != requests.codes.ok:
-            raise click.BadParameter("%s cannot be found at %s.  Make sure you have the correct orgname" % (orgname,issuer), param_hint='orgname') # noqa E501
-
-    except requests.exceptions.ConnectionError as e :
-        raise click.UsageError("Struggling to connect to the internet!")
-
 def safe_entry_point():
       """
       this is the initial entrypoint for the cli and handles all uncaught exceptions
@@ -79,15 +69,24 @@ def safe_entry_point():
     prompt=False,
     default='https://auth.comotion.us',
     help='override issuer for testing')
+@click.option(
+    "--credentials-cache", "credentials_cache",
+    type=click.Choice(['keyring', 'file'], case_sensitive=False),
+    required=False,
+    default='keyring',
+    show_default=True,
+    help='where to save credentials. Use file on servers and containers without a keyring. The file location can be set with the COMOTION_CREDENTIALS_FILE environment variable.')
 @pass_config
-def cli(config, orgname, issuer):
+def cli(config, orgname, issuer, credentials_cache):
     """
     Command Line Interface for interacting with the Comotion APIs.
     """
     config.orgname = orgname
     config.issuer = issuer
-
-    # _validate_orgname(config.issuer, config.orgname)
+    if credentials_cache.lower() == 'file':
+        config.credentials_cache_class = FileCredentialCache
+    else:
+        config.credentials_cache_class = KeyringCredentialCache
 
 
 @cli.command()
@@ -99,10 +98,7 @@ def authenticate(config):
 
     click.echo("logging you in.  You may see a popup screen in your default browser to complete authentication...") # noqa
 
-    como_auth = Auth(
-        config.orgname,
-        config.issuer
-    )
+    como_auth = config.get_auth()
     como_auth.authenticate()
 
 
@@ -124,10 +120,7 @@ def get_access_token(config):
     """
 
     try:
-        como_auth = Auth(
-            config.orgname,
-            config.issuer
-        )
+        como_auth = config.get_auth()
         click.echo(como_auth.get_access_token())
     except UnAuthenticatedException as e:
         raise click.ClickException(e)
@@ -140,8 +133,8 @@ def get_current_user(config):
     Get an id token for the logged in user
     """
 
-    keyring_cache = KeyringCredentialCache(config.issuer, config.orgname)
-    click.echo(keyring_cache.get_current_user())
+    credentials_cache = config.credentials_cache_class(config.issuer, config.orgname)
+    click.echo(credentials_cache.get_current_user())
 
 
 # DASH CLI
@@ -172,7 +165,7 @@ def start_query(config, sql):
     
     query_id=$(comotion -opoc2 dash start-query "select 1")
     """
-    config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    config = DashConfig(config.get_auth())
     query = Query(query_text=sql, config=config)
     click.echo(query.query_id)
 
@@ -185,7 +178,7 @@ def start_query(config, sql):
 @pass_config
 def stop_query(config, query_id):
     """ Stop a query"""
-    config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    config = DashConfig(config.get_auth())
     query=Query(query_id=query_id, config=config)
     query.stop()
     click.echo('Query stopped')
@@ -201,7 +194,7 @@ def stop_query(config, query_id):
 @pass_config
 def query_state(config, query_id):
     """Get status of a query.  Takes the query_id as an argument"""
-    config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    config = DashConfig(config.get_auth())
     query = Query(query_id=query_id, config=config)
     click.echo(query.state())
 
@@ -215,7 +208,7 @@ def query_state(config, query_id):
 @pass_config
 def query_info(config, query_id):
     """Get info about the state of a query.  Takes the query_id as an argument"""
-    config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    config = DashConfig(config.get_auth())
     query = Query(query_id=query_id, config=config)
     query_info = query.get_query_info()
     result = query_info.status.state
@@ -232,9 +225,9 @@ def query_info(config, query_id):
 @click.option(
     '-f', '--file',
     required=True,
-    type=click.File(
-        mode='wb',
-        atomic=True
+    type=click.Path(
+        dir_okay=False,
+        writable=True
     ),
     help='file path to output file to.'
 )
@@ -242,20 +235,49 @@ def query_info(config, query_id):
     '-q', '--query_id',
     help='to download a previously run query, query_id of the query'
 )
+@click.option(
+    '-c', '--connections',
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help='number of connections to download byte ranges of the file over in parallel.'
+)
+@click.option(
+    '-r', '--resume',
+    is_flag=True,
+    default=False,
+    help='keep progress beside the file, and continue a previously failed download of the same query.'
+)
+@click.option(
+    '-z', '--compressed',
+    is_flag=True,
+    default=False,
+    help='transfer the file compressed, and decompress it as it downloads.'
+)
 @pass_config
-def download(config, query_id, file, sql):
+def download(config, query_id, file, sql, connections, resume, compressed):
     """
     Downloads a csv of the result of a query
 
     To download a previously run query, use --query_id, -q option.
 
     To run and download a new query provide the sql as an argument i.e. `download "select 1"`
+
+    For large results, use --connections, -c to download parts of the file in parallel.
+
+    Use --resume, -r so that a failed download can be continued by running the same command again.
+
+    Use --compressed, -z to transfer the file compressed over slow connections.  This cannot be combined
+    with --connections or --resume.
     """
-    config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    config = DashConfig(config.get_auth())
 
     if query_id == None and sql == None:
         raise click.BadParameter('Either --query_id must be supplied or sql for query must be given')
 
+    if compressed and (resume or connections > 1):
+        raise click.BadParameter('--compressed cannot be combined with --connections or --resume')
+
     click.echo("running query...")
     try:
         query = Query(query_id=query_id, query_text=sql, config=config)
@@ -271,19 +293,40 @@ def download(config, query_id, file, sql):
             "There was a problem running the query: "
             + final_query_info.status.state_change_reason
         )
+    if resume:
+        try:
+            click.echo(f"Downloading to {file} over {connections} connection(s)...")
+            size = query.download_csv_resumable(file, max_connections=connections)
+            click.echo(f"downloaded {size} bytes")
+        except Exception as e:
+            raise click.UsageError(
+                f"{e}\nProgress has been saved. Run the command again to resume the download."
+            )
+        return
+
+    if connections > 1:
+        try:
+            with click.open_file(file, mode='wb', atomic=True) as f:
+                click.echo(f"Downloading to {file} over {connections} connections...")
+                size = query.download_csv_ranges(f, max_connections=connections)
+                click.echo(f"downloaded {size} bytes, finalising file...")
+        except Exception as e:
+            raise click.UsageError(e)
+        return
+
     try:
-        with query.get_csv_for_streaming() as response:
-            f = file
-            size = 0
+        with query.get_csv_for_streaming(compressed=compressed) as response, click.open_file(file, mode='wb', atomic=True) as f:
             content_length = (response.getheader('Content-Length'))
             with click.progressbar(
                 length=int(content_length),
-                label='Downloading to ' + file.name
+                label='Downloading to ' + file
             ) as bar:
+                # progress is counted in bytes transferred, which are compressed with --compressed
+                transferred = 0
                 for chunk in response.stream(524288):
-                    size = size + len(chunk)
                     f.write(chunk)
-                    bar.update(size)
+                    bar.update(response.tell() - transferred)
+                    transferred = response.tell()
                 tell=response.tell()
                 if (tell != int(content_length)):
                     raise click.UsageError(
@@ -330,7 +373,7 @@ def create_load(
     """ Create a data upload load for Dash for table TABLE_NAME and returns the new LoadId.  
     Files can be uploaded to a load, and once committed all files will be pushed to the lake in an atomic way.
      This stores the load_id in the COMOTION_DASH_QUERY_ID environment variable for future actions. """
-    config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    config = DashConfig(config.get_auth())
     load = Load(
         load_type=load_type,
         table_name=table_name,
@@ -351,23 +394,39 @@ def create_load(
     help = "Optional custom key for the file. This will ensure idempontence. If multiple files are uploaded to the same load with the same file_key, only the last one will be loaded. Must be lowercase, can include underscores.",
     required=False
 )
+@click.option(
+    '--max_part_size', '-m',
+    help="Files larger than this many MB are split on row group boundaries, without decoding them, into parts of at most this size.  Parts are uploaded with the file key followed by an index.",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_PARQUET_PART_BYTES // 1048576,
+    show_default=True
+)
 @pass_config
 def upload_file(
         config, 
         load_id,
         input_file,
-        file_key
+        file_key,
+        max_part_size
     ):
-    """ Upload a file to a Dash Load. """
+    """ Upload a parquet file to a Dash Load. """
     import boto3
     import awswrangler as wr
 
-    config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    config = DashConfig(config.get_auth())
     load = Load(config=config, load_id=load_id)
 
     if not input_file.lower().endswith('.parquet'):
         raise click.BadParameter("The file must be a parquet file with a parquet extension")
-    
+
+    if os.path.getsize(input_file) > max_part_size * 1048576:
+        click.echo("splitting and uploading file")
+        try:
+            load.upload_parquet_file(input_file, file_key=file_key, max_part_bytes=max_part_size * 1048576)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+        return
+
     click.echo("getting upload info")
     file_upload_info = None
     if file_key:
@@ -422,7 +481,7 @@ def commit_load(
     comotion -imyorgname dash commit-load --load_id myloadid -c "count(*)" "53" -c "sum(my_value)" "123.3"
 
     """
-    config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    config = DashConfig(config.get_auth())
     load = Load(config=config, load_id=load_id)
     check_sum_dict = {}
     for check_sum_expression, check_sum_expected in check_sum:
@@ -465,7 +524,7 @@ def get_load_info(
     load_error_messages=$(comotion dash get-load-info -l myloadid 2>&1 > /dev/null)
 
     y """
-    config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    config = DashConfig(config.get_auth())
     load = Load(config=config, load_id=load_id)
     load_info = load.get_load_info()
     click.echo(load_info.load_status)
@@ -495,7 +554,7 @@ def start_migration(
 
     Initialising this class starts the migration on Comotion Dash.  If a migration is already in progress, initialisation will monitor the active load.
     """    
-    dash_config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    dash_config = DashConfig(config.get_auth())
     Migration(
         config=dash_config
     ).start(
@@ -517,7 +576,7 @@ def migration_status(
 
     Initialising this class starts the migration on Comotion Dash.  If a migration is already in progress, initialisation will monitor the active load.
     """    
-    config = DashConfig(Auth(config.orgname, issuer=config.issuer))
+    config = DashConfig(config.get_auth())
     migration = Migration(
         config=config
     ).status()
@@ -4,7 +4,13 @@ import json
 import requests
 import csv
 import time
-from typing import Union, Callable, List, Optional, Dict, Any
+import queue
+import asyncio
+import ssl
+import threading
+import weakref
+import hashlib
+from typing import Union, Callable, List, Optional, Dict, Any, Awaitable, AsyncIterator, Iterator
 from os.path import join, basename, isdir, isfile, splitext
 from os import listdir
 import logging
@@ -13,9 +19,11 @@ import pandas as pd
 try:
     import pyarrow as pa
     import pyarrow.parquet as pq
+    import pyarrow.csv as pa_csv
 except ImportError:
     pa = None
     pq = None
+    pa_csv = None
     logger.warning("Optional dependency 'pyarrow' is not installed; Arrow/Parquet features are unavailable.")
 try:
     import boto3
@@ -44,11 +52,23 @@ try:
 except ImportError:
     tqdm = None
     logger.warning("Optional dependency 'tqdm' is not installed; progress bars are unavailable.")
-from datetime import datetime, timedelta
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    logger.warning("Optional dependency 'orjson' is not installed; query results are decoded with the slower json module.")
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+    logger.warning("Optional dependency 'aiohttp' is not installed; asyncio features are unavailable.")
+from datetime import datetime, timedelta, date
 from comotion import Auth
+from comotion._parquet import ParquetFileParts
 import comodash_api_client_lowlevel
 from comodash_api_client_lowlevel import QueriesApi, LoadsApi, MigrationsApi
 from comodash_api_client_lowlevel.models.query_text import QueryText
+import urllib3
 from urllib3.exceptions import IncompleteRead
 from urllib3.response import HTTPResponse
 from comodash_api_client_lowlevel import Load
@@ -59,12 +79,58 @@ from comodash_api_client_lowlevel.models.file_upload_response import FileUploadR
 from comodash_api_client_lowlevel.models.load_commit import LoadCommit
 from comodash_api_client_lowlevel.models.load import Load
 from comodash_api_client_lowlevel.models.query_id import QueryId
+from comodash_api_client_lowlevel.models.query_result import QueryResult as QueryResultModel
 from comodash_api_client_lowlevel.rest import ApiException
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import heapq
+import itertools
+import multiprocessing
 import random 
 import string
 from inspect import signature, Parameter
 
+class _BackgroundTokenRefresher(threading.Thread):
+    """
+    Daemon thread that renews the access token of a `DashConfig` ahead of its expiry,
+    so that API calls do not have to wait for a token request.
+
+    Only a weak reference to the config is kept, so the thread stops once the config is no longer used.
+    """
+
+    RETRY_INTERVAL = 10
+
+    def __init__(self, config, refresh_ahead: float):
+        super().__init__(name="comotion-token-refresher", daemon=True)
+        self._config_ref = weakref.ref(config)
+        self.refresh_ahead = refresh_ahead
+        self.stopped = threading.Event()
+
+    def _seconds_until_refresh(self, config):
+        expiry = config._get_access_token_expiry()
+        if expiry is None:
+            return 0
+        return expiry - self.refresh_ahead - time.time()
+
+    def run(self):
+        wait_time = 0
+        while not self.stopped.wait(wait_time):
+            config = self._config_ref()
+            if config is None:
+                return
+            try:
+                if self._seconds_until_refresh(config) <= 0:
+                    config._refresh_token(force_refresh=True)
+                wait_time = max(self._seconds_until_refresh(config), self.RETRY_INTERVAL)
+            except Exception as e:
+                logger.warning(f"Background refresh of access token failed: {e}")
+                wait_time = self.RETRY_INTERVAL
+            del config
+
+    def stop(self):
+        self.stopped.set()
+
+
 class DashConfig(comodash_api_client_lowlevel.Configuration):
     """
     Object containing configuration information for Dash API
@@ -75,9 +141,28 @@ class DashConfig(comodash_api_client_lowlevel.Configuration):
         comotion.Auth object holding information about authentication
     zone: str, optional
         The zone to use for the API. If not provided, defaults to None, i.e. the main zone.
+    background_token_refresh: bool, optional
+        If True, a background thread renews the access token `token_refresh_ahead` seconds before it expires,
+        so that API calls never wait for a token request.  Defaults to False, in which case the token
+        is refreshed when an API call finds it within 30 seconds of expiry.
+    token_refresh_ahead: int, optional
+        Number of seconds before expiry at which the background refresher renews the token. Defaults to 120.
+
+    A single ``ApiClient`` (and so a single connection pool) is created per config on first use
+    and shared by all `Query`, `Load` and `Migration` objects created with the config, so
+    connections are reused between API calls. See `DashConfig.get_api_client`.
+
+    Token refresh is single-flight: when several threads find the token close to expiry, one of
+    them refreshes it and the others wait for the new token.
     """
 
-    def __init__(self, auth: Auth, zone: str = None):
+    def __init__(
+        self,
+        auth: Auth,
+        zone: str = None,
+        background_token_refresh: bool = False,
+        token_refresh_ahead: int = 120
+    ):
         if not(isinstance(auth, Auth)):
             raise TypeError("auth must be of type comotion.Auth")
 
@@ -92,40 +177,139 @@ class DashConfig(comodash_api_client_lowlevel.Configuration):
             access_token=None
         )
 
+        self._api_client = None
+        self._api_client_lock = threading.Lock()
+        self._token_lock = threading.Lock()
+        self._token_refresher = None
+        self._access_token_expiry = (None, None)
+
+        if background_token_refresh:
+            self.start_background_token_refresh(refresh_ahead=token_refresh_ahead)
+
         # comodash_api_client_lowlevel.Configuration.set_default(config)
 
-    def _check_and_refresh_token(self):
+    def get_api_client(self) -> comodash_api_client_lowlevel.ApiClient:
         """
-        checks whether the access token is still valid otherwise refreshes it
+        Returns the low level ``ApiClient`` for this config, creating it on first use.
+
+        The client owns the connection pool used to call the Dash API, and is shared by all objects
+        created with this config.  The access token is checked and refreshed before every request
+        (see `DashConfig.auth_settings`), so the client can be kept for the life of the config.
+
+        Returns
+        -------
+        comodash_api_client_lowlevel.ApiClient
         """
-        import jwt
-        # If there's no token, get one
-        if not self.access_token:
-            self.access_token = self.auth.get_access_token()
-            return
+        with self._api_client_lock:
+            if self._api_client is None:
+                self._api_client = comodash_api_client_lowlevel.ApiClient(self)
+            return self._api_client
 
-        # Decode the token payload without verification (unsafe for actual use, see below)
-        try:
-            payload = jwt.decode(self.access_token, options={"verify_signature": False})
+    def close(self):
+        """
+        Closes the pooled connections of the shared ``ApiClient``.  A new client is created if the config is used again.
+        """
+        with self._api_client_lock:
+            if self._api_client is not None:
+                self._api_client.rest_client.pool_manager.clear()
+                self._api_client = None
+
+    def start_background_token_refresh(self, refresh_ahead: int = 120):
+        """
+        Starts a daemon thread that renews the access token `refresh_ahead` seconds before it expires.
+        Does nothing if the background refresher is already running.
 
-            # Get the current time and expiration time from the token
-            now = datetime.utcnow()
-            exp = datetime.fromtimestamp(payload['exp'])
+        Parameters
+        ----------
+        refresh_ahead : int, optional
+            Number of seconds before expiry at which the token is renewed. Should be more than 30 seconds,
+            the window in which API calls refresh the token themselves. Defaults to 120.
+        """
+        if self._token_refresher is not None and self._token_refresher.is_alive():
+            return
+        self._token_refresher = _BackgroundTokenRefresher(self, refresh_ahead=refresh_ahead)
+        self._token_refresher.start()
 
-            # If the token has expired, refresh it
-            if now >= (exp - timedelta(seconds=30)):
-                self.access_token = self.auth.get_access_token()
+    def stop_background_token_refresh(self):
+        """
+        Stops the background token refresher if it is running.
+        """
+        if self._token_refresher is not None:
+            self._token_refresher.stop()
+            self._token_refresher = None
+
+    def _get_access_token_expiry(self):
+        """
+        Returns the expiry of the current access token as a unix timestamp, or None if it cannot be determined.
 
+        The token is only decoded the first time it is seen; the expiry is then kept alongside the token,
+        so the check made before every API call is a timestamp comparison.
+        """
+        access_token = self.access_token
+        if not access_token:
+            return None
+        cached_token, cached_expiry = self._access_token_expiry
+        if cached_token == access_token:
+            return cached_expiry
+        expiry = self._decode_access_token_expiry(access_token)
+        self._access_token_expiry = (access_token, expiry)
+        return expiry
+
+    @staticmethod
+    def _decode_access_token_expiry(access_token):
+        import jwt
+        try:
+            payload = jwt.decode(access_token, options={"verify_signature": False})
+            return float(payload['exp'])
         except jwt.ExpiredSignatureError:
-            # If the token is expired, refresh it
-            self.access_token = self.auth.get_access_token()
-        except jwt.DecodeError as e:
-            # Handle cases for invalid token
-            self.access_token = self.auth.get_access_token()
+            return None
+        except jwt.DecodeError:
+            return None
         except KeyError:
-            # Handle cases for tokens with unexpected payload
-            self.access_token = self.auth.get_access_token()
+            return None
+
+    def _get_identity(self) -> list:
+        """
+        Returns the identity the config is authenticated as: the entity type and client id of the auth,
+        and the subject of the access token, which identifies the user or service account.
+        Results shared between queries are keyed by it, as row level security depends on who runs a query.
+        """
+        import jwt
+        self._check_and_refresh_token()
+        try:
+            subject = jwt.decode(self.access_token, options={"verify_signature": False}).get('sub')
+        except jwt.DecodeError:
+            subject = None
+        return [self.auth.entity_type, getattr(self.auth, 'application_client_id', None), subject]
+
+    def _token_needs_refresh(self):
+        """
+        Whether the access token is missing, invalid or within 30 seconds of expiry.
+        """
+        expiry = self._get_access_token_expiry()
+        if expiry is None:
+            return True
+        return time.time() >= expiry - 30
 
+    def _refresh_token(self, force_refresh=False):
+        """
+        Gets a new access token.  Only one thread refreshes at a time; threads waiting on the
+        refresh use the token it obtained rather than requesting another one.
+        """
+        with self._token_lock:
+            # the token may have been refreshed while this thread was waiting for the lock
+            if force_refresh or self._token_needs_refresh():
+                access_token = self.auth.get_access_token(force_refresh=force_refresh)
+                # decode the expiry once, when the token is obtained
+                self._access_token_expiry = (access_token, self._decode_access_token_expiry(access_token))
+                self.access_token = access_token
+
+    def _check_and_refresh_token(self):
+        """
+        checks whether the access token is still valid otherwise refreshes it
+        """
+        if self._token_needs_refresh():
+            self._refresh_token()
     
     def auth_settings(self):
         """Gets Auth Settings dict for api client.
@@ -137,1562 +321,4858 @@ class DashConfig(comodash_api_client_lowlevel.Configuration):
         self._check_and_refresh_token()
         return super().auth_settings()
 
-class Query():
+class PollingTimeoutException(Exception):
+    """
+    Raised when a query, load or migration does not reach a complete state
+    within the timeout of its :class:`PollingStrategy`.
     """
-    The query object starts and tracks a query on Comotion Dash.
 
-    Initialising this class runs a query on Comotion Dash and stores the
-    resulting query id in `query_id`
+    def __init__(self, message, last_status=None):
+        super().__init__(message)
+        self.last_status = last_status
 
+
+class PollingStrategy():
     """
+    Controls how often the status of a long running job on Comotion Dash is
+    checked while waiting for it to complete.
 
-    COMPLETED_STATES = ['SUCCEEDED', 'CANCELLED', 'FAILED']
-    SUCCEEDED_STATE = 'SUCCEEDED'
+    The first check happens immediately.  The wait between checks starts at
+    `initial_interval` and is multiplied by `multiplier` after every check up to
+    `max_interval`, so short queries return quickly while long loads are not
+    polled needlessly often.  Each wait is randomised by up to `jitter` of its
+    length so that many waiting clients do not poll in lockstep.
+
+    The same strategy object can be shared by any number of :class:`Query`,
+    :class:`Load` and :class:`Migration` objects.
+
+    Parameters
+    ----------
+    initial_interval : float
+        Seconds to wait after the first status check. Defaults to 0.5
+    max_interval : float
+        Maximum seconds to wait between status checks. Defaults to 30
+    multiplier : float
+        Factor by which the wait grows after each check. Defaults to 1.5
+    jitter : float
+        Fraction, between 0 and 1, by which each wait is randomly varied. Defaults to 0.1
+    timeout : float
+        Overall number of seconds to wait before raising :class:`PollingTimeoutException`.
+        Defaults to None, which waits indefinitely.
+    """
 
     def __init__(
         self,
-        config: DashConfig,
-        query_text: str = None,
-        query_id: str = None
+        initial_interval: float = 0.5,
+        max_interval: float = 30,
+        multiplier: float = 1.5,
+        jitter: float = 0.1,
+        timeout: float = None
     ):
-        """
+        if initial_interval <= 0 or max_interval <= 0:
+            raise ValueError("initial_interval and max_interval must be greater than zero")
+        if multiplier < 1:
+            raise ValueError("multiplier must be at least 1")
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+        if timeout is not None and timeout < 0:
+            raise ValueError("timeout must not be negative")
+
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.timeout = timeout
+
+    def intervals(self):
+        """Yields the successive waits, in seconds, between status checks."""
+        interval = min(self.initial_interval, self.max_interval)
+        while True:
+            yield interval * (1 + random.uniform(-self.jitter, self.jitter))
+            interval = min(interval * self.multiplier, self.max_interval)
+
+    def wait(
+        self,
+        get_status: Callable[[], Any],
+        is_complete: Callable[[Any], bool],
+        description: str = 'job'
+    ):
+        """Calls `get_status` until `is_complete` is true for its result.
+
         Parameters
         ----------
-        query_text : str
-            sql of the query to run
-        config : DashConfig
-            Object of type DashConfig including configuration details
-        query_id : str, optional
-            Query id of existing query.  If not provided, then a new query will be started on Dash
+        get_status : callable
+            Function with no arguments returning the current status
+        is_complete : callable
+            Function taking the status and returning whether it is final
+        description : str
+            Description of what is being waited on, used in the timeout message
+
+        Returns
+        -------
+        Any
+            The first status for which `is_complete` is true
 
         Raises
         ------
-        TypeError
-            If config is not of type DashConfig
+        PollingTimeoutException
+            If the status is not complete within `timeout` seconds
+        """
+        deadline = self._get_deadline()
+        for interval in self.intervals():
+            status = get_status()
+            if is_complete(status):
+                return status
+            time.sleep(self._get_wait(interval, deadline, status, description))
+
+    async def wait_async(
+        self,
+        get_status: Callable[[], Awaitable[Any]],
+        is_complete: Callable[[Any], bool],
+        description: str = 'job'
+    ):
+        """Asyncio version of :meth:`PollingStrategy.wait`, where `get_status` is a coroutine function.
+        The event loop is free to run other tasks between status checks.
+        """
+        deadline = self._get_deadline()
+        for interval in self.intervals():
+            status = await get_status()
+            if is_complete(status):
+                return status
+            await asyncio.sleep(self._get_wait(interval, deadline, status, description))
+
+    def _get_deadline(self):
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    def _get_wait(self, interval, deadline, status, description):
+        if deadline is None:
+            return interval
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise PollingTimeoutException(
+                f"Timed out after {self.timeout} seconds waiting for {description} to complete",
+                last_status=status
+            )
+        return min(interval, remaining)
 
-        ValueError
-            if one of query_id or query_text is not provided
 
-        """
+DEFAULT_MAX_UPLOAD_BYTES_IN_FLIGHT = 512 * 1048576
+DEFAULT_DOWNLOAD_RANGE_SIZE = 32 * 1048576
+DEFAULT_MAX_PARQUET_PART_BYTES = 256 * 1048576
+_UNCHUNKED_CHUNKSIZE = 100000000
 
-        if not(isinstance(config, DashConfig)):
-            raise TypeError("config must be of type comotion.dash.DashConfig")
-        
-        self.config = config
-        with comodash_api_client_lowlevel.ApiClient(self.config) as api_client:
-            self.query_api_instance = QueriesApi(api_client)
-            if query_id:
-                # query_info = self.query_api_instance.get_query(query_id)
-                self.query_id = query_id
-                # self.query_text = query_info.query
-            elif query_text:
-                self.query_text = query_text
-                query_text_model = QueryText(query=query_text)
-                try:
-                    query_id_model = self.query_api_instance.run_query(query_text_model) # noqa
-                except comodash_api_client_lowlevel.exceptions.BadRequestException as exp:
-                    raise ValueError(json.loads(exp.body)['message'])
-                    
-                self.query_id = query_id_model.query_id
-            else:
-                raise ValueError("One of query_id or query_text must be provided")
 
-    def refresh_api_instance(self):
-            zone = self.config.zone
-            auth_token = self.config.auth
-            orgname = auth_token.orgname
-            entity_type = auth_token.entity_type
-
-            if entity_type == Auth.APPLICATION:
-                application_client_id = auth_token.application_client_id
-                application_client_secret = auth_token.application_client_secret
-            else:
-                application_client_id = None
-                application_client_secret = None
-            
-            self.config = DashConfig(
-                Auth(
-                    orgname=orgname,
-                    entity_type=entity_type,
-                    application_client_id=application_client_id,
-                    application_client_secret=application_client_secret
-                ),
-                zone = zone
-            )
-            with comodash_api_client_lowlevel.ApiClient(self.config) as api_client:
-                # Create an instance of the API class with provided parameters
-                self.query_api_instance = QueriesApi(api_client)  
+def _get_content_range_total(response) -> int:
+    """Returns the total size from the ``Content-Range`` header of a partial response, i.e. ``bytes 0-99/1000``."""
+    content_range = response.getheader('Content-Range')
+    match = re.match(r'bytes\s+(\d+-\d+|\*)/(\d+)', content_range or '')
+    if not match:
+        raise ValueError(f"Invalid Content-Range header in download response: {content_range}")
+    return int(match.group(2))
 
-    def get_query_info(self) -> QueryInfo:
-        """Gets the state of the query.
 
-        Returns
-        -------
-        QueryInfo
-            Model containing all query info, with the following attributes
+_RESULT_NEXT_TOKEN_KEY = 'NextToken'
+"""
+Key of the next page token in a ``get_query_results`` response.  The ``QueryResult`` model of the low level
+client does not define it, so it is read from the raw response, with the key Athena uses alongside
+``ResultSetMetaData``.
+"""
 
-            `query`
-                query sql
-            `query_id`
-                query_id of query
-            `status`
-                `completion_date_time`
-                    GMT Completion Time
-                `state`
-                    Current state of query. One of QUEUED,RUNNING,SUCCEEDED,FAILED,CANCELLED
-                `stateChangeReason`
-                    info about reason for state change (generally failure)
-                submission_date_time`
-                    GMT submission time
 
-        """
-        try:
-            self.refresh_api_instance()
-            return self.query_api_instance.get_query(self.query_id)
-        except comodash_api_client_lowlevel.exceptions.NotFoundException as exp:
-            raise ValueError("query_id cannot be found")
+def _get_result_next_token(page: dict) -> Optional[str]:
+    """Returns the next page token of a decoded ``get_query_results`` response, or None on the last page.
 
-    def state(self) -> str:
-        """Gets the state of the query.
+    Raises ValueError if the token is under another spelling of its key, so that a change to the API fails
+    rather than silently returning only the first page.
+    """
+    for key in page:
+        if key != _RESULT_NEXT_TOKEN_KEY and key.replace('_', '').lower() == 'nexttoken':
+            raise ValueError(f"Unexpected key {key} in query results, expected {_RESULT_NEXT_TOKEN_KEY}")
+    return page.get(_RESULT_NEXT_TOKEN_KEY) or None
+
+
+_ACCEPT_COMPRESSED_HEADERS = {'Accept-Encoding': urllib3.util.make_headers(accept_encoding=True)['accept-encoding']}
+
+
+def _check_response_complete(response):
+    """Raises ``IncompleteRead`` if fewer bytes were read from `response` than its ``Content-Length``."""
+    content_length = response.getheader('Content-Length')
+    if content_length is not None and response.tell() != int(content_length):
+        raise IncompleteRead(response.tell(), int(content_length) - response.tell())
+
+
+def _split_ranges(total_size: int, range_size: int) -> List[tuple]:
+    """Splits `total_size` bytes into inclusive (start, end) byte ranges of at most `range_size` bytes."""
+    return [
+        (start, min(start + range_size, total_size) - 1)
+        for start in range(0, total_size, range_size)
+    ]
+
+
+def _read_download_progress(progress_path):
+    try:
+        with io.open(progress_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_download_progress(progress_path, progress):
+    temp_path = f"{progress_path}.tmp"
+    with io.open(temp_path, 'w') as f:
+        json.dump(progress, f)
+    os.replace(temp_path, progress_path)
+
+
+def _remove_if_exists(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is required to read query results. Install it with `pip install pyarrow`")
+
+
+class ResultColumnTypes():
+    """
+    Maps the column types in the metadata of a query result to Arrow and pandas types, so that results
+    are decoded into typed columns rather than strings.
+
+    ======================  ==========================  ==========================
+    Dash type               Arrow type                  pandas dtype
+    ======================  ==========================  ==========================
+    bigint                  int64                       Int64 (nullable)
+    double                  float64                     float64
+    decimal                 float64                     float64
+    date                    date32                      datetime64
+    timestamp               timestamp[ms]               datetime64[ms]
+    varchar, char           string or dictionary        string or category
+    ======================  ==========================  ==========================
+
+    The metadata does not include the precision and scale of decimals, so they are decoded as doubles.
+    Unknown types are decoded as strings.
+
+    String columns with few distinct values can be dictionary encoded, which stores each distinct
+    value once (a ``category`` column in pandas).
+
+    Parameters
+    ----------
+    columns : list
+        Column metadata, i.e. ``QueryResult.result_set_meta_data.column_info``, or a list of (name, type) tuples
+    """
+
+    STRING_TYPES = ['varchar', 'char']
+    DATE_TYPES = ['date', 'timestamp']
+    PANDAS_DTYPES = {
+        'bigint': 'Int64',
+        'double': 'float64',
+        'decimal': 'float64',
+        'varchar': 'string',
+        'char': 'string'
+    }
+    DICTIONARY_MAX_CARDINALITY_RATIO = 0.5
+
+    def __init__(self, columns):
+        self.columns = [
+            (column.name, column.type) if hasattr(column, 'name') else tuple(column)
+            for column in columns or []
+        ]
+
+    @classmethod
+    def from_query_result(cls, query_result) -> "ResultColumnTypes":
+        """Creates the mapping from a ``QueryResult`` returned by ``QueriesApi.get_query_results``."""
+        metadata = query_result.result_set_meta_data
+        return cls(metadata.column_info if metadata else [])
+
+    @staticmethod
+    def arrow_type(column_type: str) -> "pa.DataType":
+        """Returns the Arrow type for a Dash column type."""
+        _require_pyarrow()
+        if column_type == 'bigint':
+            return pa.int64()
+        if column_type in ('double', 'decimal'):
+            return pa.float64()
+        if column_type == 'date':
+            return pa.date32()
+        if column_type == 'timestamp':
+            return pa.timestamp('ms')
+        return pa.string()
+
+    def string_columns(self) -> List[str]:
+        """Returns the names of the varchar and char columns."""
+        return [name for name, column_type in self.columns if column_type in self.STRING_TYPES]
+
+    def arrow_schema(self, dictionary_columns: List[str] = None) -> "pa.Schema":
+        """Returns the Arrow schema of the result.
+
+        Parameters
+        ----------
+        dictionary_columns : list[str], optional
+            String columns to dictionary encode
 
         Returns
         -------
-        str
-            One of QUEUED,RUNNING,SUCCEEDED,FAILED,CANCELLED
+        pyarrow.Schema
         """
-        return self.get_query_info().status.state
+        dictionary_columns = set(dictionary_columns or [])
+        unknown_columns = dictionary_columns - set(self.string_columns())
+        if unknown_columns:
+            raise ValueError(f"Only varchar and char columns can be dictionary encoded, not: {', '.join(sorted(unknown_columns))}")
+        return pa.schema([
+            pa.field(
+                name,
+                pa.dictionary(pa.int32(), pa.string()) if name in dictionary_columns else self.arrow_type(column_type)
+            )
+            for name, column_type in self.columns
+        ])
+
+    def pandas_read_csv_kwargs(self) -> Dict[str, Any]:
+        """Returns the ``dtype`` and ``parse_dates`` keyword arguments for ``pandas.read_csv``."""
+        return {
+            'dtype': {
+                name: self.PANDAS_DTYPES[column_type]
+                for name, column_type in self.columns
+                if column_type in self.PANDAS_DTYPES
+            },
+            'parse_dates': [name for name, column_type in self.columns if column_type in self.DATE_TYPES]
+        }
 
-    def is_complete(self) -> bool:
-        """Indicates whether the query is in a final state.
-        This means it has either succeeded, failed or been cancelled.
+    @staticmethod
+    def python_converter(column_type: str) -> Callable[[str], Any]:
+        """Returns a function converting a value of a Dash column type, as text, to a python object."""
+        if column_type == 'bigint':
+            return int
+        if column_type in ('double', 'decimal'):
+            return float
+        if column_type == 'date':
+            return date.fromisoformat
+        if column_type == 'timestamp':
+            return datetime.fromisoformat
+        return str
+
+    def python_converters(self) -> List[Callable[[str], Any]]:
+        """Returns a converter from text for each column. See `ResultColumnTypes.python_converter`."""
+        return [self.python_converter(column_type) for _, column_type in self.columns]
+
+    @staticmethod
+    def pandas_types_mapper(arrow_type):
+        """``types_mapper`` for ``pyarrow.Table.to_pandas`` which keeps bigint columns with nulls as integers."""
+        if arrow_type == pa.int64():
+            return pd.Int64Dtype()
+        return None
+
+    def dictionary_encode(self, table: "pa.Table", max_cardinality_ratio: float = None) -> "pa.Table":
+        """Dictionary encodes the string columns of `table` with few distinct values.
+
+        Parameters
+        ----------
+        table : pyarrow.Table
+            Table read from the result
+        max_cardinality_ratio : float, optional
+            A column is encoded if its number of distinct values is at most this fraction of its rows.
+            Defaults to `ResultColumnTypes.DICTIONARY_MAX_CARDINALITY_RATIO`
 
         Returns
         -------
-        bool
-            Whether query complete
+        pyarrow.Table
         """
-        return self.state() in Query.COMPLETED_STATES
+        if max_cardinality_ratio is None:
+            max_cardinality_ratio = self.DICTIONARY_MAX_CARDINALITY_RATIO
+        for name in self.string_columns():
+            if name not in table.column_names or table.num_rows == 0:
+                continue
+            index = table.column_names.index(name)
+            column = table.column(index)
+            if not pa.types.is_string(column.type):
+                continue
+            encoded = column.dictionary_encode()
+            cardinality = max((len(chunk.dictionary) for chunk in encoded.chunks), default=0)
+            if cardinality <= max_cardinality_ratio * table.num_rows:
+                table = table.set_column(index, name, encoded)
+        return table.unify_dictionaries()
+
+    def encode_dictionaries(self, table: "pa.Table", dictionary_columns: Union[List[str], bool] = None) -> "pa.Table":
+        """Dictionary encodes string columns of a table read without dictionary types.
 
-    def wait_to_complete(self) -> bool:
-        """Blocks until query is in a complete state
+        Parameters
+        ----------
+        table : pyarrow.Table
+            Table read from the result
+        dictionary_columns : list[str] or bool, optional
+            String columns to encode.  By default, columns are chosen with `ResultColumnTypes.dictionary_encode`.
+            Set to False to encode none.
 
         Returns
         -------
-        str
-            Final state, one of 'SUCCEEDED', 'CANCELLED', 'FAILED'
+        pyarrow.Table
         """
+        if dictionary_columns is None:
+            return self.dictionary_encode(table)
+        if not dictionary_columns:
+            return table
+        self.arrow_schema(dictionary_columns)  # checks that the columns are string columns
+        for name in dictionary_columns:
+            index = table.column_names.index(name)
+            table = table.set_column(index, name, table.column(index).dictionary_encode())
+        return table
+
+
+def _prefetch(iterator: Iterator, prefetch: int, thread_name: str) -> Iterator:
+    """Iterates over `iterator` on a background thread, running up to `prefetch` items ahead of the caller."""
+    if prefetch < 0:
+        raise ValueError("prefetch must not be negative")
+    if prefetch == 0:
+        return iterator
+    return _prefetch_items(iterator, prefetch, thread_name)
+
+
+def _prefetch_items(iterator, prefetch, thread_name):
+    items = queue.Queue(maxsize=prefetch)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
 
+    def produce():
+        try:
+            for item in iterator:
+                if not put((item, None, False)):
+                    return
+            put((None, None, True))
+        except BaseException as e:
+            put((None, e, True))
+
+    threading.Thread(target=produce, name=thread_name, daemon=True).start()
+    try:
         while True:
-            query_info = self.get_query_info()
-            if query_info.status.state in Query.COMPLETED_STATES:
-                return query_info
-            time.sleep(5)
+            item, error, done = items.get()
+            if error is not None:
+                raise error
+            if done:
+                return
+            yield item
+    finally:
+        # stops the background thread if the caller stops iterating early
+        stopped.set()
 
-    def query_id(self) -> str:
-        """Returns query id for this query
-        """
-        return self.query_id
 
-    def get_csv_for_streaming(self) -> HTTPResponse:
-        """ Returns a ``urllib3.response.HTTPResponse`` object that can be used for streaming
-            This allows use of the downloaded file without having to save
-            it to local storage.
+def _json_loads(body: Union[bytes, str]):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
 
-            Be sure to use ``.release_conn()`` when completed to ensure that the
-            connection is released
 
-            This can be achieved using the `with` notation e.g.::
+class ResultPage():
+    """
+    One page of a query result, decoded column by column straight from the raw JSON response.
 
-                with query.get_csv_for3_streaming().stream() as stream:
-                  for chunk in stream:
-                      # do somthing with chunk
-                      # chunk is a byte array ``
-        """
-        self.refresh_api_instance()
-        response = self.query_api_instance.download_csv_without_preload_content(
-            query_id=self.query_id)
-        response.autoclose = False
-        return response
+    This skips the ``QueryResult`` models of the low level client, which create a model instance for every
+    cell, so it is much faster for large pages.  ``orjson`` is used to parse the response if it is installed.
 
-    def download_csv(self, output_file_path, fail_if_exists=False):
-        """Download csv of results and check that the total file size is correct
+    Parameters
+    ----------
+    result_types : ResultColumnTypes
+        Column types of the result
+    columns : list
+        A list of values for each column, as text, with None for nulls
+    next_token : str, optional
+        Token for the next page, or None if this is the last page
+    """
+
+    def __init__(self, result_types: ResultColumnTypes, columns: List[list], next_token: str = None):
+        self.result_types = result_types
+        self.columns = columns
+        self.next_token = next_token
+
+    @classmethod
+    def from_json(cls, body: Union[bytes, str], skip_header: bool = False) -> "ResultPage":
+        """Decodes the raw JSON body of a ``get_query_results`` response.
 
         Parameters
         ----------
-        output_file_path : File path
-            Path of the file to output to
-        fail_if_exists : bool, optional
-            If true, then will fail if the target file name already/
-            Defaults to false.
+        body : bytes or str
+            The response body
+        skip_header : bool, optional
+            Drops the first row if it holds the column names, as the first row of the first page does.
+            Defaults to False
 
-        Raises
-        ------
-        IncompleteRead
-            If only part of the file is downloaded, this is raised
+        Returns
+        -------
+        ResultPage
         """
+        page = _json_loads(body)
+        metadata = page.get('ResultSetMetaData') or {}
+        result_types = ResultColumnTypes(
+            [(column['Name'], column['Type']) for column in metadata.get('ColumnInfo') or []]
+        )
+        rows = [
+            [cell.get('VarCharValue') for cell in row.get('Data') or []]
+            for row in (page.get('resultSet') or {}).get('Rows') or []
+        ]
+        if skip_header and rows and rows[0] == [name for name, _ in result_types.columns]:
+            rows = rows[1:]
+        columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in result_types.columns]
+        return cls(result_types, columns, _get_result_next_token(page))
+
+    @property
+    def column_names(self) -> List[str]:
+        return [name for name, _ in self.result_types.columns]
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def to_pydict(self) -> Dict[str, list]:
+        """Returns the values of each column, converted to python types. See `ResultColumnTypes.python_converter`."""
+        return {
+            name: [None if value is None else convert(value) for value in column]
+            for name, convert, column in zip(self.column_names, self.result_types.python_converters(), self.columns)
+        }
 
-        with self.get_csv_for_streaming() as response:
-            write_mode = "wb"
-            if fail_if_exists:
-                write_mode = "xb"
-            with io.open(output_file_path, write_mode) as f:
-                size = 0
-                content_length = (response.getheader('Content-Length'))
-                for chunk in response.stream(1048576):
-                    size = size + len(chunk)
-                    f.write(chunk)
-                if (response.tell() != int(content_length)):
-                    raise IncompleteRead(
-                        response.tell(),
-                        int(content_length) - response.tell()
-                    )
+    def to_arrow(self) -> "pa.Table":
+        """Returns the page as an Arrow table with the types of `ResultColumnTypes.arrow_schema`."""
+        schema = self.result_types.arrow_schema()
+        return pa.table(
+            [pa.array(column, type=pa.string()).cast(field.type) for field, column in zip(schema, self.columns)],
+            schema=schema
+        )
 
-    def stop(self):
-        """ Stop the query"""
-        self.refresh_api_instance()
-        return self.query_api_instance.stop_query(self.query_id)
+    def rows(self) -> Iterator[tuple]:
+        """Iterates over the rows of the page, with values converted to python types."""
+        return zip(*self.to_pydict().values())
 
-class Load():
-    """
-    The Load object starts and tracks a multi-file load to a single lake table on Comotion Dash
 
-    Initialising this class starts a Load on Comotion Dash and stores the
-    resulting `load_id`.
+def _csv_convert_options(schema) -> "pa_csv.ConvertOptions":
+    # results quote every value and leave nulls empty, so only unquoted empty values are null
+    return pa_csv.ConvertOptions(
+        column_types=schema,
+        null_values=[''],
+        strings_can_be_null=True,
+        quoted_strings_can_be_null=False
+    )
 
-    The load then needs to be committed with valid checksums to be pushed to the lake.
 
-    If you wish to work with an existing load, then supply only the `load_id` parameter
+def _query_is_complete(query_info) -> bool:
+    return query_info.status.state in Query.COMPLETED_STATES
 
-    Example of upload with a Load instance:
-    
-    .. code-block:: python
 
-        load = Load(config = DashConfig(Auth('orgname')), 
-                    table_name = 'v1_inforce_policies', 
-                    load_as_service_client_id = '0') # Create the load
-        
-        print(load.load_id) # It can be useful to track these to fix 
-        for file, file_key in zip(file_path_list, file_keys): # Upload files with Load object
-            load.upload_file(
-                data = file,
-                file_key = file_key
-            )
+def _load_is_complete(load_info) -> bool:
+    return load_info.load_status != 'PROCESSING'
 
-        load.commit( # Commit the load - this validates the files and pushes to the table_name specified
-            check_sum = { # Check that data uploaded matches what you expected before pushing to the lake.  *Also see track_rows_uploaded option
-                'sum(face_amount)': 20000,
-                'count(distinct policy_number)': 1000
-            }
+
+def _get_polling_strategy(polling_strategy, timeout):
+    if polling_strategy is None:
+        polling_strategy = PollingStrategy()
+    elif not isinstance(polling_strategy, PollingStrategy):
+        raise TypeError("polling_strategy must be of type comotion.dash.PollingStrategy")
+    if timeout is not None:
+        polling_strategy = PollingStrategy(
+            initial_interval=polling_strategy.initial_interval,
+            max_interval=polling_strategy.max_interval,
+            multiplier=polling_strategy.multiplier,
+            jitter=polling_strategy.jitter,
+            timeout=timeout
         )
+    return polling_strategy
 
-        print(load.get_load_info()) # Run this at any time to get the latest information on the load
 
+class ResultCache():
     """
+    Local on-disk cache of query results, for SQL that is run repeatedly.
 
-    def __init__(
-            self,
-            config: DashConfig,
-            load_type: str = None,
-            table_name: str = None,
-            load_as_service_client_id: str = None,
-            partitions: Optional[List[str]] = None,
-            load_id: str = None,
-            track_rows_uploaded: bool = None,
-            path_to_output_for_dryrun: str = None,
-            modify_lambda: Callable = None,
-            chunksize: int = None
-    ):
-        """
-        Parameters
-        ----------
-
-        config : DashConfig
-            Object of type DashConfig including configuration details.
-        load_type : str
-            Load Type, initially only APPEND_ONLY supported. APPEND_ONLY means that data is appended to the lake table.
-        table_name : str
-            Name of lake table to be created and / or uploaded to.
-        load_as_service_client_id : str, optional
-            If provided, the upload is performed as if run by the service_client specified.
-        partitions : list[str], optional
-            Only applies if table does not already exist and is created. The created table will have these partitions. This must be a list of iceberg compatible partitions. Note that any load can only allow for up to 100 partitions, otherwise it will error out. If the table already exists, then this is ignored.
-        load_id : str, optional
-            In the case where you want to work with an existing load on dash, supply this parameter, and no other parameter (other than config) will be required.
-        track_rows_uploaded: bool, optional
-            If True, track the number of rows uploaded with the current Load instance.  This can be used to automatically create a checksum on commit (see Load.commit), however is not recommended for 
-            large files as this may increase the duration of upload significantly.
-        path_to_output_for_dryrun: str, optional
-            if specified, no upload will be made to dash, but files
-            will be saved to the location specified. This is useful for testing.
-        modify_lambda: Callable, optional
-            Callable which takes a pandas.DataFrame as the first arg.
-            Can be used to add/modify columns in the data before upload to the lake.
-        chunksize: int, default 30000
-            If a file is uploaded, it will be broken into chunks with chunksize rows before uploading.  Note an index is added to the end of the file key to uniquely identify chunks.
-        """
-        load_data = locals()
-        lowerlevel_load_sig = signature(comodash_api_client_lowlevel.Load)
-        lowerlevel_load_keys = [key for key in lowerlevel_load_sig.parameters.keys()]
-        if not(isinstance(config, DashConfig)):
-            raise TypeError("config must be of type comotion.dash.DashConfig")
-        
-        self.config = config
-        
-        with comodash_api_client_lowlevel.ApiClient(config) as api_client:
-            # Create an instance of the API class with provided parameters
-            self.load_api_instance = LoadsApi(api_client)
-
-        if (load_id is not None):
-            # if load_id provided, then initialise this object with the provided load_id
-            self.load_id = load_id
-            for key,value in load_data.items():
-                if key not in  ['load_id', 'config', 'self']:
-                    if value is not None:
-                        raise TypeError("if load_id is supplied, then only the config parameter and no others should be supplied.")
-        else:
-            # Enter a context with an instance of the API client
-            lowerlevel_load_kwargs = {
-                    key: value
-                    for key, value in load_data.items()
-                    if key in lowerlevel_load_keys
-            }
+    Pass a cache to `Query` to use it:
 
-            load = comodash_api_client_lowlevel.Load(**lowerlevel_load_kwargs)
+    .. code-block:: python
 
-            # Create a new load
-            load_id_model = self.load_api_instance.create_load(load)
-            self.load_id = load_id_model.load_id
+        cache = ResultCache(ttl=900)
+        query = Query(config, query_text="select * from my_table", cache=cache)
+        df = query.to_pandas()  # served from the cache if the same sql ran in the last 15 minutes
 
-        if track_rows_uploaded:
-            self.track_rows_uploaded = track_rows_uploaded
-        else:
-            self.track_rows_uploaded = False
+    Entries are keyed by the normalised sql (see `ResultCache.normalize_sql`), the org and zone of the config
+    and the identity it is authenticated as, so users and clients never read results run under another identity's access.
+    On a hit, `Query` does not run the query again: it takes the id of the query that produced the cached
+    result, and `Query.to_arrow` and `Query.to_pandas` read the result from the cache.  Results are stored
+    when they are first read with `Query.to_arrow` or `Query.to_pandas`.
 
-        self.rows_uploaded = 0
-        self.path_to_output_for_dryrun = path_to_output_for_dryrun
-        self.modify_lambda = modify_lambda
-        if not chunksize:
-            self.chunksize = 100000000 # Very large chunksize to avoid chunking unless required
-        else:
-            self.chunksize = chunksize
+    Entries expire `ttl` seconds after they are stored, and the least recently used entries are removed
+    when the cache grows beyond `max_size`.
 
-    def refresh_api_instance(self):
-        auth_token = self.config.auth
-        zone = self.config.zone
-        orgname = auth_token.orgname
-        entity_type = auth_token.entity_type
-
-        if entity_type == Auth.APPLICATION:
-            application_client_id = auth_token.application_client_id
-            application_client_secret = auth_token.application_client_secret
-        else:
-            application_client_id = None
-            application_client_secret = None
-        
-        self.config = DashConfig(
-            Auth(
-                orgname=orgname,
-                entity_type=entity_type,
-                application_client_id=application_client_id,
-                application_client_secret=application_client_secret
-            ),
-            zone = zone
-        )
-        with comodash_api_client_lowlevel.ApiClient(self.config) as api_client:
-            # Create an instance of the API class with provided parameters
-            self.load_api_instance = LoadsApi(api_client)  
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Directory for the cache. Defaults to ``~/.cache/comotion/query_results``
+    ttl : float, optional
+        Seconds that an entry is used for. Defaults to 3600
+    max_size : int, optional
+        Maximum total size of the cached results in bytes. Defaults to 1GB
+    format : str, optional
+        ``parquet`` or ``arrow`` (Arrow IPC, which is faster to read back but larger). Both are compressed with zstd.
+        Defaults to ``parquet``
 
-    def get_load_info(self) -> LoadInfo:
-        """Gets the state of the load
+    Attributes
+    ----------
+    hits : int
+        Number of queries served from the cache
+    misses : int
+        Number of queries run because no entry was found
+    bytes_saved : int
+        Bytes of csv results not downloaded from Dash because of cache hits
+    """
 
-        Returns
-        -------
-        LoadInfo
-            Model containing all the load info, with the following attributes
-            
-            `load_status`
-                Status of the load, one of OPEN, PROCESSING, FAIL or SUCCESS
-            `error_type`
-                Type of error if the load status is FAIL.
-            `error_messages`
-                Detailed error messages if the load status is FAIL.
+    FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
 
+    def __init__(
+        self,
+        cache_dir: str = None,
+        ttl: float = 3600,
+        max_size: int = 1073741824,
+        format: str = 'parquet'
+    ):
+        if format not in self.FORMATS:
+            raise ValueError("format must be one of %s" % list(self.FORMATS))
+        _require_pyarrow()
+        self.cache_dir = cache_dir or join(os.path.expanduser('~'), '.cache', 'comotion', 'query_results')
+        self.ttl = ttl
+        self.max_size = max_size
+        self.format = format
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def normalize_sql(sql: str) -> str:
+        """Removes comments, repeated whitespace and a trailing semicolon from `sql`, leaving quoted text as is."""
+        def replace(match):
+            return match.group(1) if match.group(1) is not None else ' '
+        sql = re.sub(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|(?:--[^\n]*|/\*.*?\*/|\s)+""", replace, sql, flags=re.S)
+        return sql.strip().rstrip(';').strip()
+
+    def key(self, config: DashConfig, sql: str) -> str:
+        """Returns the cache key for `sql` run with `config`."""
+        return _query_key(config, sql)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit, miss and bytes saved counters."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'bytes_saved': self.bytes_saved}
+
+    def _paths(self, key):
+        path = join(self.cache_dir, key)
+        return path + self.FORMATS[self.format], path + '.json'
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """Returns the metadata of the entry for `key`, or None if there is no current entry, and counts a hit or miss.
+
+        The metadata includes the ``query_id`` of the query that produced the result.
         """
-        self.refresh_api_instance()
-        return self.load_api_instance.get_load(self.load_id)
+        data_path, metadata_path = self._paths(key)
+        metadata = None
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            if time.time() - metadata['created'] > self.ttl or not isfile(data_path):
+                self._remove(key)
+                metadata = None
+            else:
+                # the modified time of the result orders entries for eviction
+                os.utime(data_path)
+        except (OSError, ValueError, KeyError):
+            metadata = None
+        with self._lock:
+            if metadata is None:
+                self.misses = self.misses + 1
+            else:
+                self.hits = self.hits + 1
+                self.bytes_saved = self.bytes_saved + metadata.get('result_bytes', 0)
+        return metadata
 
-    def generate_presigned_url_for_file_upload(self, file_key: str = None) -> FileUploadResponse:
-        """
-        Generates presigned URLs and STS credentials for a new file upload.
+    def read(self, key: str) -> Optional["pa.Table"]:
+        """Returns the cached result for `key`, or None if it has been removed."""
+        data_path, _ = self._paths(key)
+        try:
+            if self.format == 'arrow':
+                with pa.memory_map(data_path) as source:
+                    return pa.ipc.open_file(source).read_all()
+            return pq.read_table(data_path)
+        except (OSError, pa.ArrowInvalid):
+            return None
+
+    def put(self, key: str, table: "pa.Table", query_id: str, columns: List[tuple], result_bytes: int = 0):
+        """Stores `table` as the result for `key`, then removes expired and least recently used entries.
 
         Parameters
         ----------
-        file_key : str, optional
-            Optional custom key for the file. This will ensure idempotence.
-            If multiple files are uploaded to the same load with the same file_key,
-            only the last one will be loaded. Must be lowercase and can include underscores.
+        key : str
+            See `ResultCache.key`
+        table : pyarrow.Table
+            The result
+        query_id : str
+            Id of the query that produced the result
+        columns : list
+            (name, type) of the result columns. See `ResultColumnTypes`
+        result_bytes : int, optional
+            Size of the csv result on Dash, counted in `bytes_saved` on every hit
+        """
+        data_path, metadata_path = self._paths(key)
+        suffix = '.%s.tmp' % uuid.uuid4().hex
+        if self.format == 'arrow':
+            options = pa.ipc.IpcWriteOptions(compression='zstd')
+            with pa.OSFile(data_path + suffix, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                    writer.write_table(table)
+        else:
+            pq.write_table(table, data_path + suffix, compression='zstd')
+        with open(metadata_path + suffix, 'w') as f:
+            json.dump({
+                'query_id': query_id,
+                'columns': [list(column) for column in columns],
+                'created': time.time(),
+                'result_bytes': result_bytes
+            }, f)
+        os.replace(data_path + suffix, data_path)
+        os.replace(metadata_path + suffix, metadata_path)
+        self.evict()
+
+    def evict(self):
+        """Removes expired entries, then the least recently used entries until the cache fits in `max_size`."""
+        extension = self.FORMATS[self.format]
+        entries = []
+        for name in listdir(self.cache_dir):
+            if not name.endswith(extension):
+                continue
+            key = name[:-len(extension)]
+            try:
+                stat = os.stat(join(self.cache_dir, name))
+                with open(self._paths(key)[1]) as f:
+                    created = json.load(f)['created']
+            except (OSError, ValueError, KeyError):
+                continue
+            if time.time() - created > self.ttl:
+                self._remove(key)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, key))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._remove(key)
+            total_size = total_size - size
 
-        Returns
-        -------
-        FileUploadResponse
-            Model containing all the relevant credentials to be able to upload a file to S3 as part of the load. This includes the following attributes:
+    def clear(self):
+        """Removes all entries."""
+        extension = self.FORMATS[self.format]
+        for name in listdir(self.cache_dir):
+            if name.endswith(extension):
+                self._remove(name[:-len(extension)])
 
-            - presigned_url : str
-                Presigned URL data for S3 file upload. The file can be posted to this endpoint using any AWS S3 compatible toolset.
-                Temporary credentials are included in the URL, so no other credentials are required.
-            - sts_credentials : dict
-                Alternatively to the presigned_url, these Temporary AWS STS credentials can be used to upload the file to the location specified by `path` and `bucket`.
-                This is required for various advanced toolsets, including AWS Wrangler.
-            - path : str
-                Path of the file in the S3 bucket. See the description of `sts_credentials`.
-            - bucket : str
-                Name of the S3 bucket. See the description of `sts_credentials`.
+    def _remove(self, key):
+        for path in self._paths(key):
+            _remove_if_exists(path)
 
-        """
-        file_upload_request = FileUploadRequest()
-        if file_key:
-            file_upload_request = FileUploadRequest(file_key=file_key)
 
-        self.refresh_api_instance()
-        return self.load_api_instance.generate_presigned_url_for_file_upload(self.load_id, file_upload_request=file_upload_request)
-        
-    def upload_df(self, 
-                data: pd.DataFrame, 
-                file_key: str = None):
-        """
-        Uploads a `pandas.DataFrame` as a parquet file to an S3 bucket using a presigned URL.
-        If `path_to_output_for_dryrun` is specified for the load, write the file to a local directory instead.
-        Before uploading, `modify_lambda` is applied.  Then, column names are forced to be lowercase and spaces are replaced with underscores.
-        This is to prevent potential schema issues in the Dash lake.
+def _query_key(config, sql):
+    key = json.dumps([config.orgname, config.zone, config._get_identity(), ResultCache.normalize_sql(sql)])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
 
-        Parameters:
-        -----------
-        data : pandas.DataFrame
-            The DataFrame to be uploaded. This should be a pandas.DataFrame object.
-        file_key : str, optional
-            Optional custom key for the file to be. If not provided, a random file key is created.  See Load.create_file_key().
-            This will ensure idempotence. If multiple files are uploaded to the same load with the same `file_key`, only the last one will be pushed to the lake. 
-            Must be lowercase and can include underscores.
 
-        Returns:
-        --------
-        None
+class QueryCoalescer():
+    """
+    Shares one Dash query between `Query` objects created with the same sql at about the same time.
 
-        Example:
-        --------
+    Pass the same coalescer to each `Query`:
 
-        .. code-block:: python
+    .. code-block:: python
 
-            import pandas as pd
-            load = Load(dashconfig)
-            df = pd.read_parquet('path/to/file.parquet')
-            load.upload_df(data = df, file_key='my_file_id')
+        coalescer = QueryCoalescer()
 
-        """
-        if not isinstance(data, pd.DataFrame):
-            raise ValueError("data should be a valid pandas.DataFrame object")
-        
-        if not file_key:
-            file_key = self.create_file_key()
+        def warm(sql):
+            query = Query(config, query_text=sql, coalescer=coalescer)
+            query.wait_to_complete()
+            return query.to_arrow()
 
-        if self.modify_lambda:
-            self.modify_lambda(data)
+    The first `Query` for an sql starts the query.  Later ones with the same normalised sql
+    (see `ResultCache.normalize_sql`), org, zone and identity take its `query_id` instead of starting another query,
+    until any of them sees the query in a complete state or reads its result, or the query is `max_age` seconds old.
+    `Query.wait_to_complete`, `Query.to_arrow` and `Query.to_pandas` calls made at the same time are run once:
+    the first caller polls or downloads, and the others wait for and share its result, or its exception.
+    Results are not kept once all the callers waiting at the time have them.
 
-        data.columns = [re.sub(r'\s+', '_', column.lower()) for column in data.columns] # Replace spaces with underscores in column names
+    Parameters
+    ----------
+    max_age : float, optional
+        Seconds after a query is started during which later `Query` objects can share it.  Defaults to 600.
+        Set to None to share queries until they are seen to be complete.
+    start_timeout : float, optional
+        Seconds a `Query` waits for another to start the shared query.  Defaults to 60.
+        If the query has not been started by then, the `Query` starts its own instead.
 
-        table = pa.Table.from_pandas(data)
+    Attributes
+    ----------
+    coalesced : int
+        Number of `Query` objects that used a query started by another
+    """
 
-        parquet_buffer = io.BytesIO() 
-        pq.write_table(table, parquet_buffer)
-        parquet_buffer.seek(0)
+    def __init__(self, max_age: float = 600, start_timeout: float = 60):
+        if max_age is not None and max_age < 0:
+            raise ValueError("max_age must not be negative")
+        if start_timeout < 0:
+            raise ValueError("start_timeout must not be negative")
+        self.max_age = max_age
+        self.start_timeout = start_timeout
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> int:
+        """Returns the number of queries that later `Query` objects can share."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def _join(self, key):
+        """Returns the in flight query for `key`, and whether the caller must start it."""
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None and (self.max_age is None or time.monotonic() - in_flight.started <= self.max_age):
+                self.coalesced = self.coalesced + 1
+                return in_flight, False
+            in_flight = self._in_flight[key] = _InFlightQuery(self, key)
+            return in_flight, True
+
+    def _leave(self):
+        """Uncounts a `Query` that joined a query but started its own after waiting `start_timeout`."""
+        with self._lock:
+            self.coalesced = self.coalesced - 1
+
+    def _finish(self, in_flight):
+        with self._lock:
+            if self._in_flight.get(in_flight.key) is in_flight:
+                del self._in_flight[in_flight.key]
+
+
+class _InFlightQuery():
+
+    def __init__(self, coalescer, key):
+        self.coalescer = coalescer
+        self.key = key
+        self.query_id = Future()
+        self.started = time.monotonic()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def finish(self):
+        """Stops later `Query` objects from joining, once the query is complete or failed to start."""
+        self.coalescer._finish(self)
+
+    def call(self, name, function, timeout=None, description='query'):
+        """Runs `function` once for all callers with the same `name` at the same time, and returns its result.
+
+        `function` takes the seconds left of the timeout of the caller that runs it, or None.  Other callers
+        wait for at most their own `timeout`, and run `function` themselves if it times out for the first
+        caller while they have time left.  The result is not kept for later calls.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                future = self._calls.get(name)
+                run = future is None
+                if run:
+                    future = self._calls[name] = Future()
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if run:
+                try:
+                    result = function(remaining)
+                except BaseException as e:
+                    self._forget(name, future)
+                    future.set_exception(e)
+                    raise
+                self._forget(name, future)
+                future.set_result(result)
+                return result
+            try:
+                return future.result(timeout=remaining)
+            except FutureTimeoutError:
+                raise PollingTimeoutException(f"Timed out after {timeout} seconds waiting for {description} to complete")
+            except PollingTimeoutException:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+                # the first caller gave up sooner than this one, which waits for the rest of its own timeout
 
-        file_upload_response = self.generate_presigned_url_for_file_upload(file_key=file_key)
+    def _forget(self, name, future):
+        with self._lock:
+            if self._calls.get(name) is future:
+                del self._calls[name]
 
-        if not isinstance(file_upload_response, FileUploadResponse):
-            raise ValueError("file_upload_response should be a valid instance of FileUploadResponse.")
-        else:
-            bucket = file_upload_response.bucket
-            key = file_upload_response.path 
-            # Upload to s3 if not a dry-run
-            if not self.path_to_output_for_dryrun:
-                s3_file_name = basename(file_upload_response.path)
-                
-                # Create a session with AWS credentials from the presigned URL
-                my_session = boto3.Session(
-                    aws_access_key_id=file_upload_response.sts_credentials['AccessKeyId'],
-                    aws_secret_access_key=file_upload_response.sts_credentials['SecretAccessKey'],
-                    aws_session_token=file_upload_response.sts_credentials['SessionToken']
-                )
 
-                # Upload the Parquet buffer as a chunk to S3
-                print(f"Uploading to S3: {s3_file_name}")
+class Query():
+    """
+    The query object starts and tracks a query on Comotion Dash.
 
-                upload_reponse = wr.s3.upload(
-                    local_file=parquet_buffer, 
-                    path=f"s3://{bucket}/{key}", 
-                    boto3_session=my_session,
-                    use_threads=True
-                )
-            else:
-            # Commence dry run
-                local_path = join(self.path_to_output_for_dryrun, f"{basename(key)}.parquet")
-                table = pa.Table.from_pandas(data)
-                pq.write_table(table, local_path)
-                print(f"File written locally to: {local_path}")
-                upload_reponse = 'DRYRUN_COMPLETE' # Arbitrary reponse as file write has no return
+    Initialising this class runs a query on Comotion Dash and stores the
+    resulting query id in `query_id`
 
-            if self.track_rows_uploaded:
-                # Count the rows in the Parquet file
-                rows_uploaded = data.shape[0]
-                self.rows_uploaded += rows_uploaded
-                print(f"Successfully uploaded {key}: {rows_uploaded} rows")
-                print(f"Total rows uploaded for load {self.load_id}: {self.rows_uploaded}")
-            else:
-                print(f"Upload completed: {key}")
+    """
 
-            return upload_reponse
-        
-    def upload_file(
+    COMPLETED_STATES = ['SUCCEEDED', 'CANCELLED', 'FAILED']
+    SUCCEEDED_STATE = 'SUCCEEDED'
+
+    def __init__(
         self,
-        data,
-        file_key: str = None,
-        use_file_name_as_key: bool = False,
-        max_workers: int = None,
-        **pd_read_kwargs
+        config: DashConfig,
+        query_text: str = None,
+        query_id: str = None,
+        cache: ResultCache = None,
+        coalescer: QueryCoalescer = None
     ):
         """
-        Uploads a file to the lake table specified in the load, or a local file if `path_to_output_for_dryrun` was specified.
-        The file provided is read into a `pandas.DataFrame` using `pd_read_kwargs` with an appropriate pandas function.
-        Note an index is added to the end of the file key to uniquely identify chunks uploaded.
-
         Parameters
         ----------
-        data : Any
-            The file to be uploaded.  This should be readable by `pandas.read_csv`, `pandas.read_parquet`, `pandas.read_json` or `pandas.read_excel`.
-        file_key : str, optional
-            A unique key for the file being uploaded. If not provided, a key will be generated.
-        use_file_name_as_key : bool, optional
-            If True, the file name will be used as the file key. If False, a random key will be generated. Will throw an error when this is True and a file key is provided.
-        max_workers : int, optional
-            The maximum number of threads to use for concurrent uploads (passed to concurrent.futures.ThreadPoolExecutor)
-        **pd_read_kwargs
-            Additional keyword arguments to pass to the pandas read function (one of [pd.read_csv, pd.read_parquet, pd.read_json, pd.read_excel]).
-            You should not pass the variable pointing to the file here (e.g. filepath_or_buffer in pandas.read_csv), as this is passed in the data parameter.
-            Chunksize and nrows should also not be provided as extra parameters.
-            If you do not provide dtype, dtype will be determined automatically from the first chunk of data.
-
-        Returns
-        -------
-        List[Any]
-            A list of responses from the load upload API call for each chunk.
+        query_text : str
+            sql of the query to run
+        config : DashConfig
+            Object of type DashConfig including configuration details
+        query_id : str, optional
+            Query id of existing query.  If not provided, then a new query will be started on Dash
+        cache : ResultCache, optional
+            Cache of results for `query_text`.  If it holds a current result, no query is started.
+            See `ResultCache`
+        coalescer : QueryCoalescer, optional
+            If another `Query` with the same coalescer is running the same sql, its query is used
+            rather than starting a new one.  See `QueryCoalescer`
 
         Raises
         ------
+        TypeError
+            If config is not of type DashConfig
+
         ValueError
-            If the file type cannot be determined or if an error occurs during the upload of any chunk.
+            if one of query_id or query_text is not provided
+
         """
-        responses = []
 
-        invalid_keys = {'filepath_or_buffer', 'chunksize', 'nrows', 'path', 'path_or_buf', 'io'}
-        provided_invalid_keys = invalid_keys.intersection(pd_read_kwargs.keys())
-        
-        if provided_invalid_keys:
-            raise ValueError(f"Do not provide the following keys: {', '.join(provided_invalid_keys)}")
+        if not(isinstance(config, DashConfig)):
+            raise TypeError("config must be of type comotion.dash.DashConfig")
         
-        print(f"Uploading file: {data}")
+        if cache is not None and not isinstance(cache, ResultCache):
+            raise TypeError("cache must be of type comotion.dash.ResultCache")
 
-        # Reading CSV in chunks, converting each to Parquet, and uploading
-        try_functions = [pd.read_csv, pd.read_parquet, pd.read_json, pd.read_excel]
+        if coalescer is not None and not isinstance(coalescer, QueryCoalescer):
+            raise TypeError("coalescer must be of type comotion.dash.QueryCoalescer")
 
-        if file_key and use_file_name_as_key:
-            raise Exception("Cannot provide a file key when use_file_name_as_key is True")
-        elif file_key and not use_file_name_as_key:
-            pass # To be explicit only
-        elif use_file_name_as_key and not file_key:
-            file_key = os.path.basename(data).split('.')[0] # Remove file extension
-        elif not use_file_name_as_key and not file_key:
-            file_key = self.create_file_key()
-        
-        func_to_use = None
-        for func in try_functions:
+        self.config = config
+        self.query_api_instance = QueriesApi(self.config.get_api_client())
+        self.cache = cache
+        self.cache_key = None
+        self.from_cache = False
+        self._in_flight = None
+        if query_id:
+            # query_info = self.query_api_instance.get_query(query_id)
+            self.query_id = query_id
+            # self.query_text = query_info.query
+        elif query_text:
+            self.query_text = query_text
+            if cache is not None:
+                self.cache_key = cache.key(config, query_text)
+                cached = cache.lookup(self.cache_key)
+                if cached is not None:
+                    self.query_id = cached['query_id']
+                    self._cached_columns = cached['columns']
+                    self.from_cache = True
+                    return
+            if coalescer is not None:
+                self._in_flight, start = coalescer._join(_query_key(config, query_text))
+                if not start:
+                    try:
+                        self.query_id = self._in_flight.query_id.result(timeout=coalescer.start_timeout)
+                        return
+                    except FutureTimeoutError:
+                        # the query that was joined is still starting, so start one that is not shared
+                        coalescer._leave()
+                        self._in_flight = None
+            query_text_model = QueryText(query=query_text)
             try:
-                func(data, nrows=1, **pd_read_kwargs)
-                func_to_use = func
-                break
-            except:
-                pass
-        
-        if not func_to_use:
-            raise ValueError(f"Could not determine file type for datasource with the following file key: {file_key}")
-        
-        try:
-            i = 1
-            chunk_futures = []
-            with ThreadPoolExecutor(max_workers=max_workers) as chunk_ex:  # Using threads for concurrent chunk uploads
-
-                for chunk in func_to_use(data, chunksize=self.chunksize, **pd_read_kwargs):
-                    file_key_to_use = file_key + f"_{i}"
-                    future = chunk_ex.submit(self.upload_df,
-                                            data=chunk,
-                                            file_key=file_key_to_use)
-                    chunk_futures.append(future)
-                    i += 1
-                
-                for future in as_completed(chunk_futures):
-                    responses.append(future.result())
-
-        except Exception as e:
-            raise ValueError(f"Error when uploading chunk: {e}")
-            
-        print("All chunks uploaded successfully")
+                try:
+                    query_id_model = self.query_api_instance.run_query(query_text_model) # noqa
+                except comodash_api_client_lowlevel.exceptions.BadRequestException as exp:
+                    raise ValueError(json.loads(exp.body)['message'])
+            except BaseException as e:
+                if self._in_flight is not None:
+                    self._in_flight.finish()
+                    self._in_flight.query_id.set_exception(e)
+                raise
+
+            self.query_id = query_id_model.query_id
+            if self._in_flight is not None:
+                self._in_flight.query_id.set_result(self.query_id)
+        else:
+            raise ValueError("One of query_id or query_text must be provided")
 
-        return responses
-    
-    def upload_dash_query(
-        self,
-        data: Query,
-        file_key: str = None,
-        max_workers: int = None,
-        **pd_read_kwargs
-    ):
+    def refresh_api_instance(self):
         """
-        Uploads the result of a `dash.Query` object to the specified lake table, or a local file if `path_to_output_for_dryrun` was specified.
-        The result is read into a `pandas.DataFrame` and uploaded with the `Load.upload_df()` function.
-        Note an index is added to the end of the file key to uniquely identify chunks uploaded.
+        Points the api instance at the shared ``ApiClient`` of the config.
+        The access token is refreshed by the config itself, so no new connections or credentials are created.
+        """
+        self.query_api_instance = QueriesApi(self.config.get_api_client())
 
-        Parameters
-        ----------
-        data : Query
-            The Query whose result is to be uploaded.
-        file_key : str, optional
-            A unique key for the file being uploaded. If not provided, a key will be generated.
-        max_workers : int, optional
-            The maximum number of threads to use for concurrent uploads (passed to `concurrent.futures.ThreadPoolExecutor`)
-        **pd_read_kwargs
-            Additional keyword arguments to pass to the pandas function.
-            Note that filepath_or_buffer, chunksize and dtype are passed by default and so duplicating those here could cause issues.
+    def get_query_info(self) -> QueryInfo:
+        """Gets the state of the query.
 
         Returns
         -------
-        List[Any]
-            A list of responses from the load upload API call for each chunk.
-
-        Raises
-        ------
-        ValueError
-            If an error occurs during the upload of any chunk or during the Query.
-        """
-        responses = []
-        
-        print(f"Uploading Query with ID: {data.query_id}")
-
-        if not file_key:
-            file_key = self.create_file_key()
+        QueryInfo
+            Model containing all query info, with the following attributes
 
-        invalid_keys = {'filepath_or_buffer', 'chunksize', 'nrows', 'path', 'path_or_buf', 'io'}
-        provided_invalid_keys = invalid_keys.intersection(pd_read_kwargs.keys())
-        
-        if provided_invalid_keys:
-            raise ValueError(f"Do not provide the following keys: {', '.join(provided_invalid_keys)}")
+            `query`
+                query sql
+            `query_id`
+                query_id of query
+            `status`
+                `completion_date_time`
+                    GMT Completion Time
+                `state`
+                    Current state of query. One of QUEUED,RUNNING,SUCCEEDED,FAILED,CANCELLED
+                `stateChangeReason`
+                    info about reason for state change (generally failure)
+                submission_date_time`
+                    GMT submission time
 
+        """
         try:
-            i = 1
-            chunk_futures = []
-            data.wait_to_complete()
-
-            print(f"Query completed with state: {data.state()}")
+            self.refresh_api_instance()
+            query_info = self.query_api_instance.get_query(self.query_id)
+        except comodash_api_client_lowlevel.exceptions.NotFoundException as exp:
+            raise ValueError("query_id cannot be found")
+        if self._in_flight is not None and _query_is_complete(query_info):
+            self._in_flight.finish()
+        return query_info
 
-            if data.state() == data.SUCCEEDED_STATE:
-                with ThreadPoolExecutor(max_workers=max_workers) as chunk_ex:  # Using threads for concurrent chunk uploads
-
-                    for chunk in pd.read_csv(data.get_csv_for_streaming(), chunksize=self.chunksize, **pd_read_kwargs):
-                        file_key_to_use = file_key + f"_{i}"
-                        future = chunk_ex.submit(self.upload_df,
-                                                data=chunk,
-                                                file_key=file_key_to_use)
-                        chunk_futures.append(future)
-                        i += 1
-                    
-                    for future in as_completed(chunk_futures):
-                        responses.append(future.result())
-            else:
-                print(f"Query Status: {data.get_query_info().status}")
-                print("Please resolve query before re-attempting the upload.")
+    def _finish_in_flight(self):
+        """Stops later `Query` objects sharing this query once it is seen to be complete, or its result is read."""
+        if self._in_flight is not None:
+            self._in_flight.finish()
 
-        except Exception as e:
-            raise ValueError(f"Error when uploading chunk: {e}")
-            
-        print("All chunks uploaded successfully")
+    def state(self) -> str:
+        """Gets the state of the query.
 
-        return responses
-             
-    def commit(self, check_sum: Optional[Dict[str, Union[int, float, str]]] = None):
+        Returns
+        -------
+        str
+            One of QUEUED,RUNNING,SUCCEEDED,FAILED,CANCELLED
         """
-        Kicks off the commit of the load. A checksum must be provided
-        which is checked on the server side to ensure that the data provided
-        has integrity.  This is automatically created if you specify `track_rows_uploaded = True` when creating the load.
-
-        Parameters
-        ----------
-        check_sum : Dict[str, Union[int, float, str]] (optional)
-            Checksum data for the files to be committed.
-            Checksums must be in the form of a dictionary, with presto / trino expressions
-            as the key, and the expected result as the value. 
-
-            A check sum is not required if `track_rows_uploaded` was set to true for the load.  
-            This essentially builds the checksum `{'count(*)': nrows_uploads}` and adds it as an extrac checksum.
-
-            Example:
+        return self.get_query_info().status.state
 
-            .. code-block:: python
+    def is_complete(self) -> bool:
+        """Indicates whether the query is in a final state.
+        This means it has either succeeded, failed or been cancelled.
 
-                {
-                    "count(*)" : 53,
-                    "sum(my_value)": 123.3
-                }
+        Returns
+        -------
+        bool
+            Whether query complete
         """
-        if not check_sum:
-            check_sum = {}
-            if not self.track_rows_uploaded:
-                raise KeyError("check_sum must be provided for this load as track_rows_uploaded was specified as False.")
-
-        if self.track_rows_uploaded:
-            check_sum["count(*)"] = self.rows_uploaded
-            
-        load_commit = comodash_api_client_lowlevel.LoadCommit(check_sum=check_sum)
-        self.refresh_api_instance()
-        return self.load_api_instance.commit_load(self.load_id, load_commit)
+        return self.state() in Query.COMPLETED_STATES
 
-    def create_file_key(self) -> str:
-        """Used to create a random, valid file key with specified length."""
-            # Generate a UUID
-        raw_uid = str(uuid.uuid4())
-        
-        # Replace non-alphanumeric characters with underscores
-        file_key = 'x_' + re.sub(r'[^a-zA-Z0-9]', '_', raw_uid) # Add initial x_ underscore in case uid starts with integer
-        return file_key
+    def wait_to_complete(
+        self,
+        polling_strategy: PollingStrategy = None,
+        timeout: float = None
+    ) -> QueryInfo:
+        """Blocks until query is in a complete state
 
-    def wait_to_complete(self):
-        """Blocks until the load is in a complete state.
+        Parameters
+        ----------
+        polling_strategy : PollingStrategy
+            (optional) How often to check the query state. Defaults to :class:`PollingStrategy` defaults.
+        timeout : float
+            (optional) Seconds to wait before raising :class:`PollingTimeoutException`.
+            Overrides the timeout of `polling_strategy`.
 
         Returns
         -------
-        str
-            State of the load, after processing  completed.
+        QueryInfo
+            Final query info, with state one of 'SUCCEEDED', 'CANCELLED', 'FAILED'
         """
-        while True:
-            load_info = self.get_load_info()
-            if load_info.load_status != 'PROCESSING':
-                return load_info.load_status
-            time.sleep(5)
-
-class DashBulkUploader():
-    """
-    Class to handle multiple loads with utility functions by leveraging the `Load` class.
-    Since a `Load` creates an upload to a lake table, `DashBulkUploader` helps to manage uploads to several lake tables with 1 object.
-       
-    Example of upload with a `DashBulkUploader` instance:
-    
-    .. code-block:: python
 
-        config = DashConfig(Auth(orgname = 'my_org_name'))
+        polling_strategy = _get_polling_strategy(polling_strategy, timeout)
 
-        uploader = DashBulkUploader(config = config)
+        def wait(remaining=polling_strategy.timeout):
+            return _get_polling_strategy(polling_strategy, remaining).wait(
+                self.get_query_info,
+                _query_is_complete,
+                description=f"query {self.query_id}"
+            )
 
-        # A better use would be to loop through a config to run the following below code repeatedly.  A single upload is shown for demonstration purposes.
+        if self._in_flight is not None:
+            # the first caller polls for all queries sharing the same query id
+            return self._in_flight.call('wait_to_complete', wait, polling_strategy.timeout, f"query {self.query_id}")
+        return wait()
 
-        my_lake_table = 'v1_inforce_policies'
+    def query_id(self) -> str:
+        """Returns query id for this query
+        """
+        return self.query_id
 
-        # Create the load in the uploader
-        uploader.add_load(
-                            table_name = my_lake_table,
-                            check_sum = {
-                                'count(*)': 50000 
-                            }, # Alternatively, provide the track_rows_uploaded arg as true
-                            load_as_service_client_id = '0'
-                          )
+    def get_csv_for_streaming(self, compressed: bool = False) -> HTTPResponse:
+        """ Returns a ``urllib3.response.HTTPResponse`` object that can be used for streaming
+            This allows use of the downloaded file without having to save
+            it to local storage.
 
-        # Add the relevant datasources to the load. This can point to a directory to upload all contained files
-        uploader.add_data_to_load(
-                                    table_name = my_lake_table,
-                                    data = 'data/inforce_policies'
-                                  )
-        # View uploads added
-        print(uploader.uploads)
+            Be sure to use ``.release_conn()`` when completed to ensure that the
+            connection is released
 
-        uploader.execute_all_uploads() # Use execute_upload or execute_multiple_uploads if only certain uploads should be kicked off.
+            This can be achieved using the `with` notation e.g.::
 
-        print(uploader.get_load_info()) # View status of uploads.  This also refreshes uploader.uploads 
+                with query.get_csv_for3_streaming().stream() as stream:
+                  for chunk in stream:
+                      # do somthing with chunk
+                      # chunk is a byte array ``
 
-        # Remove uploads/datasources if you want to re-use the same instance
-        uploader.remove_load(table_name = my_lake_table)
-    """
-    def __init__(self, 
-                 config: DashConfig) -> None:
+            Parameters
+            ----------
+            compressed : bool, optional
+                If true, asks for the csv to be sent compressed with gzip or deflate (and zstd if the
+                ``zstandard`` package is installed).  ``read`` and ``stream`` decompress it as it arrives,
+                while ``tell`` and the ``Content-Length`` header count the compressed bytes, so completeness
+                is checked as usual.  Defaults to false.
+        """
+        self._finish_in_flight()
+        self.refresh_api_instance()
+        if compressed:
+            response = self.query_api_instance.download_csv_without_preload_content(
+                query_id=self.query_id,
+                _headers=_ACCEPT_COMPRESSED_HEADERS
+            )
+        else:
+            response = self.query_api_instance.download_csv_without_preload_content(
+                query_id=self.query_id)
+        response.autoclose = False
+        return response
 
-        self.config = config
-        self.pending_load_statuses = ['OPEN']
-        self.uploads = {}
-    
-    def add_load(
+    def download_csv(
         self,
-        table_name: str,
-        check_sum: Optional[Dict[str, Union[int, float, str]]] = None, 
-        modify_lambda: Callable = None,
-        load_type: str = 'APPEND_ONLY',
-        load_as_service_client_id: str = None,
-        partitions: Optional[List[str]] = None,
-        track_rows_uploaded: bool = False,
-        path_to_output_for_dryrun: str = None,
-        chunksize: int = None
-    ) -> None:
-        """
-        Creates a new load for a specified lake table. This function initializes the load
-        process, ensuring that the table name is in lowercase and that a checksum or row tracking
-        is provided for data integrity. Created loads can be fetched using the `DashBulkUploader.uploads` class variable.
+        output_file_path,
+        fail_if_exists=False,
+        max_connections: int = 1,
+        range_size: int = DEFAULT_DOWNLOAD_RANGE_SIZE,
+        max_retries: int = 3,
+        resume: bool = False,
+        compressed: bool = False
+    ):
+        """Download csv of results and check that the total file size is correct
 
         Parameters
         ----------
-        table_name : str
-            The name of the lake table. Must be in lowercase.
-        check_sum : Optional[Dict[str, Union[int, float, str]]]
-            Checksum data for the files to be committed. The checksum should be a dictionary
-            with Presto/Trino expressions as keys and their expected results as values.
-        modify_lambda : Callable, optional
-            A lambda function to modify the data before loading.
-        load_type : str, default 'APPEND_ONLY'
-            The type of load operation. Default is 'APPEND_ONLY'.
-        load_as_service_client_id : str, optional
-            The service client ID to use for the load. 
-            If service_client is not a field in the source data added to the load, this must be provided or the load will fail on commit.
-        partitions : Optional[List[str]], optional
-            List of partitions for the load to improve query efficiency from the Dash lake.
-        track_rows_uploaded : bool, default False
-            Whether to track the number of rows uploaded for the load.
-        path_to_output_for_dryrun : str, optional
-            If specified, no upload will be made to dash, but files
-            will be saved to the location specified. This is useful for testing.
-        chunksize: int, optional
-            Data source will be broken into chunks with chunksize rows before uploading.
+        output_file_path : File path
+            Path of the file to output to
+        fail_if_exists : bool, optional
+            If true, then will fail if the target file name already/
+            Defaults to false.
+        max_connections : int, optional
+            If more than 1, the file is downloaded in byte ranges over up to this many connections at once.
+            See `Query.download_csv_ranges`. Defaults to 1, i.e. a single stream.
+        range_size : int, optional
+            Size in bytes of each range when `max_connections` is more than 1. Defaults to 32MB
+        max_retries : int, optional
+            Number of times each range is retried when `max_connections` is more than 1. Defaults to 3
+        resume : bool, optional
+            If true, progress is saved beside the file so that a failed download continues where it
+            stopped when called again. See `Query.download_csv_resumable`. Defaults to false.
+        compressed : bool, optional
+            If true, the csv is transferred compressed and decompressed as it downloads.
+            See `Query.get_csv_for_streaming`.  Cannot be combined with `max_connections` or `resume`,
+            as byte ranges of a compressed transfer cannot be decompressed on their own. Defaults to false.
 
         Raises
         ------
-        ValueError
-            If the table name contains uppercase characters or if a load has already been created for the table.
-        KeyError
-            If neither `check_sum` nor `track_rows_uploaded` is provided.
+        IncompleteRead
+            If only part of the file (or of a range) is downloaded, this is raised
+        """
+
+        if compressed and (resume or max_connections > 1):
+            raise ValueError("compressed cannot be combined with resume or max_connections")
+
+        if resume:
+            self.download_csv_resumable(
+                output_file_path,
+                fail_if_exists=fail_if_exists,
+                max_connections=max_connections,
+                range_size=range_size,
+                max_retries=max_retries
+            )
+            return
+
+        if max_connections > 1:
+            write_mode = "xb" if fail_if_exists else "wb"
+            with io.open(output_file_path, write_mode) as f:
+                self.download_csv_ranges(
+                    f,
+                    max_connections=max_connections,
+                    range_size=range_size,
+                    max_retries=max_retries
+                )
+            return
+
+        with self.get_csv_for_streaming(compressed=compressed) as response:
+            write_mode = "wb"
+            if fail_if_exists:
+                write_mode = "xb"
+            with io.open(output_file_path, write_mode) as f:
+                size = 0
+                content_length = (response.getheader('Content-Length'))
+                for chunk in response.stream(1048576):
+                    size = size + len(chunk)
+                    f.write(chunk)
+                if (response.tell() != int(content_length)):
+                    raise IncompleteRead(
+                        response.tell(),
+                        int(content_length) - response.tell()
+                    )
+
+    def download_csv_ranges(
+        self,
+        file: io.BufferedIOBase,
+        max_connections: int = 4,
+        range_size: int = DEFAULT_DOWNLOAD_RANGE_SIZE,
+        max_retries: int = 3,
+        progress_callback: Callable[[int], Any] = None
+    ) -> int:
+        """Downloads the csv of results in byte ranges over several connections at once.
+
+        The first range is requested on its own to find the size of the file from the ``Content-Range``
+        header.  The file is then preallocated and the remaining ranges are fetched in parallel, each
+        written straight to its offset in `file`.  Each range is checked for completeness and, if the
+        connection fails, retried from the last byte received.
+
+        If the server does not support ranges, the file is streamed over the first connection instead.
+
+        Parameters
+        ----------
+        file : binary file object
+            Seekable file object opened for writing, e.g. with ``open(path, 'wb')``
+        max_connections : int, optional
+            Maximum number of ranges downloaded at once. Defaults to 4
+        range_size : int, optional
+            Size of each range in bytes. Defaults to 32MB
+        max_retries : int, optional
+            Number of times each range is retried. Defaults to 3
+        progress_callback : callable, optional
+            Called with the number of bytes written, after every chunk
 
         Returns
         -------
-        None
+        int
+            Size of the file in bytes
+
+        Raises
+        ------
+        IncompleteRead
+            If a range is still incomplete after `max_retries` retries
         """
-        if table_name.lower() != table_name:
-            raise ValueError('Only lowercase characters allowed for table_name.')
-        
-        if table_name in self.uploads:
-            raise ValueError(f'A load has been created for the lake table already: {table_name}. Call DashBulkUploader().remove_load({table_name}) if you want to re-start this load.')
+        if range_size < 1:
+            raise ValueError("range_size must be greater than zero")
 
-        if not check_sum and not track_rows_uploaded:
-            raise KeyError("Invalid arguments: Either provide a check_sum value or set track_rows_uploaded to True.")
+        write_lock = threading.Lock()
 
-        if not load_as_service_client_id:
-            print("WARNING: Dataset will not upload without specifying load_as_service_client_id option unless there is a column in the data source called service_client_id.")
+        def write(offset, chunk):
+            with write_lock:
+                file.seek(offset)
+                file.write(chunk)
+            if progress_callback:
+                progress_callback(len(chunk))
 
-        print(f"Creating new load for lake table: {table_name}")
-        self.config._check_and_refresh_token()
-        load = Load(
-            config=self.config,
-            load_type=load_type,
-            table_name=table_name,
-            load_as_service_client_id=load_as_service_client_id,
-            partitions=partitions,
-            track_rows_uploaded=track_rows_uploaded,
-            path_to_output_for_dryrun=path_to_output_for_dryrun,
-            modify_lambda=modify_lambda,
-            chunksize=chunksize
+        first_response = self._get_csv_range(0, range_size - 1)
+
+        if first_response.status == 200:
+            # ranges are not supported, so stream the whole file over this connection
+            with first_response as response:
+                content_length = int(response.getheader('Content-Length'))
+                size = 0
+                for chunk in response.stream(1048576):
+                    write(size, chunk)
+                    size = size + len(chunk)
+                if size != content_length:
+                    raise IncompleteRead(size, content_length - size)
+            return content_length
+
+        if first_response.status == 416:
+            # a range of an empty file cannot be satisfied
+            first_response.drain_conn()
+            first_response.release_conn()
+            return 0
+
+        total_size = _get_content_range_total(first_response)
+        with write_lock:
+            file.truncate(total_size)
+
+        self._download_csv_range_set(
+            write,
+            _split_ranges(total_size, range_size),
+            max_connections,
+            max_retries,
+            first_response=first_response
         )
+        return total_size
 
-        print(f"Load ID: {load.load_id}")
-        self.uploads[table_name] = {
-            'load': load,
-            'data_sources': {}, 
-            'check_sum': check_sum,
-            'load_status': load.get_load_info().load_status
-        }
-    
-    def add_data_to_load(
+    def download_csv_resumable(
         self,
-        table_name: str,
-        data: Union[str, pd.DataFrame, Query],
-        file_key: str = None,
-        source_type: str = None,
-        **pd_read_kwargs
-    ) -> None:
-        """
-        Adds data to an existing load for a specified lake table. This function supports adding data
-        from various sources including dataframes, directories, and files.
+        output_file_path,
+        fail_if_exists: bool = False,
+        max_connections: int = 1,
+        range_size: int = DEFAULT_DOWNLOAD_RANGE_SIZE,
+        max_retries: int = 3,
+        progress_callback: Callable[[int], Any] = None
+    ) -> int:
+        """Downloads the csv of results so that a failed download can be continued by calling this again.
+
+        The file is downloaded in byte ranges to ``<output_file_path>.part``.  As each range completes,
+        it is flushed to disk and recorded in ``<output_file_path>.progress``.  If a download fails, the
+        partial file and progress are kept, and the next call for the same query and `output_file_path`
+        only downloads the ranges that were not completed.  Once all ranges are complete, the partial
+        file is moved to `output_file_path` and the progress file is removed.
+
+        If the server does not support ranges, the file is downloaded in one stream, which cannot be resumed.
 
         Parameters
         ----------
-        table_name : str
-            The name of the lake table to which data will be added.  A load should already be added for this table_name.
-        data : Union[str, pd.DataFrame, Query]
-            The data to be added. Can be a path to a file or directory, a `pandas.DataFrame` or a `dash.Query`.  See `Load` for how different upload types will be executed.
-        file_key : str, optional
-            Optional custom key for the file. This will ensure idempotence. Must be lowercase and can include underscores.
-            If not provided, a random file key will be generated using `DashBulkUploader.create_file_key()`.
-            If a directory is provided as the source of data, `file_key` is ignored and a random file key is generated for each file in the directory.
-            If multiple files are uploaded to the same load with the same `file_key`, only the last one will be pushed to the lake. 
-        source_type : str, optional
-            The type of data source. Can be 'df' for DataFrame, 'dir' for directory, or 'file' for file.
-            If not specified, the function will attempt to infer the source type.
-            If a directory is provided, loop through the paths in the directory from `listdir()` and add valid files as datasources for the lake table.
-        pd_read_kwargs : dict, optional
-            Additional keyword arguments to pass to the pandas read function (one of [pd.read_csv, pd.read_parquet, pd.read_json, pd.read_excel]).
+        output_file_path : File path
+            Path of the file to output to
+        fail_if_exists : bool, optional
+            If true, then will fail if the target file already exists. Defaults to false.
+        max_connections : int, optional
+            Maximum number of ranges downloaded at once. Defaults to 1
+        range_size : int, optional
+            Size of each range in bytes, i.e. the most that is downloaded again after a failure, per connection. Defaults to 32MB
+        max_retries : int, optional
+            Number of times each range is retried before the download fails. Defaults to 3
+        progress_callback : callable, optional
+            Called with the number of bytes written, after every chunk.  Bytes downloaded by an earlier call are reported once at the start.
+
+        Returns
+        -------
+        int
+            Size of the file in bytes
 
         Raises
         ------
-        ValueError
-            If no existing load is found for the specified table, if the table name is not lowercase,
-            or if the source type cannot be identified.
-        KeyError
-            If neither `check_sum` nor `track_rows_uploaded` is provided.
+        FileExistsError
+            If `fail_if_exists` is true and the target file exists
+        IncompleteRead
+            If a range is still incomplete after `max_retries` retries
+        """
+        if range_size < 1:
+            raise ValueError("range_size must be greater than zero")
+        if fail_if_exists and os.path.exists(output_file_path):
+            raise FileExistsError(f"{output_file_path} already exists")
+
+        part_path = f"{output_file_path}.part"
+        progress_path = f"{output_file_path}.progress"
+        progress = _read_download_progress(progress_path)
+        if (
+            progress is None
+            or progress.get('query_id') != self.query_id
+            or progress.get('range_size') != range_size
+            or not isfile(part_path)
+            or os.path.getsize(part_path) != progress.get('size')
+        ):
+            progress = None
+
+        first_response = None
+        if progress is None:
+            first_response = self._get_csv_range(0, range_size - 1)
+            if first_response.status in (200, 416):
+                # ranges are not supported or the file is empty, so there is nothing to resume
+                first_response.close()
+                first_response.release_conn()
+                with io.open(part_path, 'wb') as f:
+                    size = self.download_csv_ranges(f, range_size=range_size, progress_callback=progress_callback)
+                os.replace(part_path, output_file_path)
+                _remove_if_exists(progress_path)
+                return size
+            progress = {
+                'query_id': self.query_id,
+                'size': _get_content_range_total(first_response),
+                'range_size': range_size,
+                'etag': first_response.getheader('ETag'),
+                'completed': []
+            }
+            with io.open(part_path, 'wb') as f:
+                f.truncate(progress['size'])
+            _write_download_progress(progress_path, progress)
+        else:
+            logger.info(f"Resuming download of query {self.query_id} to {output_file_path}")
+
+        completed = set(progress['completed'])
+        ranges = [
+            (start, end)
+            for start, end in _split_ranges(progress['size'], range_size)
+            if start not in completed
+        ]
+        if progress_callback and completed:
+            progress_callback(progress['size'] - sum(end + 1 - start for start, end in ranges))
+
+        write_lock = threading.Lock()
+        with io.open(part_path, 'r+b') as f:
+
+            def write(offset, chunk):
+                with write_lock:
+                    f.seek(offset)
+                    f.write(chunk)
+                if progress_callback:
+                    progress_callback(len(chunk))
+
+            def on_range_complete(start):
+                # only record a range once its bytes are on disk
+                with write_lock:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    completed.add(start)
+                    progress['completed'] = sorted(completed)
+                    _write_download_progress(progress_path, progress)
+
+            def check_etag(response):
+                etag = response.getheader('ETag')
+                if progress.get('etag') and etag and etag != progress['etag']:
+                    raise ValueError(
+                        f"The result of query {self.query_id} changed since the download started. "
+                        f"Remove {part_path} and {progress_path} to download it again."
+                    )
+
+            self._download_csv_range_set(
+                write,
+                ranges,
+                max_connections,
+                max_retries,
+                first_response=first_response,
+                on_range_complete=on_range_complete,
+                check_response=check_etag
+            )
+
+        os.replace(part_path, output_file_path)
+        _remove_if_exists(progress_path)
+        return progress['size']
+
+    def _download_csv_range_set(
+        self,
+        write,
+        ranges,
+        max_connections,
+        max_retries,
+        first_response=None,
+        on_range_complete=None,
+        check_response=None
+    ):
+        """Downloads `ranges` on up to `max_connections` threads.  `first_response`, if given, is the
+        open response for the first range, which is downloaded on the calling thread."""
+
+        def download(start, end, response=None):
+            self._download_csv_range(write, start, end, max_retries, response=response, check_response=check_response)
+            if on_range_complete:
+                on_range_complete(start)
+
+        ranges = list(ranges)
+        first_range = None
+        if first_response is not None:
+            first_range, ranges = ranges[0], ranges[1:]
+
+        with ThreadPoolExecutor(max_workers=max_connections) as range_ex:
+            futures = [
+                range_ex.submit(download, start, end)
+                for start, end in ranges
+            ]
+            try:
+                if first_range is not None:
+                    download(*first_range, response=first_response)
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _get_csv_range(self, start, end) -> HTTPResponse:
+        self._finish_in_flight()
+        self.refresh_api_instance()
+        return self.query_api_instance.download_csv_without_preload_content(
+            query_id=self.query_id,
+            _headers={'Range': f'bytes={start}-{end}'}
+        )
+
+    def _download_csv_range(self, write, start, end, max_retries, response=None, check_response=None):
+        """Downloads bytes `start` to `end` inclusive, resuming from the last byte written on failure."""
+        offset = start
+        retries = 0
+        while True:
+            body_read = False
+            try:
+                if response is None:
+                    response = self._get_csv_range(offset, end)
+                if response.status != 206:
+                    raise ApiException(status=response.status, reason=response.reason)
+                if check_response:
+                    check_response(response)
+                for chunk in response.stream(1048576):
+                    chunk = chunk[:end + 1 - offset]
+                    write(offset, chunk)
+                    offset = offset + len(chunk)
+                body_read = True
+                if offset != end + 1:
+                    raise IncompleteRead(offset - start, end + 1 - offset)
+                return
+            except (urllib3.exceptions.HTTPError, ApiException) as e:
+                if isinstance(e, ApiException) and (e.status is None or e.status < 500):
+                    raise
+                retries = retries + 1
+                if retries > max_retries:
+                    raise
+                logger.warning(f"Retrying download of bytes {offset}-{end} of query {self.query_id}: {e}")
+            finally:
+                if response is not None:
+                    if not body_read:
+                        # the connection cannot be reused with part of a response unread
+                        response.close()
+                    response.release_conn()
+                    response = None
+
+    def get_result_types(self) -> ResultColumnTypes:
+        """Returns the column types of the query result, from the result metadata.
+
+        The metadata is read from the raw first page, the smallest the API returns, without decoding its rows
+        into ``QueryResult`` models.
 
         Returns
         -------
-        None
+        ResultColumnTypes
+            Mapping of the result columns to Arrow and pandas types
         """
-        upload = self.uploads.get(table_name)
-        if not upload:
-            raise ValueError(f"No existing load for lake table: {table_name}. First run add_load with the table_name specified before adding data to the load.")
-        load = upload['load']
+        return ResultPage.from_json(self._get_raw_result_page()).result_types
 
-        if not file_key:
-            file_key = load.create_file_key()
+    def get_result_page(self, next_token: str = None) -> tuple:
+        """Gets one page of the result of a succeeded query.
 
-        if not source_type:
-            if isinstance(data, pd.DataFrame):
-                source_type = 'df'
-            elif isinstance(data, Query):
-                source_type = 'query'
-            elif isdir(data):
-                source_type = 'dir'
-            elif isfile(data):
-                source_type = 'file'
-            else:
-                raise ValueError("Source type could not be identified. Please fix datasource or specify the source_type as ['df', 'dir', 'file', 'query']")
+        Parameters
+        ----------
+        next_token : str, optional
+            Token for the page, from the previous page. Defaults to the first page.
 
-        if source_type == 'dir':
-            print(f"Unpacking data sources in directory: {data}")
+        Returns
+        -------
+        tuple[QueryResult, str]
+            The page, and the token for the next page, or None if this is the last page.
+        """
+        body = _json_loads(self._get_raw_result_page(next_token))
+        return QueryResultModel.from_dict(body), _get_result_next_token(body)
 
-            data_files = [join(data, file_name) for file_name in listdir(data)]
-            for file in data_files:
-                if not isfile(join(data, file)):
-                    print(f"The following path in the directory provided is not a file and so will not be added as a datasource: {file}")
-                else:
-                    self.add_data_to_load(
-                        table_name=table_name, 
-                        data=file,
-                        file_key=None,  # File keys can't be applied to directories - individual files should be specified if this is required
-                        source_type='file',
-                        **pd_read_kwargs
-                    )
-        else:
-            
-            data_source = {
-                'data': data,
-                'source_type': source_type,
-                'pd_read_kwargs': pd_read_kwargs
-            }
+    def get_result_page_columns(self, next_token: str = None) -> ResultPage:
+        """Gets one page of the result of a succeeded query, decoded column by column.  See `ResultPage`.
 
-            upload['data_sources'][file_key] = data_source
-            self.uploads[table_name] = upload
+        The header row of the first page is dropped.
 
-    def remove_data_from_load(
-        self,
-        table_name,
-        file_key
-    ):
-        """
-            Deletes data source with specified file key for table_name from uploads class variable if the load has not been comitted yet.
+        Parameters
+        ----------
+        next_token : str, optional
+            Token for the page, from the previous page. Defaults to the first page.
+
+        Returns
+        -------
+        ResultPage
         """
-        if self.uploads[table_name]['load_status'] in self.pending_load_statuses:
-            print(f"Removing {file_key} from load for {table_name}")
-            self.uploads[table_name]['data_sources'].pop(file_key)
-        else:
-            raise Exception("Load has already been committed.  First run remove_load and attempt to re-upload.")
+        return ResultPage.from_json(self._get_raw_result_page(next_token), skip_header=next_token is None)
 
-    def remove_load(
-        self,
-        table_name
-    ):
+    def _get_raw_result_page(self, next_token: str = None) -> bytes:
+        self._finish_in_flight()
+        self.refresh_api_instance()
+        response = self.query_api_instance.get_query_results_without_preload_content(
+            self.query_id, next_token=next_token)
+        try:
+            body = response.read()
+            if not 200 <= response.status <= 299:
+                raise ApiException(status=response.status, reason=response.reason, body=body.decode('utf-8', errors='replace'))
+            return body
+        finally:
+            response.release_conn()
+
+    def iter_result_pages(self, prefetch: int = 1) -> Iterator[QueryResultModel]:
+        """Iterates over the pages of the result of a succeeded query, following the next page tokens.
+
+        The next pages are fetched on a background thread while the caller processes the current one,
+        so the first page is available after one request, and later pages do not wait on a round trip each.
+
+        .. code-block:: python
+
+            for page in query.iter_result_pages(prefetch=2):
+                for row in page.result_set.rows:
+                    # do something with row
+
+        Parameters
+        ----------
+        prefetch : int, optional
+            Maximum number of pages fetched ahead of the page being processed. 0 fetches each page only when
+            it is needed, on the calling thread. Defaults to 1
+
+        Yields
+        ------
+        QueryResult
+            Pages of the result. The first row of the first page holds the column names.
         """
-            Deletes load for specified table_name from uploads class variable.
-        """ 
-        print(f"Removing {table_name} from uploads")
-        self.uploads.pop(table_name)
-    
-    def execute_upload(
-        self,
-        table_name: str,
-        max_workers: int = None
-    ) -> None:
+        return _prefetch(self._iter_result_pages(self.get_result_page), prefetch, f"comotion-result-pages-{self.query_id}")
+
+    def iter_result_page_columns(self, prefetch: int = 1) -> Iterator[ResultPage]:
+        """Iterates over the pages of the result of a succeeded query, decoded column by column.
+
+        Like `Query.iter_result_pages`, but each page is a `ResultPage` decoded straight from the raw response,
+        which is much faster for large results.  The header row of the first page is dropped.
+
+        Parameters
+        ----------
+        prefetch : int, optional
+            Maximum number of pages fetched and decoded ahead of the page being processed. Defaults to 1
+
+        Yields
+        ------
+        ResultPage
         """
-        Executes the upload process for a specified lake table. This function uses multi-threading
-        to upload data sources concurrently and commits the load upon completion.
+        return _prefetch(
+            self._iter_result_pages(self._get_result_page_columns_with_token),
+            prefetch,
+            f"comotion-result-pages-{self.query_id}"
+        )
+
+    def _get_result_page_columns_with_token(self, next_token):
+        page = self.get_result_page_columns(next_token)
+        return page, page.next_token
+
+    def _iter_result_pages(self, get_page):
+        next_token = None
+        while True:
+            page, next_token = get_page(next_token)
+            yield page
+            if not next_token:
+                return
+
+    def iter_rows(self, prefetch: int = 1) -> Iterator[tuple]:
+        """Iterates over the rows of the result of a succeeded query, page by page.  See `Query.iter_result_page_columns`.
+
+        Values are converted to python types using the column types of the result (see `ResultColumnTypes`),
+        with None for nulls.
 
         Parameters
         ----------
-        table_name : str
-            The name of the lake table to which data will be uploaded.
-        max_workers : int
-            The maximum number of threads to use for concurrent uploads (passed to `concurrent.futures.ThreadPoolExecutor`)
+        prefetch : int, optional
+            Maximum number of pages fetched ahead of the page being processed. Defaults to 1
 
-        Raises
+        Yields
         ------
-        ValueError
-            If no existing load is found for the specified table.
+        tuple
+            The values of a row, in the order of the result columns
+        """
+        for page in self.iter_result_page_columns(prefetch=prefetch):
+            yield from page.rows()
+
+    def get_result_schema(self, dictionary_columns: List[str] = None) -> "pa.Schema":
+        """Returns the Arrow schema of the query result, built from the column types in the result metadata.
+        See `ResultColumnTypes`.
+
+        Parameters
+        ----------
+        dictionary_columns : list[str], optional
+            String columns to dictionary encode
 
         Returns
         -------
-        None
-        """       
-        upload = self.uploads[table_name]
-        load = upload['load']
-        # Refresh load status
-        load_status = load.get_load_info().load_status
-
-        if load_status in self.pending_load_statuses:  # Only perform upload on pending loads
-            data_sources = upload['data_sources']
-            check_sum = upload['check_sum']
-            print(f"Uploading datasources to lake table: {table_name}")
+        pyarrow.Schema
+            Schema with a field for each column of the result
+        """
+        _require_pyarrow()
+        return self.get_result_types().arrow_schema(dictionary_columns)
 
-            upload_futures = []
+    def iter_record_batches(
+        self,
+        block_size: int = 1048576,
+        dictionary_columns: List[str] = None,
+        compressed: bool = False
+    ) -> Iterator["pa.RecordBatch"]:
+        """Streams the result of a succeeded query as ``pyarrow.RecordBatch`` objects.
 
-            with ThreadPoolExecutor(max_workers=max_workers) as upload_executor:  # Use multi-threading to speed up uploads
-                for file_key, data_source in data_sources.items():
-                    data = data_source['data']
-                    source_type = data_source['source_type']
-                    pd_read_kwargs = data_source['pd_read_kwargs']
-                    
-                    print(f"Uploading data source with file key: {file_key}")
-                    if source_type == 'df':
-                        print("Uploading from DataFrame")
-                        future = upload_executor.submit(load.upload_df, 
-                                                        data=data, 
-                                                        file_key=file_key
-                                                        )
-                    elif source_type == 'query':
-                        future = upload_executor.submit(
-                                                        load.upload_dash_query,
-                                                        data=data,
-                                                        file_key=file_key,
-                                                        **pd_read_kwargs
-                                                        )
-                    elif source_type == 'file':
-                        future = upload_executor.submit(load.upload_file, 
-                                                        data=data,
-                                                        file_key=file_key,
-                                                        **pd_read_kwargs
-                                                        )
-                    
-                    upload_futures.append(future)
+        The csv is parsed incrementally as it downloads, into columns typed from the result metadata
+        (see `ResultColumnTypes`), so only one batch is held in memory at a time.
 
-                for f in as_completed(upload_futures):
-                    try:
-                        f.result()
-                    except Exception as e:
-                        raise ValueError(f"Error uploading data source: {e}.  Load not yet committed.")
-                    # End of uploads 
+        Parameters
+        ----------
+        block_size : int, optional
+            Number of bytes of csv parsed into each batch. Defaults to 1MB
+        dictionary_columns : list[str], optional
+            String columns to dictionary encode
+        compressed : bool, optional
+            Whether to transfer the csv compressed. See `Query.get_csv_for_streaming`. Defaults to false
+
+        Yields
+        ------
+        pyarrow.RecordBatch
 
-            # Commit load
-            if not load.path_to_output_for_dryrun:
-                print(f"All uploads completed.")
-                if check_sum:
-                    print(f"Committing load with the following checksums: {check_sum}")
-                else:
-                    print("Committing load.")
-                load.commit(check_sum=check_sum)
-                
-            self.uploads[table_name]['load_status'] =  load.get_load_info().load_status
+        Raises
+        ------
+        IncompleteRead
+            If the connection closes before the whole result is received
+        """
+        _require_pyarrow()
+        yield from self._iter_record_batches(self.get_result_schema(dictionary_columns), block_size, compressed)
+
+    def _iter_record_batches(self, schema, block_size, compressed=False):
+        with self.get_csv_for_streaming(compressed=compressed) as response:
+            reader = pa_csv.open_csv(
+                response,
+                read_options=pa_csv.ReadOptions(block_size=block_size),
+                convert_options=_csv_convert_options(schema)
+            )
+            for batch in reader:
+                yield batch
+            _check_response_complete(response)
 
-    def execute_multiple_uploads(
+    def download_parquet(
         self,
-        table_names: List[str],
-        max_workers: int = None
-    ):
-        """
-            Uses execute_upload function for each table name in the list provided.
-        """
-        for table_name in table_names:
-            try:
-                self.execute_upload(
-                    table_name = table_name,
-                    max_workers = max_workers
-                )
-            except Exception as e:
-                print(f"Error executing upload to lake table {table_name}: {e}")
+        output_file_path,
+        row_group_size: int = 262144,
+        compression: str = 'snappy',
+        fail_if_exists: bool = False,
+        block_size: int = 1048576,
+        compressed: bool = False
+    ) -> int:
+        """Downloads the result of a succeeded query to a parquet file, converting the csv as it downloads.
+
+        The csv is parsed incrementally into columns typed from the result metadata (see `ResultColumnTypes`),
+        and each row group is written as soon as it is full, so memory use stays around one row group and
+        no csv file is written.  The file is written beside `output_file_path` and only moved into place
+        once it is complete.
 
-    def execute_all_uploads(self):
-        """
-            Uses execute_upload function for all loads created with the DashBulkUploader.
-        """
-        table_names = [table_name for table_name in self.uploads.keys()]
-        self.execute_multiple_uploads(table_names = table_names)
+        Parameters
+        ----------
+        output_file_path : File path
+            Path of the parquet file to write
+        row_group_size : int, optional
+            Number of rows in each row group. Defaults to 262144
+        compression : str, optional
+            Parquet compression codec, e.g. ``snappy``, ``zstd``, ``gzip`` or ``none``. Defaults to ``snappy``
+        fail_if_exists : bool, optional
+            If true, then will fail if the target file already exists. Defaults to false.
+        block_size : int, optional
+            Number of bytes of csv parsed at a time. Defaults to 1MB
+        compressed : bool, optional
+            Whether to transfer the csv compressed. See `Query.get_csv_for_streaming`. Defaults to false
 
-    def get_load_info(self):
+        Returns
+        -------
+        int
+            Number of rows written
+
+        Raises
+        ------
+        IncompleteRead
+            If the connection closes before the whole result is received
         """
-        Retrieves the load information for all loads created. This also updates the load status for each 
-        Load created by the `DashBulkUploader`.
+        _require_pyarrow()
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be at least 1")
+        if fail_if_exists and os.path.exists(output_file_path):
+            raise FileExistsError("%s already exists" % output_file_path)
+
+        schema = self.get_result_schema()
+        part_path = os.fspath(output_file_path) + '.part'
+        rows = 0
+        try:
+            with pq.ParquetWriter(part_path, schema, compression=compression) as writer:
+                buffered = []
+                buffered_rows = 0
+                for batch in self._iter_record_batches(schema, block_size, compressed):
+                    buffered.append(batch)
+                    buffered_rows = buffered_rows + batch.num_rows
+                    while buffered_rows >= row_group_size:
+                        table = pa.Table.from_batches(buffered, schema=schema)
+                        writer.write_table(table.slice(0, row_group_size), row_group_size=row_group_size)
+                        buffered = table.slice(row_group_size).to_batches()
+                        buffered_rows = buffered_rows - row_group_size
+                        rows = rows + row_group_size
+                if buffered_rows:
+                    writer.write_table(pa.Table.from_batches(buffered, schema=schema), row_group_size=row_group_size)
+                    rows = rows + buffered_rows
+            os.replace(part_path, output_file_path)
+        except BaseException:
+            _remove_if_exists(part_path)
+            raise
+        return rows
+
+    def to_arrow_file(
+        self,
+        output_file_path,
+        fail_if_exists: bool = False,
+        block_size: int = 1048576,
+        compressed: bool = False
+    ) -> "pa.Table":
+        """Downloads the result of a succeeded query to an Arrow IPC (feather v2) file, and returns it memory mapped.
+
+        The csv is parsed incrementally and each batch is written to the file as it arrives, so results larger
+        than memory can be downloaded.  The returned table reads its data from the file through the page cache
+        rather than the python heap, so it can be sliced and filtered without loading the whole result, and
+        other processes on the machine can share it with `Query.open_arrow_file`.
+
+        The file is not compressed, as compressed batches cannot be memory mapped, and string columns are
+        not dictionary encoded.  The file is written beside `output_file_path` and only moved into place
+        once it is complete.
+
+        Parameters
+        ----------
+        output_file_path : File path
+            Path of the arrow file to write
+        fail_if_exists : bool, optional
+            If true, then will fail if the target file already exists. Defaults to false.
+        block_size : int, optional
+            Number of bytes of csv parsed into each batch. Defaults to 1MB
+        compressed : bool, optional
+            Whether to transfer the csv compressed. See `Query.get_csv_for_streaming`. Defaults to false
 
         Returns
         -------
-        load_info : dict
-            A dictionary containing the load information for each table, with table names as keys
-            and their respective load statuses as values.
+        pyarrow.Table
+            The result, memory mapped from `output_file_path`
 
         Raises
         ------
-        Exception
-            If an error occurs while retrieving the load information for any table, it is caught
-            and printed, but the function continues to retrieve the remaining load statuses.
+        IncompleteRead
+            If the connection closes before the whole result is received
         """
-        load_info = {}
-        for table_name, upload in self.uploads.items():
-            load = upload['load']
-            try:
-                self.uploads[table_name]['load_status'] = load.wait_to_complete()
-                load_info[table_name] = load.get_load_info()
-            except Exception as e:
-                print(f"Error getting load {load.load_id}: {e}")
-                self.uploads[table_name]['load_status'] = f'ERROR: {e}'
-                
-        return load_info
+        _require_pyarrow()
+        if fail_if_exists and os.path.exists(output_file_path):
+            raise FileExistsError("%s already exists" % output_file_path)
 
-def v1_upload_csv(
-        file: Union[str, io.FileIO],
-        dash_table: str,
-        dash_orgname: str,
-        dash_api_key: str,
-        encoding: str = 'utf-8',
-        chunksize: int = 30000,
-        modify_lambda: Callable = None,
-        path_to_output_for_dryrun: str = None,
-        service_client_id: str = '0'
-    ):
-        """
-        .. Warning::
-            This function is deprecated.  Use `read_and_upload_file_to_dash` instead.
+        schema = self.get_result_schema()
+        part_path = os.fspath(output_file_path) + '.part'
+        try:
+            with pa.OSFile(part_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, schema) as writer:
+                    for batch in self._iter_record_batches(schema, block_size, compressed):
+                        writer.write_batch(batch)
+            os.replace(part_path, output_file_path)
+        except BaseException:
+            _remove_if_exists(part_path)
+            raise
+        return self.open_arrow_file(output_file_path)
+
+    @staticmethod
+    def open_arrow_file(path) -> "pa.Table":
+        """Opens an Arrow IPC file written by `Query.to_arrow_file` as a memory mapped ``pyarrow.Table``."""
+        _require_pyarrow()
+        with pa.memory_map(os.fspath(path)) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def to_arrow(
+        self,
+        use_threads: bool = True,
+        block_size: int = 16777216,
+        dictionary_columns: Union[List[str], bool] = None,
+        compressed: bool = False
+    ) -> "pa.Table":
+        """Reads the result of a succeeded query into a ``pyarrow.Table``.
 
-        Reads a file and uploads it to Dash.
+        The csv is parsed on several threads while it downloads, into columns typed from the result
+        metadata (see `ResultColumnTypes`), so peak memory stays close to the size of the table.
 
-        This function will:
-        - Read a csv file
-        - Break it up into multiple csv's
-        - each with a maximum number of lines defined by chunksize
-        - upload them to dash
+        Parameters
+        ----------
+        use_threads : bool, optional
+            Whether to parse blocks of the csv in parallel. Defaults to True
+        block_size : int, optional
+            Number of bytes of csv in each block parsed. Defaults to 16MB
+        dictionary_columns : list[str] or bool, optional
+            String columns to dictionary encode.  By default, string columns with few distinct values
+            are encoded (see `ResultColumnTypes.dictionary_encode`).  Set to False to encode none.
+        compressed : bool, optional
+            Whether to transfer the csv compressed. See `Query.get_csv_for_streaming`. Defaults to false
+
+        Returns
+        -------
+        pyarrow.Table
+
+        Raises
+        ------
+        IncompleteRead
+            If the connection closes before the whole result is received
+        """
+        if self._in_flight is not None:
+            return self._in_flight.call(
+                ('to_arrow', repr(dictionary_columns)),
+                lambda remaining: self._read_arrow(use_threads, block_size, dictionary_columns, compressed)
+            )
+        return self._read_arrow(use_threads, block_size, dictionary_columns, compressed)
+
+    def _read_arrow(self, use_threads, block_size, dictionary_columns, compressed):
+        _require_pyarrow()
+        if self.from_cache:
+            table = self.cache.read(self.cache_key)
+            if table is not None:
+                return ResultColumnTypes(self._cached_columns).encode_dictionaries(table, dictionary_columns)
+
+        result_types = self.get_result_types()
+        # cached results are stored without dictionary encoding, which is applied on every read
+        cache_result = self.cache_key is not None
+        convert_options = _csv_convert_options(
+            result_types.arrow_schema(
+                dictionary_columns if isinstance(dictionary_columns, list) and not cache_result else None
+            )
+        )
+        with self.get_csv_for_streaming(compressed=compressed) as response:
+            table = pa_csv.read_csv(
+                response,
+                read_options=pa_csv.ReadOptions(use_threads=use_threads, block_size=block_size),
+                convert_options=convert_options
+            )
+            _check_response_complete(response)
+            result_bytes = response.tell()
+        if cache_result:
+            self.cache.put(self.cache_key, table, self.query_id, result_types.columns, result_bytes=result_bytes)
+            return result_types.encode_dictionaries(table, dictionary_columns)
+        if dictionary_columns is None:
+            table = result_types.dictionary_encode(table)
+        return table
+
+    def to_pandas(
+        self,
+        use_threads: bool = True,
+        dictionary_columns: Union[List[str], bool] = None,
+        compressed: bool = False,
+        **to_pandas_kwargs
+    ) -> pd.DataFrame:
+        """Reads the result of a succeeded query into a ``pandas.DataFrame``, via `Query.to_arrow`.
+
+        bigint columns are nullable ``Int64`` columns and dictionary encoded columns are ``category`` columns.
+        The Arrow table is released column by column as it is converted, so the data is not held twice,
+        unless it is shared with other queries through a `QueryCoalescer`.
 
         Parameters
         ----------
-        file : Union[str, io.FileIO]
-            Either a path to the file to be uploaded,
-            or a FileIO stream representing the file to be uploaded
-            Should be an unencrypted, uncompressed CSV file
-        dash_table: str
-            name of Dash table to upload the file to
-        dash_orgname: str
-            orgname of your Dash instance
-        dash_api_key: str
-            valid api key for Dash API
-        encoding: str
-            the encoding of the source file.  defaults to utf-8.
-        chunksize: int
-            (optional)
-            the maximum number of lines to be included in each file.
-            Note that this should be low enough that the zipped file is less
-            than Dash maximum gzipped file size. Defaults to 30000.
-        modify_lambda:
-            (optional)
-            a callable that recieves the pandas dataframe read from the
-            csv.  Gives the opportunity to modify - such as adding a timestamp
-            column.
-            Is not required.
-        path_to_output_for_dryrun: str
-            (optional)
-            if specified, no upload will be made to dash, but files
-            will be saved to the location specified. This is useful for
-            testing.
-            multiple files will be created: [table_name].[i].csv.gz where i
-            represents multiple file parts
-        service_client_id: str
-            (optional)
-            if specified, specifies the service client for the upload. See the dash documentation for an explanation of service client.
-            https://docs.comotion.us/Comotion%20Dash/Analysts/How%20To/Prepare%20Your%20Data%20Model/Y%20Service%20Client%20and%20Row%20Level%20Security.html#service-client-and-row-level-security
+        use_threads : bool, optional
+            Whether to parse and convert in parallel. Defaults to True
+        dictionary_columns : list[str] or bool, optional
+            See `Query.to_arrow`
+        compressed : bool, optional
+            Whether to transfer the csv compressed. See `Query.get_csv_for_streaming`. Defaults to false
+        **to_pandas_kwargs
+            Additional keyword arguments for ``pyarrow.Table.to_pandas``
+
+        Returns
+        -------
+        pandas.DataFrame
+        """
+        table = self.to_arrow(use_threads=use_threads, dictionary_columns=dictionary_columns, compressed=compressed)
+        to_pandas_kwargs.setdefault('split_blocks', True)
+        # a table shared with other queries must not be released
+        to_pandas_kwargs.setdefault('self_destruct', self._in_flight is None)
+        to_pandas_kwargs.setdefault('types_mapper', ResultColumnTypes.pandas_types_mapper)
+        return table.to_pandas(use_threads=use_threads, **to_pandas_kwargs)
+
+    def stop(self):
+        """ Stop the query"""
+        self.refresh_api_instance()
+        return self.query_api_instance.stop_query(self.query_id)
+
+class ParquetWriterOptions():
+    """
+    Options for writing the parquet files uploaded by :class:`Load`, trading the CPU time spent
+    encoding each chunk against the bytes uploaded.  The defaults are those of ``pyarrow.parquet.write_table``.
+
+    Named profiles are available with :meth:`ParquetWriterOptions.profile`, and can also be passed by name
+    wherever options are accepted:
+
+    - ``'default'``: snappy, as uploaded before writer options were configurable
+    - ``'fast'``: lz4, for when encoding rather than uploading limits throughput
+    - ``'balanced'``: zstd at level 3, usually smaller than snappy for little more CPU
+    - ``'small'``: zstd at level 9 with 1MB data pages, for slow connections
+
+    .. code-block:: python
+
+        load = Load(config, table_name='v1_inforce_policies', load_type='APPEND_ONLY', parquet_writer_options='balanced')
+
+        options = ParquetWriterOptions(compression='gzip', compression_level=6, use_dictionary=['policy_status'])
+        load = Load(config, table_name='v1_inforce_policies', load_type='APPEND_ONLY', parquet_writer_options=options)
+
+    Parameters
+    ----------
+    compression : str, optional
+        One of 'snappy', 'zstd', 'lz4', 'gzip', 'brotli' or 'none'. Defaults to 'snappy'
+    compression_level : int, optional
+        Level of the codec, for the codecs that have levels, e.g. 1 to 22 for zstd and 1 to 9 for gzip.
+        Defaults to the default level of the codec.
+    row_group_size : int, optional
+        Maximum number of rows in a row group. Defaults to the pyarrow default of 1Mi rows
+    use_dictionary : bool or list of str, optional
+        Whether to dictionary encode all columns, or the names of the columns to dictionary encode.
+        Column names are those after they are made lowercase. Defaults to True
+    data_page_size : int, optional
+        Target size in bytes of the data pages in a column chunk. Defaults to the pyarrow default of 1MB
+    write_statistics : bool or list of str, optional
+        Whether to write min/max statistics for all columns, or the names of the columns to write them for. Defaults to True
+    """
+
+    COMPRESSIONS = ('snappy', 'zstd', 'lz4', 'gzip', 'brotli', 'none')
+
+    PROFILES = {
+        'default': {},
+        'fast': {'compression': 'lz4'},
+        'balanced': {'compression': 'zstd', 'compression_level': 3},
+        'small': {'compression': 'zstd', 'compression_level': 9, 'data_page_size': 1048576},
+    }
+
+    def __init__(
+        self,
+        compression: str = 'snappy',
+        compression_level: int = None,
+        row_group_size: int = None,
+        use_dictionary: Union[bool, List[str]] = True,
+        data_page_size: int = None,
+        write_statistics: Union[bool, List[str]] = True
+    ):
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f"compression must be one of {', '.join(self.COMPRESSIONS)}")
+        if compression_level is not None and compression in ('snappy', 'lz4', 'none'):
+            raise ValueError(f"compression_level cannot be set for {compression} compression")
+        if row_group_size is not None and row_group_size < 1:
+            raise ValueError("row_group_size must be at least 1")
+        if data_page_size is not None and data_page_size < 1:
+            raise ValueError("data_page_size must be at least 1")
+
+        self.compression = compression
+        self.compression_level = compression_level
+        self.row_group_size = row_group_size
+        self.use_dictionary = use_dictionary
+        self.data_page_size = data_page_size
+        self.write_statistics = write_statistics
+
+    @classmethod
+    def profile(cls, name: str) -> "ParquetWriterOptions":
+        """Returns the options of a named profile, one of 'default', 'fast', 'balanced' or 'small'."""
+        if name not in cls.PROFILES:
+            raise ValueError(f"profile must be one of {', '.join(cls.PROFILES)}")
+        return cls(**cls.PROFILES[name])
+
+    @classmethod
+    def from_value(cls, value: Union["ParquetWriterOptions", str, None]) -> "ParquetWriterOptions":
+        """Returns `value` as options: options as they are, a profile name as its profile, or None as the default options."""
+        if value is None:
+            return cls()
+        if isinstance(value, str):
+            return cls.profile(value)
+        if not isinstance(value, cls):
+            raise TypeError("parquet_writer_options must be of type comotion.dash.ParquetWriterOptions or a profile name")
+        return value
+
+    def write_table_kwargs(self) -> Dict[str, Any]:
+        """Returns the keyword arguments for ``pyarrow.parquet.write_table`` with these options."""
+        kwargs = {
+            'compression': self.compression,
+            'use_dictionary': self.use_dictionary,
+            'write_statistics': self.write_statistics
+        }
+        if self.compression_level is not None:
+            kwargs['compression_level'] = self.compression_level
+        if self.row_group_size is not None:
+            kwargs['row_group_size'] = self.row_group_size
+        if self.data_page_size is not None:
+            kwargs['data_page_size'] = self.data_page_size
+        return kwargs
+
+    def __eq__(self, other):
+        return isinstance(other, ParquetWriterOptions) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return f"ParquetWriterOptions({', '.join(f'{key}={value!r}' for key, value in vars(self).items())})"
+
+
+def _dataframe_to_parquet_buffer(
+    data: pd.DataFrame,
+    modify_lambda: Callable = None,
+    writer_options: ParquetWriterOptions = None
+) -> io.BytesIO:
+    """Applies `modify_lambda`, normalises the column names and writes `data` to an in-memory parquet file."""
+    if modify_lambda:
+        modify_lambda(data)
+
+    data.columns = [re.sub(r'\s+', '_', column.lower()) for column in data.columns] # Replace spaces with underscores in column names
+
+    table = pa.Table.from_pandas(data)
+
+    return _write_parquet_buffer(table, writer_options)
+
+
+def _table_to_parquet_buffer(table: "pa.Table", writer_options: ParquetWriterOptions = None) -> io.BytesIO:
+    """Normalises the column names as `_dataframe_to_parquet_buffer` does and writes `table` to an in-memory parquet file."""
+    table = table.rename_columns([re.sub(r'\s+', '_', column.lower()) for column in table.column_names])
+
+    return _write_parquet_buffer(table, writer_options)
+
+
+def _write_parquet_buffer(table: "pa.Table", writer_options: ParquetWriterOptions = None) -> io.BytesIO:
+    """Writes `table` to an in-memory parquet file with `writer_options`, or the pyarrow defaults."""
+    parquet_buffer = io.BytesIO()
+    if writer_options is None:
+        pq.write_table(table, parquet_buffer)
+    else:
+        pq.write_table(table, parquet_buffer, **writer_options.write_table_kwargs())
+    parquet_buffer.seek(0)
+    return parquet_buffer
+
+
+def _arrow_record_batches(data) -> Iterator["pa.RecordBatch"]:
+    """Returns the record batches of a pyarrow.Table, pyarrow.RecordBatch, pyarrow.RecordBatchReader
+    or an object exporting the Arrow C stream interface (e.g. a polars.DataFrame or a DuckDB relation)."""
+    _require_pyarrow()
+    if isinstance(data, pd.DataFrame):
+        raise ValueError("data is a pandas.DataFrame, use Load.upload_df instead")
+    if isinstance(data, pa.Table):
+        return iter(data.to_batches())
+    if isinstance(data, pa.RecordBatch):
+        return iter([data])
+    if isinstance(data, pa.RecordBatchReader):
+        return iter(data)
+    if hasattr(data, '__arrow_c_stream__'):
+        return iter(pa.RecordBatchReader.from_stream(data))
+    raise ValueError("data should be a pyarrow.Table, pyarrow.RecordBatch or pyarrow.RecordBatchReader")
+
+
+def _iter_table_chunks(batches, chunksize: int) -> Iterator["pa.Table"]:
+    """Groups record batches into tables of `chunksize` rows without copying them.  The last table may be shorter."""
+    pending = []
+    rows = 0
+    for batch in batches:
+        while batch.num_rows:
+            take = min(chunksize - rows, batch.num_rows)
+            pending.append(batch.slice(0, take))
+            rows = rows + take
+            batch = batch.slice(take)
+            if rows == chunksize:
+                yield pa.Table.from_batches(pending)
+                pending = []
+                rows = 0
+    if pending:
+        yield pa.Table.from_batches(pending)
+
+
+def _open_csv_record_batches(path, column_types: Dict[str, Any] = None) -> "pa.RecordBatchReader":
+    """Opens a streaming pyarrow reader of a csv file.
+
+    Columns are read as strings, with empty strings as nulls, except those given in `column_types`.
+    Types are not inferred, as pyarrow infers them from the first block only and would fail on a later block
+    after earlier chunks were uploaded.
+    """
+    column_types = dict(column_types or {})
+    # the header is read to find the column names
+    reader = pa_csv.open_csv(path)
+    names = reader.schema.names
+    reader.close()
+    unknown_columns = set(column_types) - set(names)
+    if unknown_columns:
+        raise ValueError(f"column_types has columns not in the file: {', '.join(sorted(unknown_columns))}")
+
+    return pa_csv.open_csv(path, convert_options=pa_csv.ConvertOptions(
+        column_types={name: column_types.get(name, pa.string()) for name in names},
+        strings_can_be_null=True
+    ))
+
+
+class _SerializedChunk():
+    """A chunk written to an in-memory parquet file, with the number of rows in it."""
+
+    def __init__(self, buffer: io.BytesIO, rows: int):
+        self.buffer = buffer
+        self.rows = rows
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.getbuffer().nbytes
+
+
+class _ByteBudget():
+    """Limits the bytes held by a pipeline.  `acquire` waits for room, unless nothing else is held."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, nbytes: int):
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight == 0 or self.in_flight + nbytes <= self.max_bytes)
+            self.in_flight = self.in_flight + nbytes
+
+    def exchange(self, released: int, acquired: int):
+        """Replaces `released` bytes with `acquired` bytes without waiting, e.g. when a chunk is serialized."""
+        with self._condition:
+            self.in_flight = self.in_flight - released + acquired
+            self._condition.notify_all()
+
+    def release(self, nbytes: int):
+        self.exchange(nbytes, 0)
+
+
+def _run_upload_pipeline(
+    chunks,
+    serialize: Callable,
+    upload: Callable,
+    size_of: Callable,
+    max_workers: int = None,
+    max_bytes_in_flight: int = DEFAULT_MAX_UPLOAD_BYTES_IN_FLIGHT,
+    serialize_workers: int = None
+) -> list:
+    """Reads, serializes and uploads chunks in three stages that run at the same time.
+
+    `chunks` is read on the calling thread, `serialize` runs on one pool of threads and `upload` on another.
+    The stages are joined by bounded queues: reading waits while `max_bytes_in_flight` bytes (chunks by
+    `size_of`, then serialized chunks by their ``nbytes``) are waiting in or running through the later
+    stages, or while twice as many chunks as there are workers are.  Memory use therefore stays flat
+    when uploading is slower than reading.
+
+    Parameters
+    ----------
+    chunks : iterable
+        (file_key, chunk) tuples
+    serialize : Callable
+        Takes a chunk and returns a serialized chunk with an ``nbytes`` attribute
+    upload : Callable
+        Takes a serialized chunk and its file key, and returns the upload response
+    size_of : Callable
+        Takes a chunk and returns the bytes of memory it holds
+    max_workers : int, optional
+        Number of threads in each of the serialize and upload pools. Defaults to the
+        ``concurrent.futures.ThreadPoolExecutor`` default, ``min(32, os.cpu_count() + 4)``
+    max_bytes_in_flight : int, optional
+        See above. Defaults to 512MB
+    serialize_workers : int, optional
+        Number of threads in the serialize pool, if different from `max_workers`
+
+    Returns
+    -------
+    list
+        The upload responses, in the order of `chunks`
+
+    Raises
+    ------
+    Exception
+        The first exception raised by a stage.  No further chunks are read once a stage fails.
+    """
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 1) + 4)
+    if serialize_workers is None:
+        serialize_workers = max_workers
+    serialize_pool = ThreadPoolExecutor(max_workers=serialize_workers, thread_name_prefix='comotion-serialize')
+    upload_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='comotion-upload')
+    budget = _ByteBudget(max_bytes_in_flight)
+    slots = threading.Semaphore(2 * (serialize_workers + max_workers))
+    responses = {}
+    errors = []
+
+    def upload_stage(index, file_key, serialized, nbytes):
+        try:
+            if not errors:
+                responses[index] = upload(serialized, file_key)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            budget.release(nbytes)
+            slots.release()
+
+    def serialize_stage(index, file_key, chunk, nbytes):
+        try:
+            serialized = serialize(chunk) if not errors else None
+        except BaseException as e:
+            errors.append(e)
+            serialized = None
+        if serialized is None:
+            budget.release(nbytes)
+            slots.release()
+            return
+        del chunk
+        serialized_bytes = serialized.nbytes
+        budget.exchange(nbytes, serialized_bytes)
+        upload_pool.submit(upload_stage, index, file_key, serialized, serialized_bytes)
+
+    try:
+        for index, (file_key, chunk) in enumerate(chunks):
+            nbytes = size_of(chunk)
+            slots.acquire()
+            budget.acquire(nbytes)
+            if errors:
+                budget.release(nbytes)
+                slots.release()
+                break
+            serialize_pool.submit(serialize_stage, index, file_key, chunk, nbytes)
+            del chunk
+    finally:
+        # serialize tasks submit to the upload pool, so it is shut down last
+        serialize_pool.shutdown(wait=True)
+        upload_pool.shutdown(wait=True)
+
+    if errors:
+        raise errors[0]
+    return [responses[index] for index in sorted(responses)]
+
+
+def _dataframe_to_parquet_bytes(data: pd.DataFrame, writer_options: ParquetWriterOptions = None) -> bytes:
+    """Writes `data` to parquet in a worker process. See `_dataframe_to_parquet_buffer`."""
+    return _dataframe_to_parquet_buffer(data, writer_options=writer_options).getvalue()
+
+
+def _table_to_parquet_bytes(table: "pa.Table", writer_options: ParquetWriterOptions = None) -> bytes:
+    """Writes `table` to parquet in a worker process. See `_table_to_parquet_buffer`."""
+    return _table_to_parquet_buffer(table, writer_options).getvalue()
+
+
+def _upload_parquet_buffer_to_s3(parquet_buffer: io.BytesIO, file_upload_response: FileUploadResponse):
+    """Uploads `parquet_buffer` to the location in `file_upload_response` using its STS credentials."""
+    # Create a session with AWS credentials from the presigned URL
+    my_session = boto3.Session(
+        aws_access_key_id=file_upload_response.sts_credentials['AccessKeyId'],
+        aws_secret_access_key=file_upload_response.sts_credentials['SecretAccessKey'],
+        aws_session_token=file_upload_response.sts_credentials['SessionToken']
+    )
+
+    return wr.s3.upload(
+        local_file=parquet_buffer,
+        path=f"s3://{file_upload_response.bucket}/{file_upload_response.path}",
+        boto3_session=my_session,
+        use_threads=True
+    )
+
+
+class Load():
+    """
+    The Load object starts and tracks a multi-file load to a single lake table on Comotion Dash
+
+    Initialising this class starts a Load on Comotion Dash and stores the
+    resulting `load_id`.
+
+    The load then needs to be committed with valid checksums to be pushed to the lake.
+
+    If you wish to work with an existing load, then supply only the `load_id` parameter
+
+    Example of upload with a Load instance:
+    
+    .. code-block:: python
+
+        load = Load(config = DashConfig(Auth('orgname')), 
+                    table_name = 'v1_inforce_policies', 
+                    load_as_service_client_id = '0') # Create the load
+        
+        print(load.load_id) # It can be useful to track these to fix 
+        for file, file_key in zip(file_path_list, file_keys): # Upload files with Load object
+            load.upload_file(
+                data = file,
+                file_key = file_key
+            )
+
+        load.commit( # Commit the load - this validates the files and pushes to the table_name specified
+            check_sum = { # Check that data uploaded matches what you expected before pushing to the lake.  *Also see track_rows_uploaded option
+                'sum(face_amount)': 20000,
+                'count(distinct policy_number)': 1000
+            }
+        )
+
+        print(load.get_load_info()) # Run this at any time to get the latest information on the load
+
+    """
+
+    def __init__(
+            self,
+            config: DashConfig,
+            load_type: str = None,
+            table_name: str = None,
+            load_as_service_client_id: str = None,
+            partitions: Optional[List[str]] = None,
+            load_id: str = None,
+            track_rows_uploaded: bool = None,
+            path_to_output_for_dryrun: str = None,
+            modify_lambda: Callable = None,
+            chunksize: int = None,
+            parquet_writer_options: Union[ParquetWriterOptions, str] = None
+    ):
+        """
+        Parameters
+        ----------
+
+        config : DashConfig
+            Object of type DashConfig including configuration details.
+        load_type : str
+            Load Type, initially only APPEND_ONLY supported. APPEND_ONLY means that data is appended to the lake table.
+        table_name : str
+            Name of lake table to be created and / or uploaded to.
+        load_as_service_client_id : str, optional
+            If provided, the upload is performed as if run by the service_client specified.
+        partitions : list[str], optional
+            Only applies if table does not already exist and is created. The created table will have these partitions. This must be a list of iceberg compatible partitions. Note that any load can only allow for up to 100 partitions, otherwise it will error out. If the table already exists, then this is ignored.
+        load_id : str, optional
+            In the case where you want to work with an existing load on dash, supply this parameter, and no other parameter (other than config) will be required.
+        track_rows_uploaded: bool, optional
+            If True, track the number of rows uploaded with the current Load instance.  This can be used to automatically create a checksum on commit (see Load.commit), however is not recommended for 
+            large files as this may increase the duration of upload significantly.
+        path_to_output_for_dryrun: str, optional
+            if specified, no upload will be made to dash, but files
+            will be saved to the location specified. This is useful for testing.
+        modify_lambda: Callable, optional
+            Callable which takes a pandas.DataFrame as the first arg.
+            Can be used to add/modify columns in the data before upload to the lake.
+        chunksize: int, default 30000
+            If a file is uploaded, it will be broken into chunks with chunksize rows before uploading.  Note an index is added to the end of the file key to uniquely identify chunks.
+        parquet_writer_options: ParquetWriterOptions or str, optional
+            Codec, row group size, dictionary encoding, page size and statistics of the parquet files uploaded, or the
+            name of a profile, see `ParquetWriterOptions`.  Can be given with `load_id`.  Defaults to the pyarrow defaults.
+        """
+        load_data = locals()
+        lowerlevel_load_sig = signature(comodash_api_client_lowlevel.Load)
+        lowerlevel_load_keys = [key for key in lowerlevel_load_sig.parameters.keys()]
+        if not(isinstance(config, DashConfig)):
+            raise TypeError("config must be of type comotion.dash.DashConfig")
+        
+        self.config = config
+        self.load_api_instance = LoadsApi(self.config.get_api_client())
+
+        if (load_id is not None):
+            # if load_id provided, then initialise this object with the provided load_id
+            self.load_id = load_id
+            for key,value in load_data.items():
+                if key not in  ['load_id', 'config', 'self', 'parquet_writer_options']:
+                    if value is not None:
+                        raise TypeError("if load_id is supplied, then only the config parameter and no others should be supplied.")
+        else:
+            # Enter a context with an instance of the API client
+            lowerlevel_load_kwargs = {
+                    key: value
+                    for key, value in load_data.items()
+                    if key in lowerlevel_load_keys
+            }
+
+            load = comodash_api_client_lowlevel.Load(**lowerlevel_load_kwargs)
+
+            # Create a new load
+            load_id_model = self.load_api_instance.create_load(load)
+            self.load_id = load_id_model.load_id
+
+        if track_rows_uploaded:
+            self.track_rows_uploaded = track_rows_uploaded
+        else:
+            self.track_rows_uploaded = False
+
+        self.rows_uploaded = 0
+        self._rows_uploaded_lock = threading.Lock()
+        self.path_to_output_for_dryrun = path_to_output_for_dryrun
+        self.modify_lambda = modify_lambda
+        if not chunksize:
+            self.chunksize = _UNCHUNKED_CHUNKSIZE # Very large chunksize to avoid chunking unless required
+        else:
+            self.chunksize = chunksize
+        self.parquet_writer_options = ParquetWriterOptions.from_value(parquet_writer_options)
+
+    def refresh_api_instance(self):
+        """
+        Points the api instance at the shared ``ApiClient`` of the config.
+        The access token is refreshed by the config itself, so no new connections or credentials are created.
+        """
+        self.load_api_instance = LoadsApi(self.config.get_api_client())
+
+    def get_load_info(self) -> LoadInfo:
+        """Gets the state of the load
+
+        Returns
+        -------
+        LoadInfo
+            Model containing all the load info, with the following attributes
+            
+            `load_status`
+                Status of the load, one of OPEN, PROCESSING, FAIL or SUCCESS
+            `error_type`
+                Type of error if the load status is FAIL.
+            `error_messages`
+                Detailed error messages if the load status is FAIL.
+
+        """
+        self.refresh_api_instance()
+        return self.load_api_instance.get_load(self.load_id)
+
+    def generate_presigned_url_for_file_upload(self, file_key: str = None) -> FileUploadResponse:
+        """
+        Generates presigned URLs and STS credentials for a new file upload.
+
+        Parameters
+        ----------
+        file_key : str, optional
+            Optional custom key for the file. This will ensure idempotence.
+            If multiple files are uploaded to the same load with the same file_key,
+            only the last one will be loaded. Must be lowercase and can include underscores.
+
+        Returns
+        -------
+        FileUploadResponse
+            Model containing all the relevant credentials to be able to upload a file to S3 as part of the load. This includes the following attributes:
+
+            - presigned_url : str
+                Presigned URL data for S3 file upload. The file can be posted to this endpoint using any AWS S3 compatible toolset.
+                Temporary credentials are included in the URL, so no other credentials are required.
+            - sts_credentials : dict
+                Alternatively to the presigned_url, these Temporary AWS STS credentials can be used to upload the file to the location specified by `path` and `bucket`.
+                This is required for various advanced toolsets, including AWS Wrangler.
+            - path : str
+                Path of the file in the S3 bucket. See the description of `sts_credentials`.
+            - bucket : str
+                Name of the S3 bucket. See the description of `sts_credentials`.
+
+        """
+        file_upload_request = FileUploadRequest()
+        if file_key:
+            file_upload_request = FileUploadRequest(file_key=file_key)
+
+        self.refresh_api_instance()
+        return self.load_api_instance.generate_presigned_url_for_file_upload(self.load_id, file_upload_request=file_upload_request)
+        
+    def upload_df(self, 
+                data: pd.DataFrame, 
+                file_key: str = None):
+        """
+        Uploads a `pandas.DataFrame` as a parquet file to an S3 bucket using a presigned URL.
+        If `path_to_output_for_dryrun` is specified for the load, write the file to a local directory instead.
+        Before uploading, `modify_lambda` is applied.  Then, column names are forced to be lowercase and spaces are replaced with underscores.
+        This is to prevent potential schema issues in the Dash lake.
+
+        Parameters:
+        -----------
+        data : pandas.DataFrame
+            The DataFrame to be uploaded. This should be a pandas.DataFrame object.
+        file_key : str, optional
+            Optional custom key for the file to be. If not provided, a random file key is created.  See Load.create_file_key().
+            This will ensure idempotence. If multiple files are uploaded to the same load with the same `file_key`, only the last one will be pushed to the lake. 
+            Must be lowercase and can include underscores.
+
+        Returns:
+        --------
+        None
+
+        Example:
+        --------
+
+        .. code-block:: python
+
+            import pandas as pd
+            load = Load(dashconfig)
+            df = pd.read_parquet('path/to/file.parquet')
+            load.upload_df(data = df, file_key='my_file_id')
+
+        """
+        if not isinstance(data, pd.DataFrame):
+            raise ValueError("data should be a valid pandas.DataFrame object")
+        
+        if not file_key:
+            file_key = self.create_file_key()
+
+        return self._upload_serialized(self._serialize_chunk(data), file_key)
+
+    def upload_table(
+        self,
+        data: Union["pa.Table", "pa.RecordBatchReader"],
+        file_key: str = None,
+        max_workers: int = None,
+        max_bytes_in_flight: int = DEFAULT_MAX_UPLOAD_BYTES_IN_FLIGHT,
+        processes: int = None
+    ):
+        """
+        Uploads Arrow data to the lake table specified in the load, or a local file if `path_to_output_for_dryrun` was specified.
+        The data is split into chunks of `chunksize` rows, which are written to parquet and uploaded in a pipeline
+        as in `Load.upload_file`, without converting them to pandas.
+        Note an index is added to the end of the file key to uniquely identify chunks uploaded.
+
+        A `pyarrow.RecordBatchReader` is read as it is uploaded, so data larger than memory can be uploaded
+        from e.g. `pyarrow.dataset.Dataset.scanner().to_reader()`.  Objects that export the Arrow C stream
+        interface, such as a `polars.DataFrame` or a DuckDB relation, are read without a copy.
+
+        If a `modify_lambda` was specified for the load, each chunk is converted to a `pandas.DataFrame` for it.
+
+        Parameters
+        ----------
+        data : pyarrow.Table, pyarrow.RecordBatch or pyarrow.RecordBatchReader
+            The data to be uploaded, or an object with an ``__arrow_c_stream__`` method.
+        file_key : str, optional
+            A unique key for the data being uploaded. If not provided, a key will be generated.
+        max_workers : int, optional
+            The maximum number of threads to use for concurrent uploads (passed to `concurrent.futures.ThreadPoolExecutor`)
+        max_bytes_in_flight : int, optional
+            The maximum number of bytes of chunks read but not yet uploaded. See `Load.upload_file`. Defaults to 512MB
+        processes : int, optional
+            If given, chunks are converted to parquet in this many worker processes. See `Load.upload_file`.
+
+        Returns
+        -------
+        List[Any]
+            A list of responses from the load upload API call for each chunk.
+
+        Raises
+        ------
+        ValueError
+            If data is not Arrow data.
+
+        Example
+        -------
+
+        .. code-block:: python
+
+            import polars as pl
+            load = Load(dashconfig, load_type='APPEND_ONLY', table_name='my_table')
+            load.upload_table(pl.read_csv('path/to/file.csv'), file_key='my_file_id')
+
+        """
+        batches = _arrow_record_batches(data)
+
+        if not file_key:
+            file_key = self.create_file_key()
+
+        chunks = _iter_table_chunks(batches, self.chunksize)
+        return self._upload_chunks(
+            ((file_key + f"_{i}", chunk) for i, chunk in enumerate(chunks, start=1)),
+            max_workers=max_workers,
+            max_bytes_in_flight=max_bytes_in_flight,
+            processes=processes
+        )
+
+    def upload_parquet_file(
+        self,
+        data: str,
+        file_key: str = None,
+        max_part_bytes: int = DEFAULT_MAX_PARQUET_PART_BYTES,
+        max_workers: int = None,
+        max_bytes_in_flight: int = DEFAULT_MAX_UPLOAD_BYTES_IN_FLIGHT
+    ):
+        """
+        Uploads a parquet file to the lake table specified in the load, or a local file if `path_to_output_for_dryrun` was specified,
+        without decoding it.  A file of at most `max_part_bytes` bytes is uploaded byte for byte.  A larger file is split
+        into parts on row group boundaries by copying the compressed column chunks of its row groups into new parquet files,
+        so uploading costs about the same as copying the file.
+        Note an index is added to the end of the file key to uniquely identify the parts uploaded.
+
+        Unlike the other upload methods, column names are uploaded as they are in the file, `modify_lambda` is not supported
+        and `parquet_writer_options` are not applied.
+        Page indexes and bloom filters are not copied to the parts of a split file.
+
+        Parameters
+        ----------
+        data : str
+            Path to the parquet file to be uploaded.
+        file_key : str, optional
+            A unique key for the file being uploaded. If not provided, a key will be generated.
+        max_part_bytes : int, optional
+            Files larger than this are split into parts of at most this many bytes.  A single row group larger than
+            this is uploaded as a part on its own.  Defaults to 256MB
+        max_workers : int, optional
+            The maximum number of threads to use for concurrent uploads (passed to `concurrent.futures.ThreadPoolExecutor`)
+        max_bytes_in_flight : int, optional
+            The maximum number of bytes of parts read but not yet uploaded. See `Load.upload_file`. Defaults to 512MB
+
+        Returns
+        -------
+        List[Any]
+            A list of responses from the load upload API call for each part.
+
+        Raises
+        ------
+        ValueError
+            If the file is not a parquet file that can be uploaded without decoding, or `modify_lambda` was specified for the load.
+        """
+        if self.modify_lambda:
+            raise ValueError("modify_lambda cannot be applied to a parquet file uploaded without decoding it, use upload_file(engine='pyarrow') instead")
+
+        return self._upload_parquet_parts(
+            ParquetFileParts(data),
+            file_key=file_key,
+            max_part_bytes=max_part_bytes,
+            max_workers=max_workers,
+            max_bytes_in_flight=max_bytes_in_flight
+        )
+
+    def _upload_parquet_parts(
+        self,
+        parquet_file: ParquetFileParts,
+        file_key: str = None,
+        max_part_bytes: int = DEFAULT_MAX_PARQUET_PART_BYTES,
+        max_workers: int = None,
+        max_bytes_in_flight: int = DEFAULT_MAX_UPLOAD_BYTES_IN_FLIGHT
+    ):
+        """Uploads the parts of a parsed parquet file. See `Load.upload_parquet_file`."""
+        if not file_key:
+            file_key = self.create_file_key()
+
+        def serialize(part):
+            return _SerializedChunk(parquet_file.read_part(part), parquet_file.part_rows(part))
+
+        parts = parquet_file.parts(max_part_bytes)
+        return _run_upload_pipeline(
+            ((file_key + f"_{i}", part) for i, part in enumerate(parts, start=1)),
+            serialize=serialize,
+            upload=self._upload_serialized,
+            size_of=parquet_file.part_bytes,
+            max_workers=max_workers,
+            max_bytes_in_flight=max_bytes_in_flight
+        )
+
+    def _serialize_chunk(self, data: Union[pd.DataFrame, "pa.Table"]) -> "_SerializedChunk":
+        """Applies `modify_lambda` to a chunk and writes it to an in-memory parquet file.
+
+        pyarrow.Table chunks are written directly, unless there is a `modify_lambda`, which needs a pandas.DataFrame.
+        """
+        if not isinstance(data, pd.DataFrame):
+            if not self.modify_lambda:
+                return _SerializedChunk(_table_to_parquet_buffer(data, self.parquet_writer_options), data.num_rows)
+            data = data.to_pandas()
+        rows = data.shape[0]
+        return _SerializedChunk(_dataframe_to_parquet_buffer(data, self.modify_lambda, self.parquet_writer_options), rows)
+
+    def _upload_serialized(self, serialized: "_SerializedChunk", file_key: str):
+        """Uploads a serialized chunk to the load, or writes it locally for a dry run."""
+        parquet_buffer = serialized.buffer
+
+        file_upload_response = self.generate_presigned_url_for_file_upload(file_key=file_key)
+
+        if not isinstance(file_upload_response, FileUploadResponse):
+            raise ValueError("file_upload_response should be a valid instance of FileUploadResponse.")
+        else:
+            bucket = file_upload_response.bucket
+            key = file_upload_response.path 
+            # Upload to s3 if not a dry-run
+            if not self.path_to_output_for_dryrun:
+                s3_file_name = basename(file_upload_response.path)
+
+                # Upload the Parquet buffer as a chunk to S3
+                print(f"Uploading to S3: {s3_file_name}")
+
+                upload_reponse = _upload_parquet_buffer_to_s3(parquet_buffer, file_upload_response)
+            else:
+            # Commence dry run
+                local_path = join(self.path_to_output_for_dryrun, f"{basename(key)}.parquet")
+                with open(local_path, 'wb') as f:
+                    f.write(parquet_buffer.getbuffer())
+                print(f"File written locally to: {local_path}")
+                upload_reponse = 'DRYRUN_COMPLETE' # Arbitrary reponse as file write has no return
+
+            if self.track_rows_uploaded:
+                # Count the rows in the Parquet file
+                rows_uploaded = serialized.rows
+                with self._rows_uploaded_lock:
+                    self.rows_uploaded += rows_uploaded
+                print(f"Successfully uploaded {key}: {rows_uploaded} rows")
+                print(f"Total rows uploaded for load {self.load_id}: {self.rows_uploaded}")
+            else:
+                print(f"Upload completed: {key}")
+
+            return upload_reponse
+        
+    def upload_file(
+        self,
+        data,
+        file_key: str = None,
+        use_file_name_as_key: bool = False,
+        max_workers: int = None,
+        max_bytes_in_flight: int = DEFAULT_MAX_UPLOAD_BYTES_IN_FLIGHT,
+        processes: int = None,
+        engine: str = 'auto',
+        column_types: Dict[str, Any] = None,
+        **pd_read_kwargs
+    ):
+        """
+        Uploads a file to the lake table specified in the load, or a local file if `path_to_output_for_dryrun` was specified.
+        Parquet files whose column names are lowercase without spaces are uploaded without decoding them, see
+        `Load.upload_parquet_file`, when no `pd_read_kwargs`, `modify_lambda`, `parquet_writer_options` or `chunksize`
+        are given, as parts are then cut by size rather than rows.  Other parquet files are read in chunks with pyarrow and uploaded as in `Load.upload_table`, when no
+        `pd_read_kwargs` are given.  Otherwise the file provided is read into a `pandas.DataFrame` using
+        `pd_read_kwargs` with an appropriate pandas function.
+        Note an index is added to the end of the file key to uniquely identify chunks uploaded.
+
+        With ``engine='pyarrow'``, a csv file given by a path ending in `.csv` is read with pyarrow instead of pandas.
+        This avoids converting every chunk to pandas and back, which takes time and two to three times the memory
+        of the chunk.  Its columns are then uploaded as strings, except those given in `column_types`.
+
+        Chunks are read, converted to parquet and uploaded in a pipeline: reading waits while `max_bytes_in_flight`
+        bytes of chunks and parquet files are waiting to be converted or uploaded, so memory use does not
+        grow with the size of the file when uploading is slower than reading.
+
+        Parameters
+        ----------
+        data : Any
+            The file to be uploaded.  This should be readable by `pandas.read_csv`, `pandas.read_parquet`, `pandas.read_json` or `pandas.read_excel`,
+            or be a path to a parquet or csv file for pyarrow.
+        file_key : str, optional
+            A unique key for the file being uploaded. If not provided, a key will be generated.
+        use_file_name_as_key : bool, optional
+            If True, the file name will be used as the file key. If False, a random key will be generated. Will throw an error when this is True and a file key is provided.
+        max_workers : int, optional
+            The maximum number of threads to use for concurrent uploads (passed to concurrent.futures.ThreadPoolExecutor)
+        max_bytes_in_flight : int, optional
+            The maximum number of bytes of chunks read but not yet uploaded. A single chunk larger than this
+            is still uploaded, on its own. Defaults to 512MB
+        processes : int, optional
+            Opt in to converting chunks to parquet in this many worker processes, so that conversion is not
+            limited by the GIL.  Reading and uploading stay in this process, and `modify_lambda` is applied before
+            a chunk is sent to a worker.  Defaults to converting in threads, which is faster unless encoding is the
+            bottleneck and there are cores to spare: each chunk is pickled to a worker and its parquet file pickled
+            back, and the workers import the SDK when they start.  Measure your data with
+            `benchmarks/upload_processes_benchmark.py` before using it.
+            Workers are started with the 'spawn' method, as forking a process that runs threads is unsafe,
+            so a script that uploads with `processes` must do so under an ``if __name__ == '__main__':`` guard.
+        engine : str, optional
+            'pyarrow' to read the file with pyarrow, failing if it is not a parquet or `.csv` file, 'pandas' to read it
+            with pandas, or 'auto' to upload parquet files without decoding them or read them with pyarrow as described
+            above, and read other files with pandas. Defaults to 'auto'
+        column_types : dict, optional
+            With ``engine='pyarrow'``, pyarrow types of csv columns, e.g. ``{'policy_number': pyarrow.int64()}``.
+            Other columns are read as strings.  The file is read once, as it is uploaded, so a value that does not
+            convert fails the upload when its block is read, after the chunks before it were uploaded.
+        **pd_read_kwargs
+            Additional keyword arguments to pass to the pandas read function (one of [pd.read_csv, pd.read_parquet, pd.read_json, pd.read_excel]).
+            You should not pass the variable pointing to the file here (e.g. filepath_or_buffer in pandas.read_csv), as this is passed in the data parameter.
+            Chunksize and nrows should also not be provided as extra parameters.
+            If you do not provide dtype, dtype will be determined automatically from the first chunk of data.
+
+        Returns
+        -------
+        List[Any]
+            A list of responses from the load upload API call for each chunk.
+
+        Raises
+        ------
+        ValueError
+            If the file type cannot be determined or if an error occurs during the upload of any chunk.
+        """
+        responses = []
+
+        if engine not in ('auto', 'pyarrow', 'pandas'):
+            raise ValueError("engine must be one of 'auto', 'pyarrow' or 'pandas'")
+        if engine == 'pyarrow' and pd_read_kwargs:
+            raise ValueError("pd_read_kwargs cannot be provided with engine='pyarrow'")
+        if engine != 'pyarrow' and column_types is not None:
+            raise ValueError("column_types can only be provided with engine='pyarrow'")
+
+        invalid_keys = {'filepath_or_buffer', 'chunksize', 'nrows', 'path', 'path_or_buf', 'io'}
+        provided_invalid_keys = invalid_keys.intersection(pd_read_kwargs.keys())
+        
+        if provided_invalid_keys:
+            raise ValueError(f"Do not provide the following keys: {', '.join(provided_invalid_keys)}")
+        
+        print(f"Uploading file: {data}")
+
+        # Reading CSV in chunks, converting each to Parquet, and uploading
+        try_functions = [pd.read_csv, pd.read_parquet, pd.read_json, pd.read_excel]
+
+        if file_key and use_file_name_as_key:
+            raise Exception("Cannot provide a file key when use_file_name_as_key is True")
+        elif file_key and not use_file_name_as_key:
+            pass # To be explicit only
+        elif use_file_name_as_key and not file_key:
+            file_key = os.path.basename(data).split('.')[0] # Remove file extension
+        elif not use_file_name_as_key and not file_key:
+            file_key = self.create_file_key()
+
+        parquet_file = None
+        if (
+            engine == 'auto' and not pd_read_kwargs and not self.modify_lambda
+            and self.chunksize == _UNCHUNKED_CHUNKSIZE
+            and self.parquet_writer_options == ParquetWriterOptions()
+        ):
+            # files that cannot be parsed here are read and uploaded by the decoding paths below
+            parquet_file = self._open_parquet_file_parts(data)
+
+        if parquet_file is not None:
+            try:
+                responses = self._upload_parquet_parts(
+                    parquet_file,
+                    file_key=file_key,
+                    max_workers=max_workers,
+                    max_bytes_in_flight=max_bytes_in_flight
+                )
+            except Exception as e:
+                raise ValueError(f"Error when uploading chunk: {e}")
+
+            print("All chunks uploaded successfully")
+            return responses
+
+        batches = None
+        if engine != 'pandas' and not pd_read_kwargs:
+            try:
+                batches = self._open_file_record_batches(data, read_csv=engine == 'pyarrow', column_types=column_types)
+            except Exception as e:
+                if pa is None or not isinstance(e, pa.ArrowInvalid):
+                    raise
+                raise ValueError(f"Could not read datasource with pyarrow for the following file key: {file_key}: {e}")
+            if batches is None and engine == 'pyarrow':
+                raise ValueError(f"Could not read datasource with pyarrow for the following file key: {file_key}")
+
+        if batches is not None:
+            try:
+                chunks = _iter_table_chunks(batches, self.chunksize)
+                responses = self._upload_chunks(
+                    ((file_key + f"_{i}", chunk) for i, chunk in enumerate(chunks, start=1)),
+                    max_workers=max_workers,
+                    max_bytes_in_flight=max_bytes_in_flight,
+                    processes=processes
+                )
+            except Exception as e:
+                raise ValueError(f"Error when uploading chunk: {e}")
+
+            print("All chunks uploaded successfully")
+            return responses
+
+        func_to_use = None
+        for func in try_functions:
+            try:
+                func(data, nrows=1, **pd_read_kwargs)
+                func_to_use = func
+                break
+            except:
+                pass
+        
+        if not func_to_use:
+            raise ValueError(f"Could not determine file type for datasource with the following file key: {file_key}")
+        
+        try:
+            chunks = func_to_use(data, chunksize=self.chunksize, **pd_read_kwargs)
+            responses = self._upload_chunks(
+                ((file_key + f"_{i}", chunk) for i, chunk in enumerate(chunks, start=1)),
+                max_workers=max_workers,
+                max_bytes_in_flight=max_bytes_in_flight,
+                processes=processes
+            )
+
+        except Exception as e:
+            raise ValueError(f"Error when uploading chunk: {e}")
+            
+        print("All chunks uploaded successfully")
+
+        return responses
+    
+    @staticmethod
+    def _open_parquet_file_parts(data) -> Optional[ParquetFileParts]:
+        """Returns the parsed footer of `data` if it is a path to a parquet file which `Load.upload_parquet_file`
+        can upload, and whose column names would not be changed by the other upload methods, or else None."""
+        if not isinstance(data, (str, os.PathLike)) or not isfile(data):
+            return None
+        try:
+            parquet_file = ParquetFileParts(data)
+            column_names = parquet_file.column_names()
+        except (ValueError, OSError):
+            return None
+        if any(re.sub(r'\s+', '_', column.lower()) != column for column in column_names):
+            return None
+        return parquet_file
+
+    @staticmethod
+    def _open_file_record_batches(data, read_csv=False, column_types=None) -> Optional[Iterator["pa.RecordBatch"]]:
+        """Returns a streaming pyarrow reader of a parquet file, or if `read_csv` of a file whose path ends in
+        `.csv` (see `_open_csv_record_batches`), or None if `data` is not a path to one of those or pyarrow is
+        not installed."""
+        if pa is None or not isinstance(data, (str, os.PathLike)):
+            return None
+        try:
+            # reads the footer only, and fails fast on files that are not parquet
+            return pq.ParquetFile(data).iter_batches()
+        except (pa.ArrowInvalid, OSError):
+            pass
+        if read_csv and os.fspath(data).lower().endswith('.csv') and isfile(data):
+            return _open_csv_record_batches(data, column_types)
+        return None
+
+    def upload_dash_query(
+        self,
+        data: Query,
+        file_key: str = None,
+        max_workers: int = None,
+        max_bytes_in_flight: int = DEFAULT_MAX_UPLOAD_BYTES_IN_FLIGHT,
+        processes: int = None,
+        **pd_read_kwargs
+    ):
+        """
+        Uploads the result of a `dash.Query` object to the specified lake table, or a local file if `path_to_output_for_dryrun` was specified.
+        The result is read into `pandas.DataFrame` chunks, which are uploaded in a pipeline as in `Load.upload_file`.
+        Note an index is added to the end of the file key to uniquely identify chunks uploaded.
+
+        Parameters
+        ----------
+        data : Query
+            The Query whose result is to be uploaded.
+        file_key : str, optional
+            A unique key for the file being uploaded. If not provided, a key will be generated.
+        max_workers : int, optional
+            The maximum number of threads to use for concurrent uploads (passed to `concurrent.futures.ThreadPoolExecutor`)
+        max_bytes_in_flight : int, optional
+            The maximum number of bytes of chunks read but not yet uploaded. See `Load.upload_file`. Defaults to 512MB
+        processes : int, optional
+            If given, chunks are converted to parquet in this many worker processes. See `Load.upload_file`.
+        **pd_read_kwargs
+            Additional keyword arguments to pass to the pandas function.
+            Note that filepath_or_buffer and chunksize are passed by default and so duplicating those here could cause issues.
+            `dtype` and `parse_dates` default to the column types of the query result (see `ResultColumnTypes`), and can be overridden here.
+
+        Returns
+        -------
+        List[Any]
+            A list of responses from the load upload API call for each chunk.
+
+        Raises
+        ------
+        ValueError
+            If an error occurs during the upload of any chunk or during the Query.
+        """
+        responses = []
+        
+        print(f"Uploading Query with ID: {data.query_id}")
+
+        if not file_key:
+            file_key = self.create_file_key()
+
+        invalid_keys = {'filepath_or_buffer', 'chunksize', 'nrows', 'path', 'path_or_buf', 'io'}
+        provided_invalid_keys = invalid_keys.intersection(pd_read_kwargs.keys())
+        
+        if provided_invalid_keys:
+            raise ValueError(f"Do not provide the following keys: {', '.join(provided_invalid_keys)}")
+
+        try:
+            data.wait_to_complete()
+
+            print(f"Query completed with state: {data.state()}")
+
+            if data.state() == data.SUCCEEDED_STATE:
+                # read columns with the types of the query result rather than as strings
+                for key, value in data.get_result_types().pandas_read_csv_kwargs().items():
+                    pd_read_kwargs.setdefault(key, value)
+
+                response = data.get_csv_for_streaming()
+                try:
+                    chunks = pd.read_csv(response, chunksize=self.chunksize, **pd_read_kwargs)
+                    responses = self._upload_chunks(
+                        ((file_key + f"_{i}", chunk) for i, chunk in enumerate(chunks, start=1)),
+                        max_workers=max_workers,
+                        max_bytes_in_flight=max_bytes_in_flight,
+                        processes=processes
+                    )
+                except BaseException:
+                    # the rest of the csv is not read, so the connection cannot be reused
+                    response.close()
+                    raise
+                finally:
+                    response.release_conn()
+            else:
+                print(f"Query Status: {data.get_query_info().status}")
+                print("Please resolve query before re-attempting the upload.")
+
+        except Exception as e:
+            raise ValueError(f"Error when uploading chunk: {e}")
+            
+        print("All chunks uploaded successfully")
+
+        return responses
+             
+    def _upload_chunks(
+        self,
+        chunks,
+        max_workers=None,
+        max_bytes_in_flight=DEFAULT_MAX_UPLOAD_BYTES_IN_FLIGHT,
+        processes=None
+    ) -> list:
+        """Serializes and uploads (file_key, pandas.DataFrame or pyarrow.Table) chunks with `_run_upload_pipeline`.
+
+        If `processes` is given, chunks are written to parquet in that many worker processes rather than
+        in threads of this process, which hold the GIL for much of the conversion.  The workers are spawned
+        rather than forked, as this process runs the token refresher and upload threads.  This is opt in, as
+        the chunks and parquet files are copied between processes, see `benchmarks/upload_processes_benchmark.py`.
+        """
+        def size_of(chunk):
+            if not isinstance(chunk, pd.DataFrame):
+                return chunk.nbytes
+            return int(chunk.memory_usage(index=True, deep=True).sum())
+
+        if not processes:
+            return _run_upload_pipeline(
+                chunks,
+                serialize=self._serialize_chunk,
+                upload=self._upload_serialized,
+                size_of=size_of,
+                max_workers=max_workers,
+                max_bytes_in_flight=max_bytes_in_flight
+            )
+
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as process_pool:
+            def serialize(chunk):
+                if not isinstance(chunk, pd.DataFrame):
+                    if not self.modify_lambda:
+                        parquet_bytes = process_pool.submit(_table_to_parquet_bytes, chunk, self.parquet_writer_options).result()
+                        return _SerializedChunk(io.BytesIO(parquet_bytes), chunk.num_rows)
+                    chunk = chunk.to_pandas()
+                # modify_lambda may not be picklable, so it is applied here before the chunk is sent
+                if self.modify_lambda:
+                    self.modify_lambda(chunk)
+                rows = chunk.shape[0]
+                parquet_bytes = process_pool.submit(_dataframe_to_parquet_bytes, chunk, self.parquet_writer_options).result()
+                return _SerializedChunk(io.BytesIO(parquet_bytes), rows)
+
+            return _run_upload_pipeline(
+                chunks,
+                serialize=serialize,
+                upload=self._upload_serialized,
+                size_of=size_of,
+                max_workers=max_workers,
+                max_bytes_in_flight=max_bytes_in_flight,
+                serialize_workers=processes
+            )
+
+    def commit(self, check_sum: Optional[Dict[str, Union[int, float, str]]] = None):
+        """
+        Kicks off the commit of the load. A checksum must be provided
+        which is checked on the server side to ensure that the data provided
+        has integrity.  This is automatically created if you specify `track_rows_uploaded = True` when creating the load.
+
+        Parameters
+        ----------
+        check_sum : Dict[str, Union[int, float, str]] (optional)
+            Checksum data for the files to be committed.
+            Checksums must be in the form of a dictionary, with presto / trino expressions
+            as the key, and the expected result as the value. 
+
+            A check sum is not required if `track_rows_uploaded` was set to true for the load.  
+            This essentially builds the checksum `{'count(*)': nrows_uploads}` and adds it as an extrac checksum.
+
+            Example:
+
+            .. code-block:: python
+
+                {
+                    "count(*)" : 53,
+                    "sum(my_value)": 123.3
+                }
+        """
+        if not check_sum:
+            check_sum = {}
+            if not self.track_rows_uploaded:
+                raise KeyError("check_sum must be provided for this load as track_rows_uploaded was specified as False.")
+
+        if self.track_rows_uploaded:
+            check_sum["count(*)"] = self.rows_uploaded
+            
+        load_commit = comodash_api_client_lowlevel.LoadCommit(check_sum=check_sum)
+        self.refresh_api_instance()
+        return self.load_api_instance.commit_load(self.load_id, load_commit)
+
+    def create_file_key(self) -> str:
+        """Used to create a random, valid file key with specified length."""
+            # Generate a UUID
+        raw_uid = str(uuid.uuid4())
+        
+        # Replace non-alphanumeric characters with underscores
+        file_key = 'x_' + re.sub(r'[^a-zA-Z0-9]', '_', raw_uid) # Add initial x_ underscore in case uid starts with integer
+        return file_key
+
+    def wait_to_complete(
+        self,
+        polling_strategy: PollingStrategy = None,
+        timeout: float = None
+    ):
+        """Blocks until the load is in a complete state.
+
+        Parameters
+        ----------
+        polling_strategy : PollingStrategy
+            (optional) How often to check the load status. Defaults to :class:`PollingStrategy` defaults.
+        timeout : float
+            (optional) Seconds to wait before raising :class:`PollingTimeoutException`.
+            Overrides the timeout of `polling_strategy`.
+
+        Returns
+        -------
+        str
+            State of the load, after processing  completed.
+        """
+        load_info = _get_polling_strategy(polling_strategy, timeout).wait(
+            self.get_load_info,
+            _load_is_complete,
+            description=f"load {self.load_id}"
+        )
+        return load_info.load_status
+
+class DashBulkUploader():
+    """
+    Class to handle multiple loads with utility functions by leveraging the `Load` class.
+    Since a `Load` creates an upload to a lake table, `DashBulkUploader` helps to manage uploads to several lake tables with 1 object.
+       
+    Example of upload with a `DashBulkUploader` instance:
+    
+    .. code-block:: python
+
+        config = DashConfig(Auth(orgname = 'my_org_name'))
+
+        uploader = DashBulkUploader(config = config)
+
+        # A better use would be to loop through a config to run the following below code repeatedly.  A single upload is shown for demonstration purposes.
+
+        my_lake_table = 'v1_inforce_policies'
+
+        # Create the load in the uploader
+        uploader.add_load(
+                            table_name = my_lake_table,
+                            check_sum = {
+                                'count(*)': 50000 
+                            }, # Alternatively, provide the track_rows_uploaded arg as true
+                            load_as_service_client_id = '0'
+                          )
+
+        # Add the relevant datasources to the load. This can point to a directory to upload all contained files
+        uploader.add_data_to_load(
+                                    table_name = my_lake_table,
+                                    data = 'data/inforce_policies'
+                                  )
+        # View uploads added
+        print(uploader.uploads)
+
+        uploader.execute_all_uploads() # Use execute_upload or execute_multiple_uploads if only certain uploads should be kicked off.
+
+        print(uploader.get_load_info()) # View status of uploads.  This also refreshes uploader.uploads 
+
+        # Remove uploads/datasources if you want to re-use the same instance
+        uploader.remove_load(table_name = my_lake_table)
+    """
+    def __init__(self, 
+                 config: DashConfig) -> None:
+
+        self.config = config
+        self.pending_load_statuses = ['OPEN']
+        self.uploads = {}
+    
+    def add_load(
+        self,
+        table_name: str,
+        check_sum: Optional[Dict[str, Union[int, float, str]]] = None, 
+        modify_lambda: Callable = None,
+        load_type: str = 'APPEND_ONLY',
+        load_as_service_client_id: str = None,
+        partitions: Optional[List[str]] = None,
+        track_rows_uploaded: bool = False,
+        path_to_output_for_dryrun: str = None,
+        chunksize: int = None,
+        parquet_writer_options: Union[ParquetWriterOptions, str] = None
+    ) -> None:
+        """
+        Creates a new load for a specified lake table. This function initializes the load
+        process, ensuring that the table name is in lowercase and that a checksum or row tracking
+        is provided for data integrity. Created loads can be fetched using the `DashBulkUploader.uploads` class variable.
+
+        Parameters
+        ----------
+        table_name : str
+            The name of the lake table. Must be in lowercase.
+        check_sum : Optional[Dict[str, Union[int, float, str]]]
+            Checksum data for the files to be committed. The checksum should be a dictionary
+            with Presto/Trino expressions as keys and their expected results as values.
+        modify_lambda : Callable, optional
+            A lambda function to modify the data before loading.
+        load_type : str, default 'APPEND_ONLY'
+            The type of load operation. Default is 'APPEND_ONLY'.
+        load_as_service_client_id : str, optional
+            The service client ID to use for the load. 
+            If service_client is not a field in the source data added to the load, this must be provided or the load will fail on commit.
+        partitions : Optional[List[str]], optional
+            List of partitions for the load to improve query efficiency from the Dash lake.
+        track_rows_uploaded : bool, default False
+            Whether to track the number of rows uploaded for the load.
+        path_to_output_for_dryrun : str, optional
+            If specified, no upload will be made to dash, but files
+            will be saved to the location specified. This is useful for testing.
+        chunksize: int, optional
+            Data source will be broken into chunks with chunksize rows before uploading.
+        parquet_writer_options: ParquetWriterOptions or str, optional
+            Options or the name of a profile for writing the parquet files uploaded.  See `ParquetWriterOptions`.
+
+        Raises
+        ------
+        ValueError
+            If the table name contains uppercase characters or if a load has already been created for the table.
+        KeyError
+            If neither `check_sum` nor `track_rows_uploaded` is provided.
+
+        Returns
+        -------
+        None
+        """
+        if table_name.lower() != table_name:
+            raise ValueError('Only lowercase characters allowed for table_name.')
+        
+        if table_name in self.uploads:
+            raise ValueError(f'A load has been created for the lake table already: {table_name}. Call DashBulkUploader().remove_load({table_name}) if you want to re-start this load.')
+
+        if not check_sum and not track_rows_uploaded:
+            raise KeyError("Invalid arguments: Either provide a check_sum value or set track_rows_uploaded to True.")
+
+        if not load_as_service_client_id:
+            print("WARNING: Dataset will not upload without specifying load_as_service_client_id option unless there is a column in the data source called service_client_id.")
+
+        print(f"Creating new load for lake table: {table_name}")
+        self.config._check_and_refresh_token()
+        load = Load(
+            config=self.config,
+            load_type=load_type,
+            table_name=table_name,
+            load_as_service_client_id=load_as_service_client_id,
+            partitions=partitions,
+            track_rows_uploaded=track_rows_uploaded,
+            path_to_output_for_dryrun=path_to_output_for_dryrun,
+            modify_lambda=modify_lambda,
+            chunksize=chunksize,
+            parquet_writer_options=parquet_writer_options
+        )
+
+        print(f"Load ID: {load.load_id}")
+        self.uploads[table_name] = {
+            'load': load,
+            'data_sources': {}, 
+            'check_sum': check_sum,
+            'load_status': load.get_load_info().load_status
+        }
+    
+    def add_data_to_load(
+        self,
+        table_name: str,
+        data: Union[str, pd.DataFrame, Query],
+        file_key: str = None,
+        source_type: str = None,
+        **pd_read_kwargs
+    ) -> None:
+        """
+        Adds data to an existing load for a specified lake table. This function supports adding data
+        from various sources including dataframes, directories, and files.
+
+        Parameters
+        ----------
+        table_name : str
+            The name of the lake table to which data will be added.  A load should already be added for this table_name.
+        data : Union[str, pd.DataFrame, Query]
+            The data to be added. Can be a path to a file or directory, a `pandas.DataFrame` or a `dash.Query`.  See `Load` for how different upload types will be executed.
+        file_key : str, optional
+            Optional custom key for the file. This will ensure idempotence. Must be lowercase and can include underscores.
+            If not provided, a random file key will be generated using `DashBulkUploader.create_file_key()`.
+            If a directory is provided as the source of data, `file_key` is ignored and a random file key is generated for each file in the directory.
+            If multiple files are uploaded to the same load with the same `file_key`, only the last one will be pushed to the lake. 
+        source_type : str, optional
+            The type of data source. Can be 'df' for DataFrame, 'dir' for directory, or 'file' for file.
+            If not specified, the function will attempt to infer the source type.
+            If a directory is provided, loop through the paths in the directory from `listdir()` and add valid files as datasources for the lake table.
+        pd_read_kwargs : dict, optional
+            Additional keyword arguments to pass to the pandas read function (one of [pd.read_csv, pd.read_parquet, pd.read_json, pd.read_excel]).
+
+        Raises
+        ------
+        ValueError
+            If no existing load is found for the specified table, if the table name is not lowercase,
+            or if the source type cannot be identified.
+        KeyError
+            If neither `check_sum` nor `track_rows_uploaded` is provided.
+
+        Returns
+        -------
+        None
+        """
+        upload = self.uploads.get(table_name)
+        if not upload:
+            raise ValueError(f"No existing load for lake table: {table_name}. First run add_load with the table_name specified before adding data to the load.")
+        load = upload['load']
+
+        if not file_key:
+            file_key = load.create_file_key()
+
+        if not source_type:
+            if isinstance(data, pd.DataFrame):
+                source_type = 'df'
+            elif isinstance(data, Query):
+                source_type = 'query'
+            elif isdir(data):
+                source_type = 'dir'
+            elif isfile(data):
+                source_type = 'file'
+            else:
+                raise ValueError("Source type could not be identified. Please fix datasource or specify the source_type as ['df', 'dir', 'file', 'query']")
+
+        if source_type == 'dir':
+            print(f"Unpacking data sources in directory: {data}")
+
+            data_files = [join(data, file_name) for file_name in listdir(data)]
+            for file in data_files:
+                if not isfile(join(data, file)):
+                    print(f"The following path in the directory provided is not a file and so will not be added as a datasource: {file}")
+                else:
+                    self.add_data_to_load(
+                        table_name=table_name, 
+                        data=file,
+                        file_key=None,  # File keys can't be applied to directories - individual files should be specified if this is required
+                        source_type='file',
+                        **pd_read_kwargs
+                    )
+        else:
+            
+            data_source = {
+                'data': data,
+                'source_type': source_type,
+                'pd_read_kwargs': pd_read_kwargs
+            }
+
+            upload['data_sources'][file_key] = data_source
+            self.uploads[table_name] = upload
+
+    def remove_data_from_load(
+        self,
+        table_name,
+        file_key
+    ):
+        """
+            Deletes data source with specified file key for table_name from uploads class variable if the load has not been comitted yet.
+        """
+        if self.uploads[table_name]['load_status'] in self.pending_load_statuses:
+            print(f"Removing {file_key} from load for {table_name}")
+            self.uploads[table_name]['data_sources'].pop(file_key)
+        else:
+            raise Exception("Load has already been committed.  First run remove_load and attempt to re-upload.")
+
+    def remove_load(
+        self,
+        table_name
+    ):
+        """
+            Deletes load for specified table_name from uploads class variable.
+        """ 
+        print(f"Removing {table_name} from uploads")
+        self.uploads.pop(table_name)
+    
+    def execute_upload(
+        self,
+        table_name: str,
+        max_workers: int = None
+    ) -> None:
+        """
+        Executes the upload process for a specified lake table. This function uses multi-threading
+        to upload data sources concurrently and commits the load upon completion.
+
+        Parameters
+        ----------
+        table_name : str
+            The name of the lake table to which data will be uploaded.
+        max_workers : int
+            The maximum number of threads to use for concurrent uploads (passed to `concurrent.futures.ThreadPoolExecutor`)
+
+        Raises
+        ------
+        ValueError
+            If no existing load is found for the specified table.
+
+        Returns
+        -------
+        None
+        """       
+        upload = self.uploads[table_name]
+        load = upload['load']
+        # Refresh load status
+        load_status = load.get_load_info().load_status
+
+        if load_status in self.pending_load_statuses:  # Only perform upload on pending loads
+            data_sources = upload['data_sources']
+            check_sum = upload['check_sum']
+            print(f"Uploading datasources to lake table: {table_name}")
+
+            upload_futures = []
+
+            with ThreadPoolExecutor(max_workers=max_workers) as upload_executor:  # Use multi-threading to speed up uploads
+                for file_key, data_source in data_sources.items():
+                    data = data_source['data']
+                    source_type = data_source['source_type']
+                    pd_read_kwargs = data_source['pd_read_kwargs']
+                    
+                    print(f"Uploading data source with file key: {file_key}")
+                    if source_type == 'df':
+                        print("Uploading from DataFrame")
+                        future = upload_executor.submit(load.upload_df, 
+                                                        data=data, 
+                                                        file_key=file_key
+                                                        )
+                    elif source_type == 'query':
+                        future = upload_executor.submit(
+                                                        load.upload_dash_query,
+                                                        data=data,
+                                                        file_key=file_key,
+                                                        **pd_read_kwargs
+                                                        )
+                    elif source_type == 'file':
+                        future = upload_executor.submit(load.upload_file, 
+                                                        data=data,
+                                                        file_key=file_key,
+                                                        **pd_read_kwargs
+                                                        )
+                    
+                    upload_futures.append(future)
+
+                for f in as_completed(upload_futures):
+                    try:
+                        f.result()
+                    except Exception as e:
+                        raise ValueError(f"Error uploading data source: {e}.  Load not yet committed.")
+                    # End of uploads 
+
+            # Commit load
+            if not load.path_to_output_for_dryrun:
+                print(f"All uploads completed.")
+                if check_sum:
+                    print(f"Committing load with the following checksums: {check_sum}")
+                else:
+                    print("Committing load.")
+                load.commit(check_sum=check_sum)
+                
+            self.uploads[table_name]['load_status'] =  load.get_load_info().load_status
+
+    def execute_multiple_uploads(
+        self,
+        table_names: List[str],
+        max_workers: int = None
+    ):
+        """
+            Uses execute_upload function for each table name in the list provided.
+        """
+        for table_name in table_names:
+            try:
+                self.execute_upload(
+                    table_name = table_name,
+                    max_workers = max_workers
+                )
+            except Exception as e:
+                print(f"Error executing upload to lake table {table_name}: {e}")
+
+    def execute_all_uploads(self):
+        """
+            Uses execute_upload function for all loads created with the DashBulkUploader.
+        """
+        table_names = [table_name for table_name in self.uploads.keys()]
+        self.execute_multiple_uploads(table_names = table_names)
+
+    def get_load_info(self):
+        """
+        Retrieves the load information for all loads created. This also updates the load status for each 
+        Load created by the `DashBulkUploader`.
+
+        Returns
+        -------
+        load_info : dict
+            A dictionary containing the load information for each table, with table names as keys
+            and their respective load statuses as values.
+
+        Raises
+        ------
+        Exception
+            If an error occurs while retrieving the load information for any table, it is caught
+            and printed, but the function continues to retrieve the remaining load statuses.
+        """
+        load_info = {}
+        # wait on all loads at once rather than one after the other
+        monitor = StatusMonitor()
+        futures = {
+            table_name: monitor.watch_status(
+                upload['load'].get_load_info,
+                _load_is_complete,
+                f"load {upload['load'].load_id}"
+            )
+            for table_name, upload in self.uploads.items()
+        }
+        for table_name, future in futures.items():
+            load = self.uploads[table_name]['load']
+            try:
+                load_info[table_name] = future.result()
+                self.uploads[table_name]['load_status'] = load_info[table_name].load_status
+            except Exception as e:
+                print(f"Error getting load {load.load_id}: {e}")
+                self.uploads[table_name]['load_status'] = f'ERROR: {e}'
+                
+        return load_info
+
+def v1_upload_csv(
+        file: Union[str, io.FileIO],
+        dash_table: str,
+        dash_orgname: str,
+        dash_api_key: str,
+        encoding: str = 'utf-8',
+        chunksize: int = 30000,
+        modify_lambda: Callable = None,
+        path_to_output_for_dryrun: str = None,
+        service_client_id: str = '0'
+    ):
+        """
+        .. Warning::
+            This function is deprecated.  Use `read_and_upload_file_to_dash` instead.
+
+        Reads a file and uploads it to Dash.
+
+        This function will:
+        - Read a csv file
+        - Break it up into multiple csv's
+        - each with a maximum number of lines defined by chunksize
+        - upload them to dash
+
+        Parameters
+        ----------
+        file : Union[str, io.FileIO]
+            Either a path to the file to be uploaded,
+            or a FileIO stream representing the file to be uploaded
+            Should be an unencrypted, uncompressed CSV file
+        dash_table: str
+            name of Dash table to upload the file to
+        dash_orgname: str
+            orgname of your Dash instance
+        dash_api_key: str
+            valid api key for Dash API
+        encoding: str
+            the encoding of the source file.  defaults to utf-8.
+        chunksize: int
+            (optional)
+            the maximum number of lines to be included in each file.
+            Note that this should be low enough that the zipped file is less
+            than Dash maximum gzipped file size. Defaults to 30000.
+        modify_lambda:
+            (optional)
+            a callable that recieves the pandas dataframe read from the
+            csv.  Gives the opportunity to modify - such as adding a timestamp
+            column.
+            Is not required.
+        path_to_output_for_dryrun: str
+            (optional)
+            if specified, no upload will be made to dash, but files
+            will be saved to the location specified. This is useful for
+            testing.
+            multiple files will be created: [table_name].[i].csv.gz where i
+            represents multiple file parts
+        service_client_id: str
+            (optional)
+            if specified, specifies the service client for the upload. See the dash documentation for an explanation of service client.
+            https://docs.comotion.us/Comotion%20Dash/Analysts/How%20To/Prepare%20Your%20Data%20Model/Y%20Service%20Client%20and%20Row%20Level%20Security.html#service-client-and-row-level-security
+        Returns
+        -------
+        List
+            List of http responses
+        """
+        file_reader = pd.read_csv(
+            file,
+            chunksize=chunksize,
+            encoding=encoding,
+            dtype=str  # Set all columns to strings.  Dash will still infer the type, but this makes sure it doesnt mess with the contents of the csv before upload
+        )
+
+        i = 1
+        responses = []
+        for file_df in file_reader:
+
+            if modify_lambda is not None:
+                modify_lambda(file_df)
+
+
+            csv_stream = create_gzipped_csv_stream_from_df(file_df)
+
+            if path_to_output_for_dryrun is None:
+
+                response = upload_csv_to_dash(
+                    dash_orgname=dash_orgname,
+                    dash_api_key=dash_api_key,
+                    dash_table=dash_table,
+                    csv_gz_stream=csv_stream,
+                    service_client_id=service_client_id
+                )
+
+                responses.append(response.text)
+
+            else:
+                with open(
+                    join(
+                        path_to_output_for_dryrun,
+                        dash_table + "." + str(i) + ".csv.gz"
+                    ),
+                    "wb"
+                ) as f:
+                    f.write(csv_stream.getvalue())
+
+            i = i + 1
+
+        return responses
+
+def upload_csv_to_dash(
+    dash_orgname: str, # noqa
+    dash_api_key: str,
+    dash_table: str,
+    csv_gz_stream: io.FileIO,
+    service_client_id: str = '0'
+) -> requests.Response:
+    """Uploads csv gzipped stream to Dash
+
+    Expects a csv gzipped stream to upload to dash.
+
+    Args:
+        dash_orgname (str): Dash organisation name for dash instance
+        dash_api_key (str): Valid API key for the organisation instance
+        dash_table (str): Table name to upload to
+
+        csv_gz_stream (io.FileIO): Description
+
+    Returns:
+        requests.Response: response from dash api
+
+    Raises:
+        HTTPError: If one is raised by the call
+    """
+
+    url = "https://api.comodash.io/v1/data-input-file"
+
+    headers = {
+        'Content-Type': 'application/gzip',
+        'service_client_id': service_client_id,
+        'x-api-key': dash_api_key,
+        'org-name': dash_orgname,
+        'table-name': dash_table
+    }
+
+    dash_response = requests.request(
+        "POST",
+        url,
+        headers=headers,
+        data=csv_gz_stream.getbuffer()
+    )
+
+    dash_response.raise_for_status()
+
+    return dash_response
+
+
+def create_gzipped_csv_stream_from_df(df: pd.DataFrame) -> io.BytesIO:
+    """Returns a gzipped, utf-8 csv file bytestream from a pandas dataframe
+
+    Useful to help upload dataframes to dash
+
+    It does not break file up, so be sure to apply a maximise chunksize
+    to the dataframe before applying - otherwise dash max file limits will
+    cause an error
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dateframe to be turned into bytestream
+
+    Returns
+    -------
+    io.BytesIO
+        The Bytestream
+
+    """
+
+    csv_stream = io.BytesIO()
+    df.to_csv(
+        csv_stream,
+        compression="gzip",
+        encoding="utf-8",
+        index=False,
+        quoting=csv.QUOTE_NONNUMERIC
+    )
+
+    return csv_stream
+
+def read_and_upload_file_to_dash(
+    file: Union[str, io.FileIO],
+    dash_table: str,
+    dash_orgname: str,
+    file_key: str = None,
+    dash_api_key: str = None,
+    check_sum: Optional[Dict[str, Union[int, float, str]]] = None,
+    encoding: str = 'utf-8',
+    chunksize: int = 30000,
+    modify_lambda: Callable = None,
+    path_to_output_for_dryrun: str = None,
+    service_client_id: str = '0',
+    partitions: Optional[List[str]] = None,
+    load_type: str = 'APPEND_ONLY',
+    data_model_version: str = None,
+    entity_type: str = Auth.USER,
+    application_client_id: str = None,
+    application_client_secret: str = None
+) -> Union[List[Any], DashBulkUploader]:
+    """
+    .. Warning::
+        This function will be deprecated on 1 December 2025.  Please Migrate and move to the Load/DashBulkUploader class before then.
+
+    Reads a file and uploads it to Dash.
+
+    This function will:
+    - Read a CSV file
+    - Break it up into multiple CSVs, each with a maximum number of lines defined by `chunksize`
+    - Upload them to Dash
+
+    Parameters
+    ----------
+    file : Union[str, io.FileIO]
+        Either a path to the file to be uploaded, or a FileIO stream representing the file to be uploaded.
+        Should be an unencrypted, uncompressed CSV file.
+    dash_table : str
+        Name of the Dash table to upload the file to.
+    dash_orgname : str
+        Orgname of your Dash instance.
+    file_key : str, optional
+        A unique key for the file being uploaded. If not provided, a key will be generated.
+    dash_api_key : str, optional
+        Valid API key for Dash API. Required for v1 data model uploads.
+    check_sum : Optional[Dict[str, Union[int, float, str]]], optional
+        Checksum data for the files to be committed. The checksum should be a dictionary
+        with Presto/Trino expressions as keys and their expected results as values.
+    encoding : str, default 'utf-8'
+        The encoding of the source file.
+    chunksize : int, default 30000
+        The maximum number of lines to be included in each file. Note that this should be low enough
+        that the zipped file is less than Dash's maximum gzipped file size.
+    modify_lambda : Callable, optional
+        A callable that receives the pandas DataFrame read from the CSV. Provides the opportunity to modify
+        the DataFrame, such as adding a timestamp column.
+    path_to_output_for_dryrun : str, optional
+        If specified, no upload will be made to Dash, but files will be saved to the location specified.
+        This is useful for testing. Multiple files will be created (1 per chunk)
+    service_client_id : str, optional
+        If specified, specifies the service client for the upload. See the Dash documentation for an explanation
+        of the service client.
+        https://docs.comotion.us/Comotion%20Dash/Analysts/How%20To/Prepare%20Your%20Data%20Model/Y%20Service%20Client%20and%20Row%20Level%20Security.html#service-client-and-row-level-security
+    partitions : Optional[List[str]], optional
+        List of partitions for the load.
+    load_type : str, default 'APPEND_ONLY'
+        The type of load operation. Default is 'APPEND_ONLY'.
+    data_model_version : str, optional
+        The data model version to use for the upload. If not specified, the function will determine the version.
+        If the migration status for the org is 'Completed', v2 is the model version.  Otherwise, v1 is the model version.
+        data_model_version only needs be specified in exceptional circumstances where there are issues determining the migration status.
+    entity_type : str, default Auth.USER
+        The entity type for authentication.  Use Auth.USER if uploading as a user.  Use Auth.APPLICATION if uploading with application credentials.
+    application_client_id : str, optional
+        The application client ID for authentication.
+    application_client_secret : str, optional
+        The application client secret for authentication.
+
+    Returns
+    -------
+    Union[List[Any], DashBulkUploader]
+        For v1 data model uploads, returns a list of HTTP responses.
+        For v2 data model uploads, returns the DashBulkUploader instance.
+
+    Raises
+    ------
+    ValueError
+        If the API key is not specified for v1 lake upload or if the file type cannot be determined.
+    """
+    auth_token = Auth(orgname=dash_orgname,
+                      entity_type=entity_type,
+                      application_client_id=application_client_id,
+                      application_client_secret=application_client_secret)
+    
+    config = DashConfig(auth = auth_token)
+
+    uploader = DashBulkUploader(config = config)
+    if not data_model_version or data_model_version not in ['v1', 'v2']:
+        print("Determining Data Model Version")
+        try:
+            # Get migration status
+            migration = Migration(config)
+            migration_status = migration.status().full_migration_status
+            print('Migration Status: ' + migration_status)
+            if migration_status in ['Completed', 'Complete']:
+                data_model_version = 'v2'
+            else:
+                data_model_version = 'v1'
+        except Exception as e: 
+            print(f'Error determining data model version: {e}')
+            data_model_version = 'v1'
+
+    print(f"Uploading to data model {data_model_version}")
+
+    if data_model_version == 'v1':
+        if dash_api_key is None:
+            raise ValueError("API Key needs to be specified for v1 lake upload.")
+
+        responses = v1_upload_csv(
+            file=file,
+            dash_table=dash_table,
+            dash_orgname=dash_orgname,
+            dash_api_key=dash_api_key,
+            encoding=encoding,
+            chunksize=chunksize,
+            modify_lambda=modify_lambda,
+            path_to_output_for_dryrun=path_to_output_for_dryrun,
+            service_client_id=service_client_id
+        )
+        return responses
+    
+    elif data_model_version == 'v2':
+        track_rows_uploaded = not check_sum
+            
+        uploader.add_load(
+            table_name=dash_table,
+            check_sum=check_sum, 
+            modify_lambda=modify_lambda,
+            load_type=load_type,
+            load_as_service_client_id=service_client_id,
+            partitions=partitions,
+            track_rows_uploaded=track_rows_uploaded,
+            path_to_output_for_dryrun=path_to_output_for_dryrun,
+            chunksize=chunksize
+        )
+        
+        uploader.add_data_to_load(
+            table_name=dash_table,
+            data=file,
+            file_key=file_key
+        )
+
+        uploader.execute_upload(table_name=dash_table)
+
+        return uploader
+
+
+class Migration():
+    """
+    The Migration object starts and tracks a migration from lake v1 to lake v2. It can only be run once, after which the old lake will be disabled.
+
+
+    """
+
+    RUNNING_STATES = ['Started', 'Cleaning Up']
+    NOT_STARTED_STATES = ['Not Run']
+
+    def __init__(
+            self,
+            config: DashConfig
+    ):
+        
+        if not(isinstance(config, DashConfig)):
+            raise TypeError("config must be of type comotion.dash.DashConfig")
+
+        self.config = config
+        self.migration_type = None
+        # set by start() until the status shows the migration has left its not started state,
+        # or the state its last run ended in, which is reported until the new run begins
+        self._awaiting_start = False
+        self._status_before_start = None
+        self.migration_api_instance = MigrationsApi(config.get_api_client())
+
+
+    def start(
+            self,
+            migration_type: str = "FLASH_SCHEMA",
+            clear_out_new_lake: bool = False
+    ):
+        """
+        Starts a migration.
+
+        Migrations can take a number of hours to complete. So get a cup of coffee.
+
+        Initialising this class starts the migration on Comotion Dash.  If a migration is already in progress, initialisation will monitor the active load.
+
+        There are two types of migraiton, set by `migration_type`:
+        - `FULL_MIGRATION`:  runs a full migration by copying all the data across, updating the insights tables and deactivating data loads to the old lake.
+        - `FLASH_SCHEMA`: copies the schema and one line of data per table to the new lake.  this is useful to dev and test ETL scripts
+
+        There is an option to clear out the new lake on migration, set by the boolean parameters `clear_out_new_lake`. This is useful when testing has taken place, and data needs to be cleared.
+        If `clear_out_new_lake` is set to False, the migration will fail if there is data in the new lake.
+
+        Parameters
+        ----------
+        config : DashConfig
+            Object of type DashConfig including configuration details
+        migration_type : str
+            whether to run a full migration ("FULL_MIGRATION") or only copy the schema of the lake across to the new lake ("FLASH_SCHEMA")
+        clear_out_new_lake : bool
+            whether to clear out the new lake on migration.
+
+        Returns
+        -------
+
+        """
+        
+        if migration_type not in ['FLASH_SCHEMA','FULL_MIGRATION']:
+            raise ValueError('`migration_type` must be one of FLASH_SCHEMA or FULL_MIGRATION')
+
+        self.migration_type = migration_type
+        migration_data = {
+            'migration_type': migration_type,
+            'clear_out_new_lake': 'CLEAR_OUT' if clear_out_new_lake else 'DO_NOT_CLEAR_OUT'
+        }
+        
+            # Create an instance of the API class with provided parameters
+        migration = comodash_api_client_lowlevel.Migration(**migration_data)
+        try:
+            self._status_before_start = self._migration_type_status(self.status())
+        except ValueError:
+            # without the previous status, only 'Not Run' is known to be reported before the start
+            self._status_before_start = None
+        try:
+            self.migration_api_instance.start_migration(migration)
+        except comodash_api_client_lowlevel.exceptions.BadRequestException as exp:
+            raise ValueError(json.loads(exp.body)['message'])
+        except comodash_api_client_lowlevel.exceptions.ApiException as e:
+            raise ValueError(json.loads(e.body)['message'])
+        self._awaiting_start = True
+    
+    def status(self):
+        try:
+            migration_status = self.migration_api_instance.get_migration()
+            return migration_status
+        except comodash_api_client_lowlevel.exceptions.BadRequestException as exp:
+            raise ValueError(json.loads(exp.body)['message'])
+        except comodash_api_client_lowlevel.exceptions.ApiException as e:
+            raise ValueError(json.loads(e.body)['message'])
+
+    def _migration_type_status(self, migration_status):
+        return {
+            'FLASH_SCHEMA': migration_status.flash_schema_status,
+            'FULL_MIGRATION': migration_status.full_migration_status
+        }[self.migration_type]
+
+    def is_complete(self, migration_status=None) -> bool:
+        """Indicates whether the migration is no longer running.
+
+        If the migration was started from this object, only the status of that
+        migration type is considered.  Until that status changes from 'Not Run', or
+        from the status before the start, such as 'Completed' when the migration is
+        run again, the migration counts as incomplete, as the old status is still
+        reported just after the start.
+        Otherwise both the FLASH_SCHEMA and FULL_MIGRATION processes must be finished.
+
+        Parameters
+        ----------
+        migration_status : MigrationStatus
+            (optional) Status to check. Retrieved from Comotion Dash if not provided.
+
+        Returns
+        -------
+        bool
+            Whether the migration is complete
+        """
+        if migration_status is None:
+            migration_status = self.status()
+        statuses = {
+            'FLASH_SCHEMA': migration_status.flash_schema_status,
+            'FULL_MIGRATION': migration_status.full_migration_status
+        }
+        if self.migration_type is not None:
+            statuses = {self.migration_type: statuses[self.migration_type]}
+            if self._awaiting_start:
+                status = statuses[self.migration_type]
+                if status in Migration.NOT_STARTED_STATES or status == self._status_before_start:
+                    return False
+                self._awaiting_start = False
+        return all(status not in Migration.RUNNING_STATES for status in statuses.values())
+
+    def wait_to_complete(
+        self,
+        polling_strategy: PollingStrategy = None,
+        timeout: float = None
+    ):
+        """Blocks until the migration is no longer running.
+
+        Migrations can take hours, so consider a `polling_strategy` with a long `max_interval`.
+
+        Parameters
+        ----------
+        polling_strategy : PollingStrategy
+            (optional) How often to check the migration status. Defaults to :class:`PollingStrategy` defaults.
+        timeout : float
+            (optional) Seconds to wait before raising :class:`PollingTimeoutException`.
+            Overrides the timeout of `polling_strategy`.  This includes the wait for a migration
+            started from this object to leave its status from before the start, see `Migration.is_complete`.
+
         Returns
         -------
-        List
-            List of http responses
+        MigrationStatus
+            Final status of the migration
         """
-        file_reader = pd.read_csv(
-            file,
-            chunksize=chunksize,
-            encoding=encoding,
-            dtype=str  # Set all columns to strings.  Dash will still infer the type, but this makes sure it doesnt mess with the contents of the csv before upload
+        return _get_polling_strategy(polling_strategy, timeout).wait(
+            self.status,
+            self.is_complete,
+            description="migration"
         )
 
-        i = 1
-        responses = []
-        for file_df in file_reader:
 
-            if modify_lambda is not None:
-                modify_lambda(file_df)
+class StatusMonitor():
+    """
+    Waits on any number of :class:`Query`, :class:`Load` and :class:`Migration` objects from a single
+    scheduler thread.
 
+    Each watched object gets a ``concurrent.futures.Future`` which resolves to its final status, i.e.
+    the result of `Query.get_query_info`, `Load.get_load_info` or `Migration.status`, once it reaches a
+    terminal state.  Errors while getting the status, and timeouts, are set as the exception of the future.
 
-            csv_stream = create_gzipped_csv_stream_from_df(file_df)
+    Every object is polled on its own schedule from `polling_strategy`, but status calls are made one at a
+    time and at most `max_calls_per_second` are made in total.  As more objects are watched, each is
+    polled less often, so the load on the API stays bounded.  Calls use the shared connection pool of the
+    objects' `DashConfig`.
 
-            if path_to_output_for_dryrun is None:
+    The scheduler thread is started when an object is watched and exits once nothing is left to watch.
 
-                response = upload_csv_to_dash(
-                    dash_orgname=dash_orgname,
-                    dash_api_key=dash_api_key,
-                    dash_table=dash_table,
-                    csv_gz_stream=csv_stream,
-                    service_client_id=service_client_id
-                )
+    .. code-block:: python
 
-                responses.append(response.text)
+        monitor = StatusMonitor()
+        futures = [monitor.watch(Query(config, query_text=sql)) for sql in queries]
+        for future in concurrent.futures.as_completed(futures):
+            print(future.result().status.state)
 
-            else:
-                with open(
-                    join(
-                        path_to_output_for_dryrun,
-                        dash_table + "." + str(i) + ".csv.gz"
-                    ),
-                    "wb"
-                ) as f:
-                    f.write(csv_stream.getvalue())
+    Parameters
+    ----------
+    polling_strategy : PollingStrategy, optional
+        Schedule on which each object is polled. Defaults to :class:`PollingStrategy` defaults.
+    max_calls_per_second : float, optional
+        Maximum number of status calls made per second across all watched objects. Defaults to 10.
+    """
 
-            i = i + 1
+    def __init__(
+        self,
+        polling_strategy: PollingStrategy = None,
+        max_calls_per_second: float = 10
+    ):
+        if max_calls_per_second <= 0:
+            raise ValueError("max_calls_per_second must be greater than zero")
+        self.polling_strategy = _get_polling_strategy(polling_strategy, None)
+        self.max_calls_per_second = max_calls_per_second
+        self._condition = threading.Condition()
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._thread = None
+        self._last_call = None
+
+    @staticmethod
+    def _get_status_check(item):
+        if isinstance(item, Query):
+            return item.get_query_info, _query_is_complete, f"query {item.query_id}"
+        if isinstance(item, Load):
+            return item.get_load_info, _load_is_complete, f"load {item.load_id}"
+        if isinstance(item, Migration):
+            return item.status, item.is_complete, "migration"
+        raise TypeError("Only comotion.dash.Query, comotion.dash.Load and comotion.dash.Migration objects can be monitored")
+
+    def watch(
+        self,
+        item: Union[Query, Load, Migration],
+        callback: Callable[[Future], Any] = None,
+        timeout: float = None
+    ) -> Future:
+        """Starts watching a query, load or migration.
 
-        return responses
+        Parameters
+        ----------
+        item : Query, Load or Migration
+            Object to watch
+        callback : callable, optional
+            Called with the future when it is done. See ``concurrent.futures.Future.add_done_callback``.
+        timeout : float, optional
+            Seconds after which the future fails with :class:`PollingTimeoutException`.
+            Overrides the timeout of the polling strategy.
 
-def upload_csv_to_dash(
-    dash_orgname: str, # noqa
-    dash_api_key: str,
-    dash_table: str,
-    csv_gz_stream: io.FileIO,
-    service_client_id: str = '0'
-) -> requests.Response:
-    """Uploads csv gzipped stream to Dash
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the final status of `item`.  Cancelling the future stops watching `item`.
+        """
+        get_status, is_complete, description = self._get_status_check(item)
+        return self.watch_status(get_status, is_complete, description, callback=callback, timeout=timeout)
 
-    Expects a csv gzipped stream to upload to dash.
+    def watch_status(
+        self,
+        get_status: Callable[[], Any],
+        is_complete: Callable[[Any], bool],
+        description: str = 'job',
+        callback: Callable[[Future], Any] = None,
+        timeout: float = None
+    ) -> Future:
+        """Starts watching any status, given a function to get it and a function to check whether it is final.
+        See :meth:`StatusMonitor.watch` and :meth:`PollingStrategy.wait`.
 
-    Args:
-        dash_orgname (str): Dash organisation name for dash instance
-        dash_api_key (str): Valid API key for the organisation instance
-        dash_table (str): Table name to upload to
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the first status for which `is_complete` is true
+        """
+        strategy = _get_polling_strategy(self.polling_strategy, timeout)
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        entry = {
+            'future': future,
+            'get_status': get_status,
+            'is_complete': is_complete,
+            'description': description,
+            'intervals': strategy.intervals(),
+            'deadline': strategy._get_deadline(),
+            'strategy': strategy
+        }
+        with self._condition:
+            heapq.heappush(self._schedule, (time.monotonic(), next(self._sequence), entry))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='comotion-status-monitor', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
 
-        csv_gz_stream (io.FileIO): Description
+    def watch_all(self, items, timeout: float = None) -> List[Future]:
+        """Watches each of `items`. See :meth:`StatusMonitor.watch`.
 
-    Returns:
-        requests.Response: response from dash api
+        Returns
+        -------
+        list[concurrent.futures.Future]
+            One future per item, in the same order
+        """
+        return [self.watch(item, timeout=timeout) for item in items]
+
+    def pending(self) -> int:
+        """Returns the number of objects still being watched."""
+        with self._condition:
+            return len(self._schedule)
+
+    def _next_due(self):
+        """Waits until the next poll is due and returns its entry, or None when there is nothing left to watch."""
+        with self._condition:
+            while True:
+                if not self._schedule:
+                    self._thread = None
+                    return None
+                due, _, entry = self._schedule[0]
+                if self._last_call is not None:
+                    due = max(due, self._last_call + 1 / self.max_calls_per_second)
+                wait = due - time.monotonic()
+                if wait <= 0:
+                    heapq.heappop(self._schedule)
+                    return entry
+                self._condition.wait(wait)
+
+    def _run(self):
+        while True:
+            entry = self._next_due()
+            if entry is None:
+                return
+            future = entry['future']
+            if future.cancelled():
+                continue
+            self._last_call = time.monotonic()
+            try:
+                status = entry['get_status']()
+                if entry['is_complete'](status):
+                    future.set_result(status)
+                    continue
+                wait = entry['strategy']._get_wait(next(entry['intervals']), entry['deadline'], status, entry['description'])
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+                continue
+            with self._condition:
+                heapq.heappush(self._schedule, (time.monotonic() + wait, next(self._sequence), entry))
 
-    Raises:
-        HTTPError: If one is raised by the call
-    """
 
-    url = "https://api.comodash.io/v1/data-input-file"
+class _AsyncRESTResponse(io.IOBase):
+    """Adapts a read ``aiohttp.ClientResponse`` to the interface the low level ``ApiClient`` deserialises."""
 
-    headers = {
-        'Content-Type': 'application/gzip',
-        'service_client_id': service_client_id,
-        'x-api-key': dash_api_key,
-        'org-name': dash_orgname,
-        'table-name': dash_table
-    }
+    def __init__(self, resp, data) -> None:
+        self.response = resp
+        self.status = resp.status
+        self.reason = resp.reason
+        self.data = data
 
-    dash_response = requests.request(
-        "POST",
-        url,
-        headers=headers,
-        data=csv_gz_stream.getbuffer()
-    )
+    def read(self):
+        return self.data
 
-    dash_response.raise_for_status()
+    def getheaders(self):
+        """Returns a dictionary of the response headers."""
+        return self.response.headers
 
-    return dash_response
+    def getheader(self, name, default=None):
+        """Returns a given response header."""
+        return self.response.headers.get(name, default)
 
 
-def create_gzipped_csv_stream_from_df(df: pd.DataFrame) -> io.BytesIO:
-    """Returns a gzipped, utf-8 csv file bytestream from a pandas dataframe
+class AsyncDashClient():
+    """
+    Asyncio transport for the Comotion Dash API, used by :class:`AsyncQuery` and :class:`AsyncLoad`.
 
-    Useful to help upload dataframes to dash
+    Requests are built and responses parsed by the low level client, so the same models and
+    exceptions are returned as by the synchronous API, but requests are sent with ``aiohttp``.
+    All objects created with a client share its connection pool, so a single event loop can
+    drive thousands of queries and loads at once.
 
-    It does not break file up, so be sure to apply a maximise chunksize
-    to the dataframe before applying - otherwise dash max file limits will
-    cause an error
+    The client must be used from a running event loop, and should be closed when done, preferably
+    with ``async with``:
+
+    .. code-block:: python
+
+        async with AsyncDashClient(config) as client:
+            query = AsyncQuery(client, query_text='select * from my_table')
+            await query.run()
+            await query.wait_to_complete()
 
     Parameters
     ----------
-    df : pd.DataFrame
-        Dateframe to be turned into bytestream
+    config : DashConfig
+        Object of type DashConfig including configuration details. Access tokens are obtained and refreshed through it.
+    limit : int, optional
+        Maximum number of simultaneous connections. Defaults to 100.
+    timeout : aiohttp.ClientTimeout, optional
+        Timeout for requests. Defaults to a 10 second connect timeout and a 60 second read timeout.
+    """
 
-    Returns
-    -------
-    io.BytesIO
-        The Bytestream
+    def __init__(
+        self,
+        config: DashConfig,
+        limit: int = 100,
+        timeout=None
+    ):
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for the asyncio API. Install it with `pip install aiohttp`")
+        if not(isinstance(config, DashConfig)):
+            raise TypeError("config must be of type comotion.dash.DashConfig")
 
-    """
+        self.config = config
+        self.limit = limit
+        self.timeout = timeout if timeout is not None else aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            if not self.config.verify_ssl:
+                ssl_context = False
+            elif self.config.ssl_ca_cert:
+                ssl_context = ssl.create_default_context(cafile=self.config.ssl_ca_cert)
+            else:
+                ssl_context = None
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit, ssl=ssl_context),
+                timeout=self.timeout
+            )
+        return self._session
 
-    csv_stream = io.BytesIO()
-    df.to_csv(
-        csv_stream,
-        compression="gzip",
-        encoding="utf-8",
-        index=False,
-        quoting=csv.QUOTE_NONNUMERIC
-    )
+    async def close(self):
+        """Closes the connection pool of the client."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
 
-    return csv_stream
+    async def _check_and_refresh_token(self):
+        # token requests are blocking, so they run in a worker thread rather than on the event loop.
+        # DashConfig makes the refresh single-flight, so concurrent tasks share one token request.
+        if self.config._token_needs_refresh():
+            await asyncio.get_running_loop().run_in_executor(None, self.config._check_and_refresh_token)
 
-def read_and_upload_file_to_dash(
-    file: Union[str, io.FileIO],
-    dash_table: str,
-    dash_orgname: str,
-    file_key: str = None,
-    dash_api_key: str = None,
-    check_sum: Optional[Dict[str, Union[int, float, str]]] = None,
-    encoding: str = 'utf-8',
-    chunksize: int = 30000,
-    modify_lambda: Callable = None,
-    path_to_output_for_dryrun: str = None,
-    service_client_id: str = '0',
-    partitions: Optional[List[str]] = None,
-    load_type: str = 'APPEND_ONLY',
-    data_model_version: str = None,
-    entity_type: str = Auth.USER,
-    application_client_id: str = None,
-    application_client_secret: str = None
-) -> Union[List[Any], DashBulkUploader]:
+    async def send(self, request_serialized) -> "aiohttp.ClientResponse":
+        """Sends a request built by one of the ``_*_serialize`` methods of the low level API classes.
+
+        The response is returned unread; it must be released by the caller.
+
+        Parameters
+        ----------
+        request_serialized : tuple
+            Tuple of method, url, headers, body and post parameters
+
+        Returns
+        -------
+        aiohttp.ClientResponse
+        """
+        method, url, header_params, body, post_params = request_serialized
+        if post_params:
+            raise ValueError("Form parameters are not supported by the asyncio client")
+        data = None
+        if body is not None:
+            data = body if isinstance(body, (str, bytes)) else json.dumps(body)
+        return await self._get_session().request(method, url, headers=header_params, data=data)
+
+    async def call_api(self, api, operation: str, response_types_map: Dict[str, Optional[str]], **params):
+        """Calls an operation of a low level API class and returns the deserialised response.
+
+        Parameters
+        ----------
+        api : QueriesApi or LoadsApi
+            Low level API instance whose request serialiser is used
+        operation : str
+            Name of the operation, e.g. ``get_query``
+        response_types_map : dict
+            Map of response status to model name, as in the low level API
+        **params
+            Parameters of the operation
+
+        Returns
+        -------
+        Any
+            The deserialised response
+
+        Raises
+        ------
+        comodash_api_client_lowlevel.exceptions.ApiException
+            If the response status is not successful
+        """
+        await self._check_and_refresh_token()
+        serialize = getattr(api, f"_{operation}_serialize")
+        request_serialized = serialize(
+            _request_auth=None,
+            _content_type=None,
+            _headers=None,
+            _host_index=0,
+            **params
+        )
+        async with await self.send(request_serialized) as response:
+            data = await response.read()
+        return api.api_client.response_deserialize(
+            response_data=_AsyncRESTResponse(response, data),
+            response_types_map=response_types_map
+        ).data
+
+    async def open_stream(self, api, operation: str, **params) -> "aiohttp.ClientResponse":
+        """Like :meth:`AsyncDashClient.call_api`, but returns the unread response for streaming.
+        The response must be released by the caller.
+
+        Raises
+        ------
+        comodash_api_client_lowlevel.exceptions.ApiException
+            If the response status is not successful
+        """
+        await self._check_and_refresh_token()
+        serialize = getattr(api, f"_{operation}_serialize")
+        request_serialized = serialize(
+            _request_auth=None,
+            _content_type=None,
+            _headers=None,
+            _host_index=0,
+            **params
+        )
+        response = await self.send(request_serialized)
+        if not 200 <= response.status <= 299:
+            data = await response.read()
+            response.release()
+            response_data = _AsyncRESTResponse(response, data)
+            raise ApiException.from_response(
+                http_resp=response_data,
+                body=data.decode('utf-8', errors='replace'),
+                data=None
+            )
+        return response
+
+
+class AsyncQuery():
     """
-    .. Warning::
-        This function will be deprecated on 1 December 2025.  Please Migrate and move to the Load/DashBulkUploader class before then.
+    Asyncio counterpart of :class:`Query`.
 
-    Reads a file and uploads it to Dash.
+    Unlike `Query`, initialising this class does not start the query; call :meth:`AsyncQuery.run`.
+    Waiting and streaming do not tie up a thread, so many queries can be run concurrently on one event loop:
 
-    This function will:
-    - Read a CSV file
-    - Break it up into multiple CSVs, each with a maximum number of lines defined by `chunksize`
-    - Upload them to Dash
+    .. code-block:: python
 
-    Parameters
-    ----------
-    file : Union[str, io.FileIO]
-        Either a path to the file to be uploaded, or a FileIO stream representing the file to be uploaded.
-        Should be an unencrypted, uncompressed CSV file.
-    dash_table : str
-        Name of the Dash table to upload the file to.
-    dash_orgname : str
-        Orgname of your Dash instance.
-    file_key : str, optional
-        A unique key for the file being uploaded. If not provided, a key will be generated.
-    dash_api_key : str, optional
-        Valid API key for Dash API. Required for v1 data model uploads.
-    check_sum : Optional[Dict[str, Union[int, float, str]]], optional
-        Checksum data for the files to be committed. The checksum should be a dictionary
-        with Presto/Trino expressions as keys and their expected results as values.
-    encoding : str, default 'utf-8'
-        The encoding of the source file.
-    chunksize : int, default 30000
-        The maximum number of lines to be included in each file. Note that this should be low enough
-        that the zipped file is less than Dash's maximum gzipped file size.
-    modify_lambda : Callable, optional
-        A callable that receives the pandas DataFrame read from the CSV. Provides the opportunity to modify
-        the DataFrame, such as adding a timestamp column.
-    path_to_output_for_dryrun : str, optional
-        If specified, no upload will be made to Dash, but files will be saved to the location specified.
-        This is useful for testing. Multiple files will be created (1 per chunk)
-    service_client_id : str, optional
-        If specified, specifies the service client for the upload. See the Dash documentation for an explanation
-        of the service client.
-        https://docs.comotion.us/Comotion%20Dash/Analysts/How%20To/Prepare%20Your%20Data%20Model/Y%20Service%20Client%20and%20Row%20Level%20Security.html#service-client-and-row-level-security
-    partitions : Optional[List[str]], optional
-        List of partitions for the load.
-    load_type : str, default 'APPEND_ONLY'
-        The type of load operation. Default is 'APPEND_ONLY'.
-    data_model_version : str, optional
-        The data model version to use for the upload. If not specified, the function will determine the version.
-        If the migration status for the org is 'Completed', v2 is the model version.  Otherwise, v1 is the model version.
-        data_model_version only needs be specified in exceptional circumstances where there are issues determining the migration status.
-    entity_type : str, default Auth.USER
-        The entity type for authentication.  Use Auth.USER if uploading as a user.  Use Auth.APPLICATION if uploading with application credentials.
-    application_client_id : str, optional
-        The application client ID for authentication.
-    application_client_secret : str, optional
-        The application client secret for authentication.
+        async def get_result(client, sql, path):
+            query = AsyncQuery(client, query_text=sql)
+            await query.run()
+            query_info = await query.wait_to_complete()
+            if query_info.status.state == AsyncQuery.SUCCEEDED_STATE:
+                await query.download_csv(path)
+
+        async with AsyncDashClient(config) as client:
+            await asyncio.gather(*[
+                get_result(client, sql, path)
+                for sql, path in queries
+            ])
+    """
+
+    COMPLETED_STATES = Query.COMPLETED_STATES
+    SUCCEEDED_STATE = Query.SUCCEEDED_STATE
+
+    def __init__(
+        self,
+        client: AsyncDashClient,
+        query_text: str = None,
+        query_id: str = None
+    ):
+        """
+        Parameters
+        ----------
+        client : AsyncDashClient
+            Client used to call the Dash API
+        query_text : str
+            sql of the query to run
+        query_id : str, optional
+            Query id of existing query.  If not provided, then the query is started on Dash by :meth:`AsyncQuery.run`
 
-    Returns
-    -------
-    Union[List[Any], DashBulkUploader]
-        For v1 data model uploads, returns a list of HTTP responses.
-        For v2 data model uploads, returns the DashBulkUploader instance.
+        Raises
+        ------
+        TypeError
+            If client is not of type AsyncDashClient
 
-    Raises
-    ------
-    ValueError
-        If the API key is not specified for v1 lake upload or if the file type cannot be determined.
-    """
-    auth_token = Auth(orgname=dash_orgname,
-                      entity_type=entity_type,
-                      application_client_id=application_client_id,
-                      application_client_secret=application_client_secret)
-    
-    config = DashConfig(auth = auth_token)
+        ValueError
+            if one of query_id or query_text is not provided
+        """
+        if not(isinstance(client, AsyncDashClient)):
+            raise TypeError("client must be of type comotion.dash.AsyncDashClient")
+        if not query_id and not query_text:
+            raise ValueError("One of query_id or query_text must be provided")
 
-    uploader = DashBulkUploader(config = config)
-    if not data_model_version or data_model_version not in ['v1', 'v2']:
-        print("Determining Data Model Version")
+        self.client = client
+        self.config = client.config
+        self.query_text = query_text
+        self.query_id = query_id
+        self.query_api_instance = QueriesApi(self.config.get_api_client())
+
+    def _require_query_id(self):
+        if not self.query_id:
+            raise ValueError("The query has not been started. Call AsyncQuery.run first.")
+
+    async def run(self) -> str:
+        """Starts the query on Comotion Dash, unless it was already started or a query_id was provided.
+
+        Returns
+        -------
+        str
+            The query id
+        """
+        if not self.query_id:
+            try:
+                query_id_model = await self.client.call_api(
+                    self.query_api_instance, 'run_query',
+                    {'202': "QueryId", '4XX': "Error", '5XX': "Error"},
+                    query_text=QueryText(query=self.query_text)
+                )
+            except comodash_api_client_lowlevel.exceptions.BadRequestException as exp:
+                raise ValueError(json.loads(exp.body)['message'])
+            self.query_id = query_id_model.query_id
+        return self.query_id
+
+    async def get_query_info(self) -> QueryInfo:
+        """Gets the state of the query. See :meth:`Query.get_query_info`.
+
+        Returns
+        -------
+        QueryInfo
+            Model containing all query info
+        """
+        self._require_query_id()
         try:
-            config = DashConfig(auth_token)
+            return await self.client.call_api(
+                self.query_api_instance, 'get_query',
+                {'200': "Query", '4XX': "Error", '5XX': "Error"},
+                query_id=self.query_id
+            )
+        except comodash_api_client_lowlevel.exceptions.NotFoundException:
+            raise ValueError("query_id cannot be found")
 
-            # Get migration status
-            migration = Migration(config)
-            migration_status = migration.status().full_migration_status
-            print('Migration Status: ' + migration_status)
-            if migration_status in ['Completed', 'Complete']:
-                data_model_version = 'v2'
-            else:
-                data_model_version = 'v1'
-        except Exception as e: 
-            print(f'Error determining data model version: {e}')
-            data_model_version = 'v1'
-    else:
-        config = DashConfig(auth_token)
+    async def state(self) -> str:
+        """Gets the state of the query.
 
-    print(f"Uploading to data model {data_model_version}")
+        Returns
+        -------
+        str
+            One of QUEUED,RUNNING,SUCCEEDED,FAILED,CANCELLED
+        """
+        return (await self.get_query_info()).status.state
 
-    if data_model_version == 'v1':
-        if dash_api_key is None:
-            raise ValueError("API Key needs to be specified for v1 lake upload.")
+    async def is_complete(self) -> bool:
+        """Indicates whether the query has either succeeded, failed or been cancelled."""
+        return (await self.state()) in AsyncQuery.COMPLETED_STATES
 
-        responses = v1_upload_csv(
-            file=file,
-            dash_table=dash_table,
-            dash_orgname=dash_orgname,
-            dash_api_key=dash_api_key,
-            encoding=encoding,
-            chunksize=chunksize,
-            modify_lambda=modify_lambda,
-            path_to_output_for_dryrun=path_to_output_for_dryrun,
-            service_client_id=service_client_id
-        )
-        return responses
-    
-    elif data_model_version == 'v2':
-        track_rows_uploaded = not check_sum
-            
-        uploader.add_load(
-            table_name=dash_table,
-            check_sum=check_sum, 
-            modify_lambda=modify_lambda,
-            load_type=load_type,
-            load_as_service_client_id=service_client_id,
-            partitions=partitions,
-            track_rows_uploaded=track_rows_uploaded,
-            path_to_output_for_dryrun=path_to_output_for_dryrun,
-            chunksize=chunksize
+    async def wait_to_complete(
+        self,
+        polling_strategy: PollingStrategy = None,
+        timeout: float = None
+    ) -> QueryInfo:
+        """Waits until the query is in a complete state, without blocking the event loop.
+
+        Parameters
+        ----------
+        polling_strategy : PollingStrategy
+            (optional) How often to check the query state. Defaults to :class:`PollingStrategy` defaults.
+        timeout : float
+            (optional) Seconds to wait before raising :class:`PollingTimeoutException`.
+            Overrides the timeout of `polling_strategy`.
+
+        Returns
+        -------
+        QueryInfo
+            Final query info, with state one of 'SUCCEEDED', 'CANCELLED', 'FAILED'
+        """
+        return await _get_polling_strategy(polling_strategy, timeout).wait_async(
+            self.get_query_info,
+            _query_is_complete,
+            description=f"query {self.query_id}"
         )
-        
-        uploader.add_data_to_load(
-            table_name=dash_table,
-            data=file,
-            file_key=file_key
+
+    async def stream(self, chunk_size: int = 1048576) -> AsyncIterator[bytes]:
+        """Streams the csv of the results in chunks of bytes, checking that the full file was received.
+
+        .. code-block:: python
+
+            async for chunk in query.stream():
+                # do something with chunk
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            Maximum size of each chunk. Defaults to 1MB
+
+        Raises
+        ------
+        IncompleteRead
+            If the connection closes before the whole file is received
+        """
+        self._require_query_id()
+        response = await self.client.open_stream(
+            self.query_api_instance, 'download_csv',
+            query_id=self.query_id
         )
+        async with response:
+            size = 0
+            async for chunk in response.content.iter_chunked(chunk_size):
+                size = size + len(chunk)
+                yield chunk
+            content_length = response.headers.get('Content-Length')
+            if content_length is not None and size != int(content_length):
+                raise IncompleteRead(size, int(content_length) - size)
+
+    async def download_csv(self, output_file_path, fail_if_exists=False):
+        """Download csv of results and check that the total file size is correct
 
-        uploader.execute_upload(table_name=dash_table)
+        Parameters
+        ----------
+        output_file_path : File path
+            Path of the file to output to
+        fail_if_exists : bool, optional
+            If true, then will fail if the target file name already/
+            Defaults to false.
 
-        return uploader
+        Raises
+        ------
+        IncompleteRead
+            If only part of the file is downloaded, this is raised
+        """
+        write_mode = "xb" if fail_if_exists else "wb"
+        with io.open(output_file_path, write_mode) as f:
+            async for chunk in self.stream():
+                f.write(chunk)
 
+    async def stop(self):
+        """ Stop the query"""
+        self._require_query_id()
+        return await self.client.call_api(
+            self.query_api_instance, 'stop_query',
+            {'200': None, '4XX': "Error", '5XX': "Error"},
+            query_id=self.query_id
+        )
 
-class Migration():
+
+class AsyncLoad():
     """
-    The Migration object starts and tracks a migration from lake v1 to lake v2. It can only be run once, after which the old lake will be disabled.
+    Asyncio counterpart of :class:`Load`.
+
+    Unlike `Load`, initialising this class does not create the load on Dash; call :meth:`AsyncLoad.start`,
+    unless working with an existing `load_id`.
 
+    Calls to the Dash API do not block the event loop.  Converting data frames to parquet and
+    uploading them to S3 use synchronous libraries, so those steps run in the default executor of the loop.
+
+    .. code-block:: python
 
+        async with AsyncDashClient(config) as client:
+            load = AsyncLoad(client, table_name='v1_inforce_policies', track_rows_uploaded=True)
+            await load.start()
+            await asyncio.gather(*[load.upload_df(df) for df in data_frames])
+            await load.commit()
+            await load.wait_to_complete()
     """
 
     def __init__(
             self,
-            config: DashConfig
+            client: AsyncDashClient,
+            load_type: str = None,
+            table_name: str = None,
+            load_as_service_client_id: str = None,
+            partitions: Optional[List[str]] = None,
+            load_id: str = None,
+            track_rows_uploaded: bool = None,
+            path_to_output_for_dryrun: str = None,
+            modify_lambda: Callable = None,
+            parquet_writer_options: Union[ParquetWriterOptions, str] = None
     ):
-        
-        if not(isinstance(config, DashConfig)):
-            raise TypeError("config must be of type comotion.dash.DashConfig")
+        """
+        Parameters
+        ----------
+        client : AsyncDashClient
+            Client used to call the Dash API
+        load_type, table_name, load_as_service_client_id, partitions, load_id, track_rows_uploaded, path_to_output_for_dryrun, modify_lambda, parquet_writer_options
+            See :class:`Load`
+        """
+        load_data = locals()
+        if not(isinstance(client, AsyncDashClient)):
+            raise TypeError("client must be of type comotion.dash.AsyncDashClient")
 
-        with comodash_api_client_lowlevel.ApiClient(config) as api_client:
-            # Create an instance of the API class with provided parameters
-            self.migration_api_instance = MigrationsApi(api_client)
+        self.client = client
+        self.config = client.config
+        self.load_api_instance = LoadsApi(self.config.get_api_client())
+        self.load_id = load_id
 
+        if load_id is not None:
+            for key, value in load_data.items():
+                if key not in ['load_id', 'client', 'self', 'parquet_writer_options']:
+                    if value is not None:
+                        raise TypeError("if load_id is supplied, then only the client parameter and no others should be supplied.")
 
-    def start(
-            self,
-            migration_type: str = "FLASH_SCHEMA",
-            clear_out_new_lake: bool = False
-    ):
-        """
-        Starts a migration.
+        lowerlevel_load_keys = signature(comodash_api_client_lowlevel.Load).parameters.keys()
+        self._load_kwargs = {
+            key: value
+            for key, value in load_data.items()
+            if key in lowerlevel_load_keys
+        }
 
-        Migrations can take a number of hours to complete. So get a cup of coffee.
+        self.track_rows_uploaded = bool(track_rows_uploaded)
+        self.rows_uploaded = 0
+        self.path_to_output_for_dryrun = path_to_output_for_dryrun
+        self.modify_lambda = modify_lambda
+        self.parquet_writer_options = ParquetWriterOptions.from_value(parquet_writer_options)
 
-        Initialising this class starts the migration on Comotion Dash.  If a migration is already in progress, initialisation will monitor the active load.
+    create_file_key = Load.create_file_key
 
-        There are two types of migraiton, set by `migration_type`:
-        - `FULL_MIGRATION`:  runs a full migration by copying all the data across, updating the insights tables and deactivating data loads to the old lake.
-        - `FLASH_SCHEMA`: copies the schema and one line of data per table to the new lake.  this is useful to dev and test ETL scripts
+    def _require_load_id(self):
+        if not self.load_id:
+            raise ValueError("The load has not been started. Call AsyncLoad.start first.")
 
-        There is an option to clear out the new lake on migration, set by the boolean parameters `clear_out_new_lake`. This is useful when testing has taken place, and data needs to be cleared.
-        If `clear_out_new_lake` is set to False, the migration will fail if there is data in the new lake.
+    async def start(self) -> str:
+        """Creates the load on Comotion Dash, unless it was already created or a load_id was provided.
+
+        Returns
+        -------
+        str
+            The load id
+        """
+        if not self.load_id:
+            load_id_model = await self.client.call_api(
+                self.load_api_instance, 'create_load',
+                {'202': "LoadId", '4XX': "Error", '5XX': "Error"},
+                load=comodash_api_client_lowlevel.Load(**self._load_kwargs)
+            )
+            self.load_id = load_id_model.load_id
+        return self.load_id
+
+    async def get_load_info(self) -> LoadInfo:
+        """Gets the state of the load. See :meth:`Load.get_load_info`."""
+        self._require_load_id()
+        return await self.client.call_api(
+            self.load_api_instance, 'get_load',
+            {'200': "LoadMetaData", '4XX': "Error", '5XX': "Error"},
+            load_id=self.load_id
+        )
+
+    async def generate_presigned_url_for_file_upload(self, file_key: str = None) -> FileUploadResponse:
+        """Generates STS credentials for a new file upload. See :meth:`Load.generate_presigned_url_for_file_upload`."""
+        self._require_load_id()
+        file_upload_request = FileUploadRequest(file_key=file_key) if file_key else FileUploadRequest()
+        return await self.client.call_api(
+            self.load_api_instance, 'generate_presigned_url_for_file_upload',
+            {'200': "FileUploadResponse", '4XX': "Error", '5XX': "Error"},
+            load_id=self.load_id,
+            file_upload_request=file_upload_request
+        )
+
+    async def upload_df(self, data: pd.DataFrame, file_key: str = None):
+        """
+        Uploads a `pandas.DataFrame` as a parquet file to the load. See :meth:`Load.upload_df`.
 
         Parameters
         ----------
-        config : DashConfig
-            Object of type DashConfig including configuration details
-        migration_type : str
-            whether to run a full migration ("FULL_MIGRATION") or only copy the schema of the lake across to the new lake ("FLASH_SCHEMA")
-        clear_out_new_lake : bool
-            whether to clear out the new lake on migration.
+        data : pandas.DataFrame
+            The DataFrame to be uploaded.
+        file_key : str, optional
+            Optional custom key for the file. If not provided, a random file key is created.
 
         Returns
         -------
+        Any
+            The response of the S3 upload, or 'DRYRUN_COMPLETE' for a dry run
+        """
+        if not isinstance(data, pd.DataFrame):
+            raise ValueError("data should be a valid pandas.DataFrame object")
+
+        if not file_key:
+            file_key = self.create_file_key()
+
+        loop = asyncio.get_running_loop()
+        parquet_buffer = await loop.run_in_executor(None, _dataframe_to_parquet_buffer, data, self.modify_lambda, self.parquet_writer_options)
+
+        file_upload_response = await self.generate_presigned_url_for_file_upload(file_key=file_key)
+        key = file_upload_response.path
+
+        if not self.path_to_output_for_dryrun:
+            upload_response = await loop.run_in_executor(None, _upload_parquet_buffer_to_s3, parquet_buffer, file_upload_response)
+        else:
+            local_path = join(self.path_to_output_for_dryrun, f"{basename(key)}.parquet")
+            with io.open(local_path, 'wb') as f:
+                f.write(parquet_buffer.getbuffer())
+            upload_response = 'DRYRUN_COMPLETE'
+
+        if self.track_rows_uploaded:
+            self.rows_uploaded += data.shape[0]
+        return upload_response
 
+    async def commit(self, check_sum: Optional[Dict[str, Union[int, float, str]]] = None):
         """
-        
-        if migration_type not in ['FLASH_SCHEMA','FULL_MIGRATION']:
-            raise ValueError('`migration_type` must be one of FLASH_SCHEMA or FULL_MIGRATION')
+        Kicks off the commit of the load. See :meth:`Load.commit`.
+        """
+        self._require_load_id()
+        if not check_sum:
+            check_sum = {}
+            if not self.track_rows_uploaded:
+                raise KeyError("check_sum must be provided for this load as track_rows_uploaded was specified as False.")
+
+        if self.track_rows_uploaded:
+            check_sum["count(*)"] = self.rows_uploaded
+
+        return await self.client.call_api(
+            self.load_api_instance, 'commit_load',
+            {'202': "CommitLoad202Response", '4XX': "Error", '5XX': "Error"},
+            load_id=self.load_id,
+            load_commit=comodash_api_client_lowlevel.LoadCommit(check_sum=check_sum)
+        )
+
+    async def wait_to_complete(
+        self,
+        polling_strategy: PollingStrategy = None,
+        timeout: float = None
+    ) -> str:
+        """Waits until the load is in a complete state, without blocking the event loop.
+
+        Parameters
+        ----------
+        polling_strategy : PollingStrategy
+            (optional) How often to check the load status. Defaults to :class:`PollingStrategy` defaults.
+        timeout : float
+            (optional) Seconds to wait before raising :class:`PollingTimeoutException`.
+            Overrides the timeout of `polling_strategy`.
+
+        Returns
+        -------
+        str
+            State of the load, after processing completed.
+        """
+        load_info = await _get_polling_strategy(polling_strategy, timeout).wait_async(
+            self.get_load_info,
+            _load_is_complete,
+            description=f"load {self.load_id}"
+        )
+        return load_info.load_status
 
-        migration_data = {
-            'migration_type': migration_type,
-            'clear_out_new_lake': 'CLEAR_OUT' if clear_out_new_lake else 'DO_NOT_CLEAR_OUT'
-        }
-        
-            # Create an instance of the API class with provided parameters
-        migration = comodash_api_client_lowlevel.Migration(**migration_data)
-        try:
-            self.migration_api_instance.start_migration(migration)
-        except comodash_api_client_lowlevel.exceptions.BadRequestException as exp:
-            raise ValueError(json.loads(exp.body)['message'])
-        except comodash_api_client_lowlevel.exceptions.ApiException as e:
-            raise ValueError(json.loads(e.body)['message'])
-    
-    def status(self):
-        try:
-            migration_status = self.migration_api_instance.get_migration()
-            return migration_status
-        except comodash_api_client_lowlevel.exceptions.BadRequestException as exp:
-            raise ValueError(json.loads(exp.body)['message'])
-        except comodash_api_client_lowlevel.exceptions.ApiException as e:
-            raise ValueError(json.loads(e.body)['message'])
-        
 
 def upload_from_oracle( 
     sql_host: str, 
@@ -6,9 +6,15 @@ from io import BytesIO
 import json
 import jwt
 import uuid
+import time
+import os
+import stat
+import tempfile
+import threading
 import requests
 
-from comotion.auth import OIDCredirectHandler, OIDCServer, PKCE, Auth, KeyringCredentialCache, UnAuthenticatedException
+from comotion.auth import OIDCredirectHandler, OIDCServer, PKCE, Auth, KeyringCredentialCache, FileCredentialCache, MemoizingCredentialCache, UnAuthenticatedException, AuthException, get_http_session
+import comotion.auth
 
 
 class TestOIDCredirectHandler(unittest.TestCase):
@@ -48,7 +54,7 @@ class TestOIDCredirectHandler(unittest.TestCase):
 
         self.assertEqual(self.handler.id_token, "test_id_token")
         self.assertEqual(self.handler.id_token_decoded['preferred_username'], "test_user")
-        self.handler.server.como_authenticator.credentials_cache.set_refresh_token.assert_called_with(
+        self.handler.server.como_authenticator.set_refresh_token.assert_called_with(
             "test_user", "test_refresh_token"
         )
 
@@ -67,7 +73,7 @@ class TestOIDCredirectHandler(unittest.TestCase):
         self.handler._process_code()
         
         mock_jwt_decode.assert_not_called()
-        self.handler.server.como_authenticator.credentials_cache.set_refresh_token.assert_not_called()
+        self.handler.server.como_authenticator.set_refresh_token.assert_not_called()
 
     def test_read_query_parameters(self):
         self.handler._read_query_parameters("code=test_code&state=test_state")
@@ -88,9 +94,88 @@ class TestOIDCredirectHandler(unittest.TestCase):
         self.handler.end_headers.assert_called_once()
         self.assertIn(b"Authentication complete for test_user", self.handler.wfile.getvalue())
 
+class TestFileCredentialCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.credentials_file = os.path.join(self.temp_dir.name, 'nested', 'credentials.json')
+        self.cache = FileCredentialCache("http://mock_issuer", "test_org", credentials_file=self.credentials_file)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_empty_cache(self):
+        self.assertIsNone(self.cache.get_current_user())
+        self.assertIsNone(self.cache.get_refresh_token())
+
+    def test_set_and_get_refresh_token(self):
+        self.cache.set_refresh_token("test_user", "test_refresh_token")
+        other_org_cache = FileCredentialCache("http://mock_issuer", "other_org", credentials_file=self.credentials_file)
+        other_org_cache.set_refresh_token("other_user", "other_refresh_token")
+
+        self.assertEqual(self.cache.get_current_user(), "test_user")
+        self.assertEqual(self.cache.get_refresh_token(), "test_refresh_token")
+        self.assertEqual(other_org_cache.get_refresh_token(), "other_refresh_token")
+        self.assertEqual(stat.S_IMODE(os.stat(self.credentials_file).st_mode), 0o600)
+
+    @patch.dict(os.environ, {'COMOTION_CREDENTIALS_FILE': '/tmp/comotion_credentials_from_env.json'})
+    def test_credentials_file_from_environment(self):
+        cache = FileCredentialCache("http://mock_issuer", "test_org")
+        self.assertEqual(cache.credentials_file, '/tmp/comotion_credentials_from_env.json')
+
+
+class TestMemoizingCredentialCache(unittest.TestCase):
+
+    def setUp(self):
+        MemoizingCredentialCache._memo.clear()
+        Auth.token_cache.clear()
+        self.backend = MagicMock()
+        self.backend.get_current_user.return_value = "test_user"
+        self.backend.get_refresh_token.return_value = "test_refresh_token"
+        self.backend_class = MagicMock(return_value=self.backend)
+        self.backend_class.__name__ = 'MockCredentialCache'
+
+    def test_backend_read_once(self):
+        cache_class = MemoizingCredentialCache.with_backend(self.backend_class)
+        for _ in range(3):
+            cache = cache_class("http://mock_issuer", "test_org")
+            self.assertEqual(cache.get_refresh_token(), "test_refresh_token")
+            self.assertEqual(cache.get_current_user(), "test_user")
+
+        self.backend.get_refresh_token.assert_called_once()
+        self.backend.get_current_user.assert_called_once()
+
+    def test_set_refresh_token_writes_through(self):
+        cache = MemoizingCredentialCache("http://mock_issuer", "test_org", backend_class=self.backend_class)
+        cache.set_refresh_token("new_user", "new_refresh_token")
+
+        self.backend.set_refresh_token.assert_called_once_with("new_user", "new_refresh_token")
+        self.assertEqual(cache.get_refresh_token(), "new_refresh_token")
+        self.backend.get_refresh_token.assert_not_called()
+
+    @patch('requests.Session.post')
+    def test_invalid_grant_invalidates_memo(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.status_code = 400
+        mock_response.text = json.dumps({'error': 'invalid_grant'})
+        mock_post.return_value = mock_response
+
+        auth = Auth(
+            orgname="test_org",
+            issuer="http://mock_issuer",
+            credentials_cache_class=MemoizingCredentialCache.with_backend(self.backend_class)
+        )
+        for _ in range(2):
+            with self.assertRaises(UnAuthenticatedException):
+                auth.get_access_token()
+
+        self.assertEqual(self.backend.get_refresh_token.call_count, 2)
+
+
 class TestAuth(unittest.TestCase):
 
     def setUp(self):
+        Auth.token_cache.clear()
         self.auth = Auth(
             orgname="test_org",
             issuer="http://mock_issuer",
@@ -101,7 +186,7 @@ class TestAuth(unittest.TestCase):
         self.auth.credentials_cache.get_refresh_token.return_value = "test_refresh_token"
         self.auth.application_client_secret = "test_client_secret"
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_access_token_user(self, mock_post):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -113,7 +198,7 @@ class TestAuth(unittest.TestCase):
         token = self.auth.get_access_token()
         self.assertEqual(token, 'test_access_token')
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_access_token_application(self, mock_post):
         self.auth.entity_type = Auth.APPLICATION
         mock_response = MagicMock()
@@ -126,7 +211,7 @@ class TestAuth(unittest.TestCase):
         token = self.auth.get_access_token()
         self.assertEqual(token, 'test_access_token')
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_access_token_invalid_grant(self, mock_post):
         mock_response = MagicMock()
         mock_response.status_code = 400
@@ -140,7 +225,7 @@ class TestAuth(unittest.TestCase):
 
         self.assertIn("Your credentials are not valid", str(context.exception))
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_access_token_other_error(self, mock_post):
         mock_response = MagicMock()
         mock_response.status_code = 400
@@ -155,7 +240,7 @@ class TestAuth(unittest.TestCase):
 
         self.assertIn("There was a problem with the request", str(context.exception))
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_access_token_json_decode_error(self, mock_post):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -167,7 +252,7 @@ class TestAuth(unittest.TestCase):
 
         self.assertIn("There was a strange response from the server", str(context.exception))
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_access_token_request_exception(self, mock_post):
         mock_post.side_effect = requests.RequestException("Request failed")
 
@@ -176,6 +261,137 @@ class TestAuth(unittest.TestCase):
 
         self.assertIn("Request failed", str(context.exception))
 
+    @patch('requests.Session.post')
+    def test_get_access_token_cached_until_expiry(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = json.dumps({
+            'access_token': 'test_access_token',
+            'expires_in': 300
+        })
+        mock_post.return_value = mock_response
+
+        self.assertEqual(self.auth.get_access_token(), 'test_access_token')
+        self.assertEqual(self.auth.get_access_token(), 'test_access_token')
+
+        # a new Auth object for the same org, client and credentials shares the cache
+        other_auth = Auth(orgname="test_org", issuer="http://mock_issuer")
+        other_auth.credentials_cache = self.auth.credentials_cache
+        self.assertEqual(other_auth.get_access_token(), 'test_access_token')
+
+        mock_post.assert_called_once()
+        self.assertEqual(
+            Auth.token_cache.get_stats(),
+            {'token_requests': 1, 'cache_hits': 2, 'cache_misses': 1}
+        )
+
+    @patch('requests.Session.post')
+    def test_get_access_token_cache_uses_jwt_expiry(self, mock_post):
+        near_expiry_token = jwt.encode({'exp': time.time() + 10}, 'a-really-secret-key-for-tests-only', algorithm='HS256')
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = json.dumps({'access_token': near_expiry_token})
+        mock_post.return_value = mock_response
+
+        self.auth.get_access_token()
+        self.auth.get_access_token()
+
+        # token is inside the expiry margin, so it is requested again
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch('requests.Session.post')
+    def test_get_access_token_force_refresh(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = json.dumps({
+            'access_token': 'test_access_token',
+            'expires_in': 300
+        })
+        mock_post.return_value = mock_response
+
+        self.auth.get_access_token()
+        self.auth.get_access_token(force_refresh=True)
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(Auth.token_cache.get_stats()['token_requests'], 2)
+
+    @patch('requests.Session.post')
+    def test_get_access_token_cache_keyed_by_client(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = json.dumps({
+            'access_token': 'test_access_token',
+            'expires_in': 300
+        })
+        mock_post.return_value = mock_response
+
+        self.auth.get_access_token()
+        application_auth = Auth(
+            orgname="test_org",
+            issuer="http://mock_issuer",
+            entity_type=Auth.APPLICATION,
+            application_client_id="my_client",
+            application_client_secret="my_secret"
+        )
+        application_auth.get_access_token()
+
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch('requests.Session.post')
+    def test_get_access_token_after_login_as_another_user(self, mock_post):
+        def token_response(url, data, timeout):
+            return MagicMock(status_code=200, text=json.dumps({
+                'access_token': 'access_token_for_' + data['refresh_token'],
+                'expires_in': 300
+            }))
+        mock_post.side_effect = token_response
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            credentials_file = os.path.join(temp_dir, 'credentials.json')
+            auth = Auth(orgname="test_org", issuer="http://mock_issuer")
+            auth.credentials_cache = FileCredentialCache("http://mock_issuer", "test_org", credentials_file=credentials_file)
+            auth.set_refresh_token("user_a", "refresh_token_a")
+            self.assertEqual(auth.get_access_token(), 'access_token_for_refresh_token_a')
+
+            auth.set_refresh_token("user_b", "refresh_token_b")
+            self.assertEqual(auth.get_access_token(), 'access_token_for_refresh_token_b')
+
+            # another Auth object logs in again, e.g. from the CLI
+            other_auth = Auth(orgname="test_org", issuer="http://mock_issuer")
+            other_auth.credentials_cache = FileCredentialCache("http://mock_issuer", "test_org", credentials_file=credentials_file)
+            other_auth.set_refresh_token("user_a", "refresh_token_a2")
+            self.assertEqual(auth.get_access_token(), 'access_token_for_refresh_token_a2')
+
+        self.assertEqual(mock_post.call_count, 3)
+
+    @patch('requests.Session.post')
+    def test_get_access_token_single_flight(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = json.dumps({
+            'access_token': 'test_access_token',
+            'expires_in': 300
+        })
+
+        def slow_post(*args, **kwargs):
+            time.sleep(0.2)
+            return mock_response
+
+        mock_post.side_effect = slow_post
+
+        tokens = []
+        threads = [
+            threading.Thread(target=lambda: tokens.append(self.auth.get_access_token()))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_post.assert_called_once()
+        self.assertEqual(tokens, ['test_access_token'] * 10)
+
     @patch('webbrowser.open')
     @patch('comotion.auth.OIDCServer')
     def test_authenticate(self, mock_oidc_server, mock_webbrowser_open):
@@ -210,5 +426,101 @@ class TestAuth(unittest.TestCase):
         )
         self.assertEqual(auth_url, expected_url)
 
+class _FlakyTokenEndpointHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the auth provider that fails the first request with a 503
+    """
+    requests_seen = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        _FlakyTokenEndpointHandler.requests_seen.append(self.path)
+        if len(_FlakyTokenEndpointHandler.requests_seen) == 1:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'access_token': 'test_access_token', 'expires_in': 300}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        _FlakyTokenEndpointHandler.requests_seen.append(self.path)
+        if len(_FlakyTokenEndpointHandler.requests_seen) == 1:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'issuer': 'test_issuer'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestAuthHttpSession(unittest.TestCase):
+
+    def setUp(self):
+        Auth.token_cache.clear()
+        _FlakyTokenEndpointHandler.requests_seen = []
+        self.server = HTTPServer(('127.0.0.1', 0), _FlakyTokenEndpointHandler)
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+        self.issuer = "http://127.0.0.1:%s" % (self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_session_is_shared(self):
+        self.assertIs(get_http_session(), get_http_session())
+        self.assertIs(Auth("test_org").http_session, Auth("other_org").http_session)
+
+    def test_get_access_token_does_not_replay_token_requests(self):
+        auth = Auth(
+            orgname="test_org",
+            issuer=self.issuer,
+            entity_type=Auth.APPLICATION,
+            application_client_id="my_client",
+            application_client_secret="my_secret"
+        )
+        auth.http_session = get_http_session(max_retries=2, backoff_factor=0)
+
+        with self.assertRaises(UnAuthenticatedException):
+            auth.get_access_token()
+        self.assertEqual(
+            _FlakyTokenEndpointHandler.requests_seen,
+            ['/auth/realms/test_org/protocol/openid-connect/token']
+        )
+
+        self.assertEqual(auth.get_access_token(), 'test_access_token')
+
+    def test_session_retries_get_server_errors(self):
+        response = get_http_session(max_retries=2, backoff_factor=0).get(
+            '%s/auth/realms/test_org/.well-known/openid-configuration' % (self.issuer)
+        )
+        self.assertEqual(response.json(), {'issuer': 'test_issuer'})
+        self.assertEqual(
+            _FlakyTokenEndpointHandler.requests_seen,
+            ['/auth/realms/test_org/.well-known/openid-configuration'] * 2
+        )
+
+    @patch('requests.Session.post')
+    def test_get_access_token_uses_timeout(self, mock_post):
+        mock_post.return_value = MagicMock(status_code=200, text=json.dumps({'access_token': 'test_access_token'}))
+        auth = Auth(orgname="test_org", issuer="http://mock_issuer", timeout=(1, 2))
+        auth.credentials_cache = MagicMock()
+        auth.credentials_cache.get_refresh_token.return_value = 'test_refresh_token'
+        auth.get_access_token()
+        self.assertEqual(mock_post.call_args.kwargs['timeout'], (1, 2))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from unittest import mock
-from unittest.mock import Mock, patch, MagicMock,create_autospec, mock_open
+from unittest.mock import Mock, patch, MagicMock,create_autospec, mock_open, AsyncMock
 from unittest.mock import call
 from comotion import dash
 from comotion.dash import DashConfig, Auth
@@ -10,6 +10,20 @@ from pandas import DataFrame
 import pandas as pd
 import boto3
 import os
+import threading
+import multiprocessing
+import time
+import asyncio
+import math
+import tempfile
+import pathlib
+import json
+import gzip
+import zlib
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join as join_path
+from http.server import HTTPServer, BaseHTTPRequestHandler
 
 import unittest
 from unittest.mock import MagicMock, patch
@@ -21,7 +35,10 @@ from comotion.dash import Query, DashConfig, DashBulkUploader, Load
 from comodash_api_client_lowlevel.models.load import Load as LoadInfo
 from comodash_api_client_lowlevel.models.file_upload_response import FileUploadResponse
 from urllib3.response import HTTPResponse
+from urllib3.exceptions import IncompleteRead
+from comodash_api_client_lowlevel.rest import ApiException
 import pyarrow.parquet
+import pyarrow.csv
 
 class TestDashModuleLoadClass(unittest.TestCase):
 
@@ -33,7 +50,7 @@ class TestDashModuleLoadClass(unittest.TestCase):
         mock_config = MagicMock(spec=DashConfig)
 
         # Mock the API client and LoadsApi
-        mock_api_client_instance = mock_api_client.return_value.__enter__.return_value
+        mock_api_client_instance = mock_config.get_api_client.return_value
         mock_loads_api_instance = mock_loads_api.return_value
         mock_load_id_model = mock_loads_api_instance.create_load.return_value
         mock_load_id_model.load_id ='123'
@@ -372,7 +389,7 @@ class TestDashModuleLoadClass(unittest.TestCase):
 
     @patch('comodash_api_client_lowlevel.ApiClient')
     @patch('comotion.dash.Load.generate_presigned_url_for_file_upload')
-    @patch('comotion.dash.Load.upload_df')
+    @patch('comotion.dash.Load._upload_serialized')
     @patch('pandas.read_excel')
     @patch('pandas.read_json')
     @patch('pandas.read_parquet')
@@ -408,7 +425,7 @@ class TestDashModuleLoadClass(unittest.TestCase):
         ]
 
         for mock_read, load_instance in mock_read_functions:
-            mock_read.return_value = mock_chunk
+            mock_read.return_value = [mock_chunk, mock_chunk]
             load_instance.upload_file(
             data='valid_file_path',
             dtype = expected_dtype
@@ -431,7 +448,7 @@ class TestDashModuleLoadClass(unittest.TestCase):
     @patch('comodash_api_client_lowlevel.ApiClient')
     @patch('comotion.dash.Query.wait_to_complete')
     @patch('comotion.dash.Query.get_csv_for_streaming')
-    @patch('comotion.dash.Load.upload_df')
+    @patch('comotion.dash.Load._upload_serialized')
     @patch('pandas.read_csv')
     def test_upload_dash_query_successful(
         self, mock_read_csv, mock_upload_df, mock_get_csv_for_streaming, mock_wait_to_complete, mock_api_client
@@ -460,7 +477,9 @@ class TestDashModuleLoadClass(unittest.TestCase):
 
         # Mock the DataFrame chunks
         mock_chunk = pd.DataFrame({'col1': [1, 2], 'col2': [3, 4]})
-        mock_read_csv.return_value = mock_chunk
+        mock_read_csv.return_value = [mock_chunk, mock_chunk]
+
+        mock_query.get_result_types.return_value = dash.ResultColumnTypes([('col1', 'bigint'), ('col2', 'timestamp')])
 
         # Call the upload_dash_query method
         responses = load.upload_dash_query(data=mock_query, file_key='test_file_key', max_workers=1)
@@ -468,6 +487,18 @@ class TestDashModuleLoadClass(unittest.TestCase):
         # Assertions
         self.assertEqual(mock_upload_df.call_count, 2) 
         self.assertEqual(len(responses), 2)
+        self.assertEqual(mock_read_csv.call_args.kwargs['dtype'], {'col1': 'Int64'})
+        self.assertEqual(mock_read_csv.call_args.kwargs['parse_dates'], ['col2'])
+        mock_query.get_csv_for_streaming.return_value.release_conn.assert_called_once()
+        mock_query.get_csv_for_streaming.return_value.close.assert_not_called()
+
+        # the connection is closed and released when the csv cannot be read
+        mock_query.get_csv_for_streaming.reset_mock()
+        mock_read_csv.side_effect = pd.errors.ParserError('bad csv')
+        with self.assertRaises(ValueError):
+            load.upload_dash_query(data=mock_query, file_key='test_file_key', max_workers=1)
+        mock_query.get_csv_for_streaming.return_value.close.assert_called_once()
+        mock_query.get_csv_for_streaming.return_value.release_conn.assert_called_once()
 
     @patch('comotion.dash.Load.upload_df')
     @patch('comodash_api_client_lowlevel.ApiClient')
@@ -501,7 +532,7 @@ class TestDashModuleLoadClass(unittest.TestCase):
 
     @patch('comotion.dash.Load.create_file_key')
     @patch('comodash_api_client_lowlevel.ApiClient')
-    @patch('comotion.dash.Load.upload_df')
+    @patch('comotion.dash.Load._upload_serialized')
     @patch('pandas.read_csv')
     def test_upload_file_with_file_key(self, mock_read_csv, mock_upload_df, mock_api_client, file_key_mock):
         # Mock the DashConfig object
@@ -519,7 +550,7 @@ class TestDashModuleLoadClass(unittest.TestCase):
 
         # Mock the file reading and chunking
         mock_chunk = pd.DataFrame({'col1': [1, 2], 'col2': [3, 4]})
-        mock_read_csv.return_value = mock_chunk
+        mock_read_csv.return_value = [mock_chunk, mock_chunk]
         expected_dtype = {col: dtype for col, dtype in mock_chunk.dtypes.items()}
 
         # Call the upload_file method with a file key
@@ -536,7 +567,7 @@ class TestDashModuleLoadClass(unittest.TestCase):
 
     @patch('comotion.dash.Load.create_file_key')
     @patch('comodash_api_client_lowlevel.ApiClient')
-    @patch('comotion.dash.Load.upload_df')
+    @patch('comotion.dash.Load._upload_serialized')
     @patch('pandas.read_csv')
     def test_upload_file_without_file_key(self, mock_read_csv, mock_upload_df, mock_api_client, file_key_mock):
         # Mock the DashConfig object
@@ -554,7 +585,7 @@ class TestDashModuleLoadClass(unittest.TestCase):
 
          # Mock the file reading and chunking
         mock_chunk = pd.DataFrame({'col1': [1, 2], 'col2': [3, 4]})
-        mock_read_csv.return_value = mock_chunk
+        mock_read_csv.return_value = [mock_chunk, mock_chunk]
         expected_dtype = {col: dtype for col, dtype in mock_chunk.dtypes.items()}
 
         # Call the upload_file method without a file key
@@ -571,7 +602,7 @@ class TestDashModuleLoadClass(unittest.TestCase):
     @patch('os.path.basename', return_value = 'valid_file_path.csv')
     @patch('comotion.dash.Load.create_file_key')
     @patch('comodash_api_client_lowlevel.ApiClient')
-    @patch('comotion.dash.Load.upload_df')
+    @patch('comotion.dash.Load._upload_serialized')
     @patch('pandas.read_csv')
     def test_upload_file_with_use_file_name_as_key(self, mock_read_csv, mock_upload_df, mock_api_client, file_key_mock, basename_mock):
         # Mock the DashConfig object
@@ -589,7 +620,7 @@ class TestDashModuleLoadClass(unittest.TestCase):
 
         # Mock the file reading and chunking
         mock_chunk = pd.DataFrame({'col1': [1, 2], 'col2': [3, 4]})
-        mock_read_csv.return_value = mock_chunk
+        mock_read_csv.return_value = [mock_chunk, mock_chunk]
         expected_dtype = {col: dtype for col, dtype in mock_chunk.dtypes.items()}
         
 
@@ -848,7 +879,7 @@ class TestDashModuleQueryClass(unittest.TestCase):
         # mock_config.auth.get_access_token.return_value = 'test_token'
 
         # Mock the API client and QueriesApi
-        mock_api_client_instance = mock_api_client.return_value.__enter__.return_value
+        mock_api_client_instance = mock_config.get_api_client.return_value
         mock_queries_api_instance = mock_queries_api.return_value
         mock_query_id_model = QueryId(query_id='123')
         mock_queries_api_instance.run_query.return_value = mock_query_id_model
@@ -928,6 +959,7 @@ class TestDashModuleQueryClass(unittest.TestCase):
             # Manually set necessary attributes
             mock_query.query_api_instance = mock_queries_api_instance
             mock_query.query_id = mock_query_id
+            mock_query._in_flight = None
 
             # Call the method
             result = mock_query.get_query_info()
@@ -1089,13 +1121,44 @@ class TestDashConfig(unittest.TestCase):
     def test_init_with_valid_auth(self):
         self.assertEqual(self.config.auth, self.mock_auth)
 
+    @patch('comotion.dash.comodash_api_client_lowlevel.ApiClient')
+    def test_get_api_client_is_shared(self, mock_api_client):
+        first_client = self.config.get_api_client()
+        second_client = self.config.get_api_client()
+
+        mock_api_client.assert_called_once_with(self.config)
+        self.assertIs(first_client, second_client)
+
+    @patch('comotion.dash.comodash_api_client_lowlevel.ApiClient')
+    @patch('comotion.dash.QueriesApi')
+    @patch('comotion.dash.LoadsApi')
+    def test_query_and_load_share_api_client(self, mock_loads_api, mock_queries_api, mock_api_client):
+        query = Query(config=self.config, query_id='123')
+        load = Load(config=self.config, load_id='456')
+        query.refresh_api_instance()
+        load.refresh_api_instance()
+
+        mock_api_client.assert_called_once_with(self.config)
+        self.assertIs(query.config, self.config)
+        self.assertIs(load.config, self.config)
+        for api_call in mock_queries_api.call_args_list + mock_loads_api.call_args_list:
+            self.assertEqual(api_call, call(mock_api_client.return_value))
+
+    @patch('comotion.dash.comodash_api_client_lowlevel.ApiClient')
+    def test_close_releases_api_client(self, mock_api_client):
+        self.config.get_api_client()
+        self.config.close()
+        mock_api_client.return_value.rest_client.pool_manager.clear.assert_called_once()
+        self.config.get_api_client()
+        self.assertEqual(mock_api_client.call_count, 2)
+
     @patch('jwt.decode')
     def test_check_and_refresh_token_no_token(self, mock_jwt_decode):
         self.config.access_token = None
         self.config._check_and_refresh_token()
         self.mock_auth.get_access_token.assert_called_once()
-        # Ensure jwt.decode is not called when there's no initial token
-        mock_jwt_decode.assert_not_called()
+        # Ensure jwt.decode is only called once, for the new token
+        mock_jwt_decode.assert_called_once_with('new_token', options={"verify_signature": False})
 
     @patch('jwt.decode')
     def test_check_and_refresh_token_valid_token(self, mock_jwt_decode):
@@ -1113,7 +1176,9 @@ class TestDashConfig(unittest.TestCase):
         self.config._check_and_refresh_token()
         self.mock_auth.get_access_token.assert_called_once()
         # Check jwt.decode was called with the correct token
-        mock_jwt_decode.assert_called_with('almost_expired_token', options={"verify_signature": False})
+        mock_jwt_decode.assert_any_call('almost_expired_token', options={"verify_signature": False})
+        # the expiry of the new token is decoded once when it is obtained
+        mock_jwt_decode.assert_called_with('new_token', options={"verify_signature": False})
 
     @patch('jwt.decode')
     def test_check_and_refresh_token_expired(self, mock_jwt_decode):
@@ -1122,7 +1187,9 @@ class TestDashConfig(unittest.TestCase):
         self.config._check_and_refresh_token()
         self.mock_auth.get_access_token.assert_called_once()
         # Check jwt.decode was called with the correct token
-        mock_jwt_decode.assert_called_with('expired_token', options={"verify_signature": False})
+        mock_jwt_decode.assert_any_call('expired_token', options={"verify_signature": False})
+        # the expiry of the new token is decoded once when it is obtained
+        mock_jwt_decode.assert_called_with('new_token', options={"verify_signature": False})
 
     @patch('jwt.decode')
     def test_check_and_refresh_token_decode_error(self, mock_jwt_decode):
@@ -1131,7 +1198,9 @@ class TestDashConfig(unittest.TestCase):
         self.config._check_and_refresh_token()
         self.mock_auth.get_access_token.assert_called_once()
         # Check jwt.decode was called with the correct token
-        mock_jwt_decode.assert_called_with('bad_token', options={"verify_signature": False})
+        mock_jwt_decode.assert_any_call('bad_token', options={"verify_signature": False})
+        # the expiry of the new token is decoded once when it is obtained
+        mock_jwt_decode.assert_called_with('new_token', options={"verify_signature": False})
 
     @patch('jwt.decode')
     def test_check_and_refresh_token_unexpected_payload(self, mock_jwt_decode):
@@ -1140,8 +1209,56 @@ class TestDashConfig(unittest.TestCase):
         self.config._check_and_refresh_token()
         self.mock_auth.get_access_token.assert_called_once()
         # Check jwt.decode was called with the correct token
-        mock_jwt_decode.assert_called_with('unexpected_payload_token', options={"verify_signature": False})
+        mock_jwt_decode.assert_any_call('unexpected_payload_token', options={"verify_signature": False})
+        # the expiry of the new token is decoded once when it is obtained
+        mock_jwt_decode.assert_called_with('new_token', options={"verify_signature": False})
         
+    @patch('jwt.decode')
+    def test_check_and_refresh_token_decodes_each_token_once(self, mock_jwt_decode):
+        mock_jwt_decode.return_value = {'exp': time.time() + 300}
+        self.config.access_token = 'valid_token'
+        for _ in range(100):
+            self.config.auth_settings()
+        mock_jwt_decode.assert_called_once_with('valid_token', options={"verify_signature": False})
+        self.mock_auth.get_access_token.assert_not_called()
+
+    def test_check_and_refresh_token_single_flight(self):
+        valid_token = jwt.encode({'exp': time.time() + 300}, 'a-really-secret-key-for-tests-only', algorithm='HS256')
+
+        def slow_get_access_token(force_refresh=False):
+            time.sleep(0.2)
+            return valid_token
+
+        self.mock_auth.get_access_token.side_effect = slow_get_access_token
+        self.config.access_token = None
+
+        threads = [threading.Thread(target=self.config._check_and_refresh_token) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.mock_auth.get_access_token.assert_called_once()
+        self.assertEqual(self.config.access_token, valid_token)
+
+    def test_background_token_refresh(self):
+        near_expiry_token = jwt.encode({'exp': time.time() + 60}, 'a-really-secret-key-for-tests-only', algorithm='HS256')
+        renewed_token = jwt.encode({'exp': time.time() + 3600}, 'a-really-secret-key-for-tests-only', algorithm='HS256')
+        self.mock_auth.get_access_token.return_value = renewed_token
+        self.config.access_token = near_expiry_token
+
+        self.config.start_background_token_refresh(refresh_ahead=120)
+        try:
+            for _ in range(50):
+                if self.config.access_token == renewed_token:
+                    break
+                time.sleep(0.05)
+        finally:
+            self.config.stop_background_token_refresh()
+
+        self.assertEqual(self.config.access_token, renewed_token)
+        self.mock_auth.get_access_token.assert_called_once_with(force_refresh=True)
+
 class TestDashBulkUploader(unittest.TestCase):
 
     def setUp(self):
@@ -1161,6 +1278,15 @@ class TestDashBulkUploader(unittest.TestCase):
         self.assertEqual(self.uploader.uploads['test_table']['check_sum'], {'count(*)': 100})
         mock_load.assert_called_once()
 
+    @patch('comotion.dash.Load')
+    def test_add_load_with_parquet_writer_options(self, mock_load):
+        self.uploader.add_load(
+            table_name='test_table',
+            check_sum={'count(*)': 100},
+            parquet_writer_options='balanced'
+        )
+        self.assertEqual(mock_load.call_args.kwargs['parquet_writer_options'], 'balanced')
+
     def test_add_load_invalid_table_name(self):
         with self.assertRaises(ValueError):
             self.uploader.add_load(
@@ -1292,4 +1418,1566 @@ class TestDashBulkUploader(unittest.TestCase):
 
 if __name__ == '__main__':
     unittest.main()
- 
\ No newline at end of file
+ 
+
+class TestPollingStrategy(unittest.TestCase):
+
+    def test_intervals_back_off_to_max_interval(self):
+        strategy = dash.PollingStrategy(initial_interval=1, max_interval=4, multiplier=2, jitter=0)
+        intervals = strategy.intervals()
+        self.assertEqual([next(intervals) for _ in range(5)], [1, 2, 4, 4, 4])
+
+    def test_intervals_apply_jitter(self):
+        strategy = dash.PollingStrategy(initial_interval=10, max_interval=10, jitter=0.1)
+        intervals = strategy.intervals()
+        for _ in range(50):
+            self.assertTrue(9 <= next(intervals) <= 11)
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            dash.PollingStrategy(initial_interval=0)
+        with self.assertRaises(ValueError):
+            dash.PollingStrategy(multiplier=0.5)
+        with self.assertRaises(ValueError):
+            dash.PollingStrategy(jitter=2)
+
+    @patch('time.sleep')
+    def test_wait_returns_first_complete_status(self, mock_sleep):
+        strategy = dash.PollingStrategy(initial_interval=0.5, multiplier=2, jitter=0)
+        get_status = MagicMock(side_effect=['RUNNING', 'RUNNING', 'DONE'])
+
+        self.assertEqual(strategy.wait(get_status, lambda status: status == 'DONE'), 'DONE')
+        self.assertEqual(mock_sleep.call_args_list, [call(0.5), call(1.0)])
+
+    @patch('time.sleep')
+    @patch('time.monotonic')
+    def test_wait_raises_on_timeout(self, mock_monotonic, mock_sleep):
+        mock_monotonic.side_effect = [0, 1, 3, 6]
+        strategy = dash.PollingStrategy(initial_interval=2, multiplier=1, jitter=0, timeout=5)
+
+        with self.assertRaises(dash.PollingTimeoutException) as context:
+            strategy.wait(lambda: 'RUNNING', lambda status: False, description='test job')
+
+        self.assertEqual(context.exception.last_status, 'RUNNING')
+        self.assertIn('test job', str(context.exception))
+        # the last sleep is cut short so the deadline is not overshot
+        self.assertEqual(mock_sleep.call_args_list, [call(2), call(2)])
+
+    @patch('comotion.dash.QueriesApi')
+    @patch('time.sleep')
+    def test_query_wait_to_complete_timeout(self, mock_sleep, mock_queries_api):
+        mock_config = MagicMock(spec=DashConfig)
+        query = Query(config=mock_config, query_id='test_query_id')
+        query.get_query_info = MagicMock(return_value=QueryInfo(status=QueryStatus(state='RUNNING')))
+
+        with self.assertRaises(dash.PollingTimeoutException):
+            query.wait_to_complete(timeout=0)
+
+    @patch('comotion.dash.LoadsApi')
+    @patch('time.sleep')
+    def test_load_wait_to_complete_with_strategy(self, mock_sleep, mock_loads_api):
+        mock_config = MagicMock(spec=DashConfig)
+        load = Load(config=mock_config, load_id='test_load_id')
+        load.get_load_info = MagicMock(side_effect=[
+            MagicMock(load_status='PROCESSING'),
+            MagicMock(load_status='SUCCESS')
+        ])
+
+        strategy = dash.PollingStrategy(initial_interval=3, jitter=0)
+        self.assertEqual(load.wait_to_complete(polling_strategy=strategy), 'SUCCESS')
+        mock_sleep.assert_called_once_with(3)
+
+    @patch('comotion.dash.MigrationsApi')
+    @patch('time.sleep')
+    def test_migration_wait_to_complete(self, mock_sleep, mock_migrations_api):
+        config = DashConfig(Auth(orgname='test_org'))
+        migration = dash.Migration(config)
+        migration.migration_type = 'FLASH_SCHEMA'
+        migration.migration_api_instance.get_migration.side_effect = [
+            MagicMock(flash_schema_status='Started', full_migration_status='Not Run'),
+            MagicMock(flash_schema_status='Completed', full_migration_status='Not Run')
+        ]
+
+        status = migration.wait_to_complete()
+
+        self.assertEqual(status.flash_schema_status, 'Completed')
+        self.assertEqual(migration.migration_api_instance.get_migration.call_count, 2)
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    @patch('comotion.dash.MigrationsApi')
+    @patch('time.sleep')
+    def test_migration_wait_to_complete_waits_for_start(self, mock_sleep, mock_migrations_api):
+        migration = dash.Migration(DashConfig(Auth(orgname='test_org')))
+        migration.migration_api_instance.get_migration.side_effect = [
+            MagicMock(flash_schema_status='Completed', full_migration_status='Not Run'),
+            MagicMock(flash_schema_status='Completed', full_migration_status='Not Run'),
+            MagicMock(flash_schema_status='Completed', full_migration_status='Started'),
+            MagicMock(flash_schema_status='Completed', full_migration_status='Complete')
+        ]
+        migration.start(migration_type='FULL_MIGRATION')
+
+        status = migration.wait_to_complete()
+
+        self.assertEqual(status.full_migration_status, 'Complete')
+        self.assertEqual(migration.migration_api_instance.get_migration.call_count, 4)
+
+        migration.migration_api_instance.get_migration.side_effect = None
+        migration.migration_api_instance.get_migration.return_value = MagicMock(full_migration_status='Not Run')
+        migration.start(migration_type='FULL_MIGRATION')
+        with self.assertRaises(dash.PollingTimeoutException):
+            migration.wait_to_complete(timeout=0)
+
+    @patch('comotion.dash.MigrationsApi')
+    @patch('time.sleep')
+    def test_migration_wait_to_complete_waits_for_rerun_to_start(self, mock_sleep, mock_migrations_api):
+        migration = dash.Migration(DashConfig(Auth(orgname='test_org')))
+        migration.migration_api_instance.get_migration.side_effect = [
+            MagicMock(flash_schema_status='Completed', full_migration_status='Not Run'),
+            MagicMock(flash_schema_status='Completed', full_migration_status='Not Run'),
+            MagicMock(flash_schema_status='Started', full_migration_status='Not Run'),
+            MagicMock(flash_schema_status='Completed', full_migration_status='Not Run')
+        ]
+        # the flash schema status is still 'Completed' from the previous run just after the start
+        migration.start(migration_type='FLASH_SCHEMA')
+
+        self.assertFalse(migration.is_complete())
+        self.assertFalse(migration.is_complete())
+        self.assertTrue(migration.is_complete())
+        self.assertEqual(migration.migration_api_instance.get_migration.call_count, 4)
+
+        for previous in ['Failed', 'Rerunnable']:
+            migration.migration_api_instance.get_migration.side_effect = None
+            migration.migration_api_instance.get_migration.return_value = MagicMock(flash_schema_status=previous)
+            migration.start(migration_type='FLASH_SCHEMA')
+            with self.assertRaises(dash.PollingTimeoutException):
+                migration.wait_to_complete(timeout=0)
+            self.assertTrue(migration.is_complete(MagicMock(flash_schema_status='Completed')))
+
+    def test_migration_is_complete_checks_both_processes(self):
+        migration = dash.Migration(DashConfig(Auth(orgname='test_org')))
+        self.assertFalse(migration.is_complete(MagicMock(flash_schema_status='Completed', full_migration_status='Started')))
+        self.assertTrue(migration.is_complete(MagicMock(flash_schema_status='Completed', full_migration_status='Complete')))
+
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+class TestAsyncDash(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.requests = []
+        self.query_states = ['RUNNING', 'RUNNING', 'SUCCEEDED']
+        self.csv = b'col1,col2\n' + b'1,2\n' * 1000
+
+        async def run_query(request):
+            self.requests.append((request.method, request.path, await request.json(), request.headers.get('Authorization')))
+            return web.json_response({'queryId': 'query_1'}, status=202)
+
+        async def get_query(request):
+            self.requests.append((request.method, request.path))
+            state = self.query_states.pop(0) if len(self.query_states) > 1 else self.query_states[0]
+            return web.json_response({'queryId': request.match_info['query_id'], 'status': {'state': state}})
+
+        async def download_csv(request):
+            self.requests.append((request.method, request.path))
+            return web.Response(body=self.csv, content_type='text/csv')
+
+        async def create_load(request):
+            self.requests.append((request.method, request.path, await request.json()))
+            return web.json_response({'loadId': 'load_1'}, status=202)
+
+        async def commit_load(request):
+            self.requests.append((request.method, request.path, await request.json()))
+            return web.json_response({'message': 'committed'}, status=202)
+
+        async def get_load(request):
+            self.requests.append((request.method, request.path))
+            return web.json_response({'LoadStatus': 'SUCCESS'})
+
+        app = web.Application()
+        app.router.add_post('/query', run_query)
+        app.router.add_get('/query/{query_id}', get_query)
+        app.router.add_get('/query/{query_id}/csv', download_csv)
+        app.router.add_post('/load', create_load)
+        app.router.add_post('/load/{load_id}/commit', commit_load)
+        app.router.add_get('/load/{load_id}', get_load)
+        self.server = TestServer(app)
+        await self.server.start_server()
+
+        self.config = DashConfig(Auth(orgname='test_org'))
+        self.config.host = str(self.server.make_url('')).rstrip('/')
+        self.config.access_token = jwt.encode({'exp': time.time() + 3600}, 'a-test-secret-key-of-at-least-32-bytes', algorithm='HS256')
+        self.client = dash.AsyncDashClient(self.config)
+        self.fast_polling = dash.PollingStrategy(initial_interval=0.01, jitter=0)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    def test_client_requires_config(self):
+        with self.assertRaises(TypeError):
+            dash.AsyncDashClient('not a config')
+        with self.assertRaises(TypeError):
+            dash.AsyncQuery('not a client', query_text='select 1')
+        with self.assertRaises(ValueError):
+            dash.AsyncQuery(self.client)
+
+    async def test_query_run_wait_and_stream(self):
+        query = dash.AsyncQuery(self.client, query_text='select 1')
+        self.assertEqual(await query.run(), 'query_1')
+
+        query_info = await query.wait_to_complete(polling_strategy=self.fast_polling)
+        self.assertEqual(query_info.status.state, 'SUCCEEDED')
+
+        chunks = [chunk async for chunk in query.stream(chunk_size=1024)]
+        self.assertEqual(b''.join(chunks), self.csv)
+
+        self.assertEqual(self.requests[0], ('POST', '/query', {'query': 'select 1'}, f'Bearer {self.config.access_token}'))
+        self.assertEqual(self.requests[1:], [('GET', '/query/query_1')] * 3 + [('GET', '/query/query_1/csv')])
+
+    async def test_many_queries_share_one_event_loop(self):
+        self.query_states = ['SUCCEEDED']
+        queries = [dash.AsyncQuery(self.client, query_id=f'query_{i}') for i in range(50)]
+
+        states = await asyncio.gather(*[query.state() for query in queries])
+
+        self.assertEqual(states, ['SUCCEEDED'] * 50)
+
+    async def test_download_csv(self):
+        query = dash.AsyncQuery(self.client, query_id='query_1')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'result.csv')
+            await query.download_csv(path)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), self.csv)
+
+    async def test_query_not_found(self):
+        query = dash.AsyncQuery(self.client, query_id='query_1')
+        self.config.host = self.config.host + '/missing'
+        with self.assertRaises(ValueError):
+            await query.get_query_info()
+
+    async def test_token_refreshed_off_the_event_loop(self):
+        new_token = jwt.encode({'exp': time.time() + 3600, 'sub': 'new'}, 'a-test-secret-key-of-at-least-32-bytes', algorithm='HS256')
+        self.config.access_token = None
+        self.config.auth.get_access_token = MagicMock(return_value=new_token)
+
+        query = dash.AsyncQuery(self.client, query_text='select 1')
+        await query.run()
+
+        self.config.auth.get_access_token.assert_called_once()
+        self.assertEqual(self.requests[0][3], f'Bearer {new_token}')
+
+    @patch('comotion.dash._upload_parquet_buffer_to_s3', return_value='uploaded')
+    async def test_load_upload_commit_and_wait(self, mock_upload):
+        load = dash.AsyncLoad(self.client, load_type='APPEND_ONLY', table_name='my_table', track_rows_uploaded=True)
+        load.generate_presigned_url_for_file_upload = AsyncMock(return_value=MagicMock(path='path/file_key'))
+
+        self.assertEqual(await load.start(), 'load_1')
+        self.assertEqual(await load.upload_df(pd.DataFrame({'My Col': [1, 2, 3]}), file_key='file_key'), 'uploaded')
+        await load.commit()
+        self.assertEqual(await load.wait_to_complete(polling_strategy=self.fast_polling), 'SUCCESS')
+
+        parquet_buffer = mock_upload.call_args[0][0]
+        self.assertEqual(pyarrow.parquet.read_table(parquet_buffer).column_names, ['my_col'])
+        self.assertEqual(self.requests[0][:2], ('POST', '/load'))
+        self.assertEqual(self.requests[0][2]['table_name'], 'my_table')
+        self.assertEqual(self.requests[1], ('POST', '/load/load_1/commit', {'check_sum': {'count(*)': 3}}))
+        self.assertEqual(self.requests[2], ('GET', '/load/load_1'))
+
+    async def test_load_requires_start(self):
+        load = dash.AsyncLoad(self.client, table_name='my_table')
+        with self.assertRaises(ValueError):
+            await load.get_load_info()
+
+
+class TestStatusMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.monitor = dash.StatusMonitor(
+            polling_strategy=dash.PollingStrategy(initial_interval=0.01, multiplier=1, jitter=0),
+            max_calls_per_second=1000
+        )
+
+    @patch('comotion.dash.QueriesApi')
+    def make_query(self, states, mock_queries_api):
+        query = Query(config=MagicMock(spec=DashConfig), query_id='test_query_id')
+        query.get_query_info = MagicMock(side_effect=[QueryInfo(status=QueryStatus(state=state)) for state in states])
+        return query
+
+    def test_watch_resolves_futures_from_one_thread(self):
+        queries = [self.make_query(['QUEUED', 'RUNNING', 'SUCCEEDED']) for _ in range(10)]
+        threads = set()
+        for query in queries:
+            get_query_info = query.get_query_info.side_effect
+            query.get_query_info.side_effect = lambda iterator=iter(get_query_info): (threads.add(threading.get_ident()), next(iterator))[1]
+
+        futures = self.monitor.watch_all(queries)
+
+        self.assertEqual([future.result(timeout=5).status.state for future in futures], ['SUCCEEDED'] * 10)
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threading.get_ident(), threads)
+        for query in queries:
+            self.assertEqual(query.get_query_info.call_count, 3)
+
+    def test_calls_are_rate_limited(self):
+        monitor = dash.StatusMonitor(
+            polling_strategy=dash.PollingStrategy(initial_interval=0.001, multiplier=1, jitter=0),
+            max_calls_per_second=50
+        )
+        queries = [self.make_query(['RUNNING', 'SUCCEEDED']) for _ in range(5)]
+
+        start = time.monotonic()
+        for future in monitor.watch_all(queries):
+            future.result(timeout=5)
+
+        # 10 calls at most 50 per second
+        self.assertGreaterEqual(time.monotonic() - start, 9 / 50)
+
+    def test_callback_and_errors(self):
+        failing_query = self.make_query([])
+        failing_query.get_query_info.side_effect = ValueError("query_id cannot be found")
+        done = threading.Event()
+
+        future = self.monitor.watch(failing_query, callback=lambda future: done.set())
+
+        self.assertTrue(done.wait(5))
+        with self.assertRaises(ValueError):
+            future.result()
+
+    def test_timeout(self):
+        query = self.make_query(['RUNNING'] * 1000)
+        future = self.monitor.watch(query, timeout=0.05)
+        with self.assertRaises(dash.PollingTimeoutException):
+            future.result(timeout=5)
+
+    def test_cancelled_future_is_no_longer_polled(self):
+        monitor = dash.StatusMonitor(polling_strategy=dash.PollingStrategy(initial_interval=0.2, jitter=0))
+        query = self.make_query(['RUNNING'] * 1000)
+
+        future = monitor.watch(query)
+        time.sleep(0.05)
+        self.assertTrue(future.cancel())
+        time.sleep(0.3)
+
+        self.assertEqual(query.get_query_info.call_count, 1)
+        self.assertEqual(monitor.pending(), 0)
+
+    def test_watch_load_and_unsupported_objects(self):
+        with patch('comotion.dash.LoadsApi'):
+            load = Load(config=MagicMock(spec=DashConfig), load_id='test_load_id')
+        load.get_load_info = MagicMock(side_effect=[MagicMock(load_status='PROCESSING'), MagicMock(load_status='SUCCESS')])
+
+        self.assertEqual(self.monitor.watch(load).result(timeout=5).load_status, 'SUCCESS')
+        with self.assertRaises(TypeError):
+            self.monitor.watch('not a query')
+
+
+class TestQueryRangedDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.data = bytes(range(256)) * 40  # 10240 bytes
+        self.requested_ranges = []
+        self.truncate_ranges = set()
+        self.ranges_supported = True
+        self.failing_ranges = set()
+        self.etag = '"etag1"'
+
+        with patch('comotion.dash.QueriesApi'):
+            self.query = Query(config=MagicMock(spec=DashConfig), query_id='123')
+        self.query.refresh_api_instance = MagicMock()
+        self.query.query_api_instance.download_csv_without_preload_content.side_effect = self.fake_download
+
+    def fake_download(self, query_id, _headers):
+        start, end = [int(value) for value in _headers['Range'][len('bytes='):].split('-')]
+        self.requested_ranges.append((start, end))
+        response = MagicMock()
+        if not self.ranges_supported:
+            body = self.data
+            response.status = 200
+            response.getheader.side_effect = {'Content-Length': str(len(body))}.get
+        else:
+            end = min(end, len(self.data) - 1)
+            body = self.data[start:end + 1]
+            response.status = 500 if start in self.failing_ranges else 206
+            response.getheader.side_effect = {'Content-Range': f'bytes {start}-{end}/{len(self.data)}', 'ETag': self.etag}.get
+            if start in self.truncate_ranges:
+                # drop the connection half way through the range, once
+                self.truncate_ranges.remove(start)
+                body = body[:len(body) // 2]
+        response.stream.return_value = [body[i:i + 1000] for i in range(0, len(body), 1000)]
+        response.__enter__.return_value = response
+        return response
+
+    def test_ranges_written_to_offsets(self):
+        f = io.BytesIO()
+        progress = []
+
+        size = self.query.download_csv_ranges(f, max_connections=3, range_size=3000, progress_callback=progress.append)
+
+        self.assertEqual(size, len(self.data))
+        self.assertEqual(f.getvalue(), self.data)
+        self.assertEqual(sum(progress), len(self.data))
+        self.assertEqual(sorted(self.requested_ranges), [(0, 2999), (3000, 5999), (6000, 8999), (9000, 10239)])
+
+    def test_incomplete_range_is_resumed(self):
+        self.truncate_ranges = {3000}
+        f = io.BytesIO()
+
+        self.query.download_csv_ranges(f, max_connections=2, range_size=3000)
+
+        self.assertEqual(f.getvalue(), self.data)
+        # the retry starts from the last byte received
+        self.assertIn((4500, 5999), self.requested_ranges)
+
+    def test_incomplete_range_fails_after_retries(self):
+        self.query.query_api_instance.download_csv_without_preload_content.side_effect = None
+        response = MagicMock(status=206)
+        response.getheader.return_value = 'bytes 0-99/100'
+        response.stream.return_value = [b'x' * 10]
+        self.query.query_api_instance.download_csv_without_preload_content.return_value = response
+
+        with self.assertRaises(IncompleteRead):
+            self.query.download_csv_ranges(io.BytesIO(), range_size=1000, max_retries=2)
+        self.assertEqual(self.query.query_api_instance.download_csv_without_preload_content.call_count, 3)
+
+    def test_falls_back_to_single_stream(self):
+        self.ranges_supported = False
+        f = io.BytesIO()
+
+        self.assertEqual(self.query.download_csv_ranges(f, range_size=3000), len(self.data))
+        self.assertEqual(f.getvalue(), self.data)
+        self.assertEqual(self.requested_ranges, [(0, 2999)])
+
+    def test_download_csv_with_connections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'result.csv')
+            self.query.download_csv(path, max_connections=4, range_size=1024)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), self.data)
+        self.assertEqual(len(self.requested_ranges), 10)
+
+    def test_resumable_download_continues_after_failure(self):
+        self.failing_ranges = {6000}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'result.csv')
+            with self.assertRaises(ApiException):
+                self.query.download_csv_resumable(path, range_size=3000, max_retries=1)
+
+            self.assertFalse(os.path.exists(path))
+            with open(path + '.progress') as f:
+                completed = json.load(f)['completed']
+            self.assertIn(0, completed)
+            self.assertNotIn(6000, completed)
+
+            self.failing_ranges = set()
+            self.requested_ranges = []
+            progress = []
+            self.query.download_csv_resumable(path, range_size=3000, progress_callback=progress.append)
+
+            # only the ranges that were not completed are downloaded again
+            self.assertIn((6000, 8999), self.requested_ranges)
+            self.assertEqual(len(self.requested_ranges), 4 - len(completed))
+            self.assertEqual(progress[0], sum(min(start + 3000, len(self.data)) - start for start in completed))
+            self.assertEqual(sum(progress), len(self.data))
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), self.data)
+            self.assertEqual(os.listdir(directory), ['result.csv'])
+
+    def test_download_csv_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'result.csv')
+            self.query.download_csv(path, range_size=3000, resume=True)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), self.data)
+            with self.assertRaises(FileExistsError):
+                self.query.download_csv(path, range_size=3000, resume=True, fail_if_exists=True)
+
+    def test_resumable_download_ignores_progress_of_other_query(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'result.csv')
+            with open(path + '.part', 'wb') as f:
+                f.write(b'x' * len(self.data))
+            with open(path + '.progress', 'w') as f:
+                json.dump({'query_id': 'other', 'size': len(self.data), 'range_size': 3000, 'completed': [0]}, f)
+
+            self.query.download_csv_resumable(path, range_size=3000)
+
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), self.data)
+            self.assertEqual(len(self.requested_ranges), 4)
+
+    def test_resumable_download_fails_if_result_changed(self):
+        self.failing_ranges = {3000}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'result.csv')
+            with self.assertRaises(ApiException):
+                self.query.download_csv_resumable(path, range_size=3000, max_retries=0)
+
+            self.failing_ranges = set()
+            self.etag = '"etag2"'
+            with self.assertRaises(ValueError):
+                self.query.download_csv_resumable(path, range_size=3000)
+
+
+RESULT_CSV = (
+    b'"created","name","amount","day","price","score","flag"\n'
+    b'"2013-04-10 00:00:00.000","string value","123","2013-04-10","23.23","23.24","C"\n'
+    b',"",,,,"NaN",\n'
+    b'"2013-04-10 01:02:03.456","another","-5","2020-01-01","1","1.5","D"\n'
+)
+RESULT_COLUMNS = [
+    ('created', 'timestamp'), ('name', 'varchar'), ('amount', 'bigint'), ('day', 'date'),
+    ('price', 'decimal'), ('score', 'double'), ('flag', 'char')
+]
+
+
+class _QueryResultHandler(BaseHTTPRequestHandler):
+    body = RESULT_CSV
+
+    def do_GET(self):
+        if self.path.endswith('/csv'):
+            body = self.body
+            content_type = 'text/csv'
+        else:
+            body = json.dumps({
+                'resultSet': {'Rows': []},
+                'ResultSetMetaData': {'ColumnInfo': [{'Name': name, 'Type': column_type} for name, column_type in RESULT_COLUMNS]}
+            }).encode()
+            content_type = 'application/json'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestQueryResultReaders(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), _QueryResultHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        config = DashConfig(Auth(orgname='test_org'))
+        config.host = 'http://127.0.0.1:%s' % self.server.server_port
+        config.access_token = jwt.encode({'exp': time.time() + 3600}, 'a-test-secret-key-of-at-least-32-bytes', algorithm='HS256')
+        self.query = Query(config=config, query_id='query_1')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_result_schema(self):
+        schema = self.query.get_result_schema()
+        self.assertEqual(schema.names, [name for name, _ in RESULT_COLUMNS])
+        self.assertEqual(
+            [str(field.type) for field in schema],
+            ['timestamp[ms]', 'string', 'int64', 'date32[day]', 'double', 'double', 'string']
+        )
+
+    def test_to_arrow(self):
+        table = self.query.to_arrow()
+        self.assertEqual(table.schema, self.query.get_result_schema())
+        rows = table.to_pylist()
+        self.assertEqual(rows[0]['created'], datetime.datetime(2013, 4, 10))
+        self.assertEqual(rows[0]['amount'], 123)
+        self.assertEqual(rows[0]['price'], 23.23)
+        # unquoted empty values are null, quoted empty strings are not
+        self.assertIsNone(rows[1]['amount'])
+        self.assertEqual(rows[1]['name'], '')
+        self.assertTrue(math.isnan(rows[1]['score']))
+        self.assertEqual(rows[2]['created'], datetime.datetime(2013, 4, 10, 1, 2, 3, 456000))
+
+    @patch.object(_QueryResultHandler, 'body', RESULT_CSV + RESULT_CSV.split(b'\n', 1)[1] * 20)
+    def test_iter_record_batches(self):
+        batches = list(self.query.iter_record_batches(block_size=256))
+        self.assertGreater(len(batches), 1)
+        self.assertEqual(sum(batch.num_rows for batch in batches), 63)
+        self.assertTrue(pyarrow.Table.from_batches(batches).to_pandas().equals(self.query.to_arrow(dictionary_columns=False).to_pandas()))
+
+    def test_to_pandas(self):
+        df = self.query.to_pandas()
+        self.assertEqual(list(df.columns), [name for name, _ in RESULT_COLUMNS])
+        self.assertEqual(df['score'].dtype, 'float64')
+        # bigint columns with nulls stay integers
+        self.assertEqual(df['amount'].dtype, 'Int64')
+        self.assertEqual(df['amount'].tolist()[0], 123)
+        self.assertEqual(df['created'].dtype, 'datetime64[ms]')
+        self.assertEqual(df['flag'].isna().tolist(), [False, True, False])
+        self.assertEqual(len(df), 3)
+
+    @patch.object(_QueryResultHandler, 'body', RESULT_CSV + RESULT_CSV.split(b'\n', 1)[1] * 20)
+    def test_low_cardinality_columns_are_dictionary_encoded(self):
+        table = self.query.to_arrow()
+        self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('flag').type))
+        self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('name').type))
+        self.assertEqual(self.query.to_pandas()['flag'].dtype, 'category')
+
+        table = self.query.to_arrow(dictionary_columns=False)
+        self.assertEqual(table.schema.field('flag').type, pyarrow.string())
+
+        table = self.query.to_arrow(dictionary_columns=['name'])
+        self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('name').type))
+        self.assertEqual(table.schema.field('flag').type, pyarrow.string())
+
+    @patch.object(_QueryResultHandler, 'body', RESULT_CSV + RESULT_CSV.split(b'\n', 1)[1] * 20)
+    def test_download_parquet(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'result.parquet')
+            rows = self.query.download_parquet(path, row_group_size=25, compression='zstd', block_size=256)
+            self.assertEqual(rows, 63)
+            parquet_file = pyarrow.parquet.ParquetFile(path)
+            self.assertEqual([parquet_file.metadata.row_group(i).num_rows for i in range(parquet_file.num_row_groups)], [25, 25, 13])
+            self.assertEqual(parquet_file.metadata.row_group(0).column(0).compression, 'ZSTD')
+            table = parquet_file.read()
+            self.assertEqual(table.schema.remove_metadata(), self.query.get_result_schema())
+            self.assertTrue(table.to_pandas().equals(self.query.to_arrow(dictionary_columns=False).to_pandas()))
+            self.assertEqual(os.listdir(directory), ['result.parquet'])
+
+            with self.assertRaises(FileExistsError):
+                self.query.download_parquet(path, fail_if_exists=True)
+
+    @patch.object(_QueryResultHandler, 'body', RESULT_CSV + RESULT_CSV.split(b'\n', 1)[1] * 20)
+    def test_to_arrow_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'result.arrow')
+            table = self.query.to_arrow_file(path, block_size=256)
+            self.assertEqual(table.schema, self.query.get_result_schema())
+            self.assertTrue(table.to_pandas().equals(self.query.to_arrow(dictionary_columns=False).to_pandas()))
+            self.assertGreater(len(table.column('name').chunks), 1)
+            self.assertEqual(os.listdir(directory), ['result.arrow'])
+
+            # the data stays in the mapped file rather than arrow's memory pool
+            allocated = pyarrow.total_allocated_bytes()
+            reopened = Query.open_arrow_file(path)
+            self.assertEqual(pyarrow.total_allocated_bytes(), allocated)
+            self.assertEqual(reopened.num_rows, 63)
+            del table, reopened
+
+            with self.assertRaises(FileExistsError):
+                self.query.to_arrow_file(path, fail_if_exists=True)
+
+    def test_download_to_pathlib_paths(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(self.query.download_parquet(pathlib.Path(directory, 'result.parquet')), 3)
+            self.assertEqual(self.query.to_arrow_file(pathlib.Path(directory, 'result.arrow')).num_rows, 3)
+            self.assertEqual(sorted(os.listdir(directory)), ['result.arrow', 'result.parquet'])
+
+    def test_download_parquet_removes_partial_file(self):
+        def fail(schema, block_size, compressed):
+            yield pyarrow.RecordBatch.from_pylist([], schema=schema)
+            raise IncompleteRead(10, 20)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with patch.object(Query, '_iter_record_batches', side_effect=fail):
+                with self.assertRaises(IncompleteRead):
+                    self.query.download_parquet(os.path.join(directory, 'result.parquet'))
+            self.assertEqual(os.listdir(directory), [])
+
+
+class TestUploadPipeline(unittest.TestCase):
+
+    class Serialized():
+        def __init__(self, value, nbytes):
+            self.value = value
+            self.nbytes = nbytes
+
+    def run_pipeline(self, count, upload, max_bytes_in_flight, chunk_size=100, max_workers=4):
+        self.read = 0
+        self.uploaded = 0
+        self.max_outstanding = 0
+        lock = threading.Lock()
+
+        def chunks():
+            for i in range(count):
+                with lock:
+                    self.read += 1
+                    self.max_outstanding = max(self.max_outstanding, self.read - self.uploaded)
+                yield f'key_{i}', i
+
+        def upload_and_count(serialized, file_key):
+            response = upload(serialized, file_key)
+            with lock:
+                self.uploaded += 1
+            return response
+
+        return dash._run_upload_pipeline(
+            chunks(),
+            serialize=lambda chunk: self.Serialized(chunk, chunk_size // 2),
+            upload=upload_and_count,
+            size_of=lambda chunk: chunk_size,
+            max_workers=max_workers,
+            max_bytes_in_flight=max_bytes_in_flight
+        )
+
+    def test_memory_is_bounded_when_upload_is_slow(self):
+        def slow_upload(serialized, file_key):
+            time.sleep(0.01)
+            return file_key
+
+        responses = self.run_pipeline(50, slow_upload, max_bytes_in_flight=300)
+        self.assertEqual(responses, [f'key_{i}' for i in range(50)])
+        # 300 bytes holds three chunks, or six serialized chunks, and one more is read while waiting
+        self.assertLessEqual(self.max_outstanding, 7)
+
+    def test_chunks_larger_than_budget_are_uploaded(self):
+        responses = self.run_pipeline(3, lambda serialized, file_key: serialized.value, max_bytes_in_flight=10)
+        self.assertEqual(responses, [0, 1, 2])
+
+    def test_failure_stops_reading(self):
+        def upload(serialized, file_key):
+            if serialized.value == 2:
+                raise ConnectionError('upload failed')
+            time.sleep(0.01)
+            return file_key
+
+        with self.assertRaises(ConnectionError):
+            self.run_pipeline(1000, upload, max_bytes_in_flight=200, max_workers=2)
+        self.assertLess(self.read, 20)
+
+    @patch('comotion.dash._upload_parquet_buffer_to_s3', side_effect=lambda buffer, response: pyarrow.parquet.read_table(buffer))
+    @patch('comotion.dash.Load.generate_presigned_url_for_file_upload')
+    @patch('comodash_api_client_lowlevel.ApiClient')
+    def test_upload_file(self, mock_api_client, mock_generate_presigned_url, mock_upload):
+        mock_generate_presigned_url.return_value = FileUploadResponse(
+            presigned_url={}, sts_credentials={}, path='path/key', bucket='bucket'
+        )
+        load = Load(config=MagicMock(spec=DashConfig), load_id='load_1')
+        load.chunksize = 10
+        load.track_rows_uploaded = True
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.csv')
+            pd.DataFrame({'My Col': range(95)}).to_csv(path, index=False)
+            tables = load.upload_file(path, file_key='data', max_bytes_in_flight=1000)
+
+        self.assertEqual(len(tables), 10)
+        self.assertEqual(tables[9].column('my_col').to_pylist(), list(range(90, 95)))
+        self.assertEqual(load.rows_uploaded, 95)
+        self.assertEqual(
+            sorted(c.kwargs['file_key'] for c in mock_generate_presigned_url.call_args_list),
+            sorted(f'data_{i}' for i in range(1, 11))
+        )
+
+    @patch('comotion.dash._upload_parquet_buffer_to_s3', side_effect=lambda buffer, response: pyarrow.parquet.read_table(buffer))
+    @patch('comotion.dash.Load.generate_presigned_url_for_file_upload')
+    @patch('comodash_api_client_lowlevel.ApiClient')
+    def test_upload_file_in_processes(self, mock_api_client, mock_generate_presigned_url, mock_upload):
+        from concurrent.futures import ProcessPoolExecutor
+        mock_generate_presigned_url.return_value = FileUploadResponse(
+            presigned_url={}, sts_credentials={}, path='path/key', bucket='bucket'
+        )
+        load = Load(config=MagicMock(spec=DashConfig), load_id='load_1')
+        load.chunksize = 10
+        # not picklable, so it must run in this process
+        load.modify_lambda = lambda df: df.insert(1, 'Doubled', df['My Col'] * 2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.csv')
+            pd.DataFrame({'My Col': range(95)}).to_csv(path, index=False)
+            with patch.object(dash, 'ProcessPoolExecutor', wraps=ProcessPoolExecutor) as process_pool:
+                tables = load.upload_file(path, file_key='data', processes=2)
+
+        process_pool.assert_called_once_with(max_workers=2, mp_context=multiprocessing.get_context('spawn'))
+        self.assertEqual(len(tables), 10)
+        self.assertEqual(tables[3].column_names, ['my_col', 'doubled'])
+        self.assertEqual(tables[3].column('doubled').to_pylist(), [i * 2 for i in range(30, 40)])
+
+
+class TestUploadTable(unittest.TestCase):
+
+    def setUp(self):
+        patch('comodash_api_client_lowlevel.ApiClient').start()
+        self.upload = patch('comotion.dash._upload_parquet_buffer_to_s3', side_effect=lambda buffer, response: pyarrow.parquet.read_table(buffer)).start()
+        self.generate_presigned_url = patch('comotion.dash.Load.generate_presigned_url_for_file_upload').start()
+        self.generate_presigned_url.return_value = FileUploadResponse(
+            presigned_url={}, sts_credentials={}, path='path/key', bucket='bucket'
+        )
+        self.addCleanup(patch.stopall)
+        self.load = Load(config=MagicMock(spec=DashConfig), load_id='load_1')
+        self.load.chunksize = 10
+        self.load.track_rows_uploaded = True
+
+    def file_keys(self):
+        return sorted(c.kwargs['file_key'] for c in self.generate_presigned_url.call_args_list)
+
+    def test_upload_table_regroups_batches(self):
+        reader = pyarrow.RecordBatchReader.from_batches(
+            pyarrow.schema([('My Col', pyarrow.int64())]),
+            [pyarrow.record_batch({'My Col': list(range(start, start + 7))}) for start in range(0, 28, 7)]
+        )
+        with patch.object(dash, '_dataframe_to_parquet_buffer') as dataframe_to_parquet:
+            tables = self.load.upload_table(reader, file_key='data')
+
+        dataframe_to_parquet.assert_not_called()
+        self.assertEqual([table.num_rows for table in tables], [10, 10, 8])
+        self.assertEqual(pyarrow.concat_tables(tables).column('my_col').to_pylist(), list(range(28)))
+        self.assertEqual(self.load.rows_uploaded, 28)
+        self.assertEqual(self.file_keys(), ['data_1', 'data_2', 'data_3'])
+
+    def test_upload_table_applies_modify_lambda(self):
+        self.load.modify_lambda = lambda df: df.insert(1, 'Doubled', df['a'] * 2)
+        tables = self.load.upload_table(pyarrow.table({'a': range(5)}), file_key='data')
+        self.assertEqual(tables[0].column('doubled').to_pylist(), [0, 2, 4, 6, 8])
+
+    def test_upload_table_rejects_dataframes(self):
+        with self.assertRaises(ValueError):
+            self.load.upload_table(pd.DataFrame({'a': [1]}))
+
+    def test_upload_file_reads_csv_with_pandas_by_default(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.csv')
+            pd.DataFrame({'a': range(5)}).to_csv(path, index=False)
+            with patch('pandas.read_csv', wraps=pd.read_csv) as read_csv:
+                self.load.upload_file(path, file_key='data')
+            read_csv.assert_called_with(path, chunksize=10)
+
+    def test_upload_file_reads_csv_with_pyarrow(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.csv')
+            with open(path, 'w') as f:
+                f.write('id,day,name\n1,2024-01-01,a\n,2024-01-02,\n3,2024-01-03,c\n')
+            with patch('pandas.read_csv') as read_csv:
+                tables = self.load.upload_file(path, file_key='data', engine='pyarrow')
+                typed_tables = self.load.upload_file(
+                    path, file_key='typed', engine='pyarrow', column_types={'id': pyarrow.int64()}
+                )
+
+        read_csv.assert_not_called()
+        self.assertEqual(tables[0].schema.types, [pyarrow.string()] * 3)
+        self.assertEqual(tables[0].column('id').to_pylist(), ['1', None, '3'])
+        self.assertEqual(tables[0].column('name').to_pylist(), ['a', None, 'c'])
+        self.assertEqual(typed_tables[0].column('id').to_pylist(), [1, None, 3])
+        self.assertEqual(typed_tables[0].schema.field('day').type, pyarrow.string())
+
+    def test_upload_file_column_types_errors(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.csv')
+            with open(path, 'w') as f:
+                f.write('id\n' + ''.join(f'{i}\n' for i in range(24)) + 'x\n')
+            with self.assertRaises(ValueError):
+                self.load.upload_file(path, file_key='data', engine='pyarrow', column_types={'id': pyarrow.int64()})
+            with self.assertRaises(ValueError):
+                self.load.upload_file(path, file_key='data', engine='pyarrow', column_types={'other': pyarrow.int64()})
+            with self.assertRaises(ValueError):
+                self.load.upload_file(path, file_key='data', column_types={'id': pyarrow.int64()})
+
+    def test_upload_file_reads_csv_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.csv')
+            pd.DataFrame({'id': range(25)}).to_csv(path, index=False)
+            with patch('pyarrow.csv.open_csv', wraps=pyarrow.csv.open_csv) as open_csv:
+                tables = self.load.upload_file(path, file_key='data', engine='pyarrow', column_types={'id': pyarrow.int64()})
+
+        # the first call only reads the header
+        self.assertEqual(open_csv.call_count, 2)
+        self.assertEqual(pyarrow.concat_tables(tables).column('id').to_pylist(), list(range(25)))
+
+    def test_upload_file_errors_without_pyarrow(self):
+        with patch.object(dash, 'pa', None), \
+                patch.object(Load, '_open_file_record_batches', side_effect=ValueError('cannot read')):
+            with self.assertRaisesRegex(ValueError, 'cannot read'):
+                self.load.upload_file('data.parquet', file_key='data')
+
+    def test_upload_file_reads_parquet_row_groups(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data')
+            # the column is renamed, so the file cannot be uploaded as it is
+            pyarrow.parquet.write_table(pyarrow.table({'A': range(25)}), path, row_group_size=4)
+            with patch('pandas.read_parquet') as read_parquet:
+                tables = self.load.upload_file(path, file_key='data')
+
+        read_parquet.assert_not_called()
+        self.assertEqual([table.num_rows for table in tables], [10, 10, 5])
+        self.assertEqual(tables[0].column_names, ['a'])
+        self.assertEqual(self.file_keys(), ['data_1', 'data_2', 'data_3'])
+
+    def test_upload_file_with_pandas_engine(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.csv')
+            pd.DataFrame({'a': range(5)}).to_csv(path, index=False)
+            with patch('pandas.read_csv', wraps=pd.read_csv) as read_csv:
+                self.load.upload_file(path, file_key='data', engine='pandas')
+            read_csv.assert_called_with(path, chunksize=10)
+
+            with self.assertRaises(ValueError):
+                self.load.upload_file(path, file_key='data', engine='pyarrow', dtype={'a': 'int64'})
+
+
+class TestParquetPassthrough(unittest.TestCase):
+
+    def setUp(self):
+        patch('comodash_api_client_lowlevel.ApiClient').start()
+        self.uploaded = {}
+        self.upload = patch('comotion.dash._upload_parquet_buffer_to_s3', side_effect=self.record_upload).start()
+        self.generate_presigned_url = patch('comotion.dash.Load.generate_presigned_url_for_file_upload').start()
+        self.generate_presigned_url.side_effect = lambda file_key: FileUploadResponse(
+            presigned_url={}, sts_credentials={}, path=f'path/{file_key}', bucket='bucket'
+        )
+        self.addCleanup(patch.stopall)
+        self.load = Load(config=MagicMock(spec=DashConfig), load_id='load_1')
+        self.load.track_rows_uploaded = True
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'data.parquet')
+        self.table = pyarrow.table({
+            'id': range(1000),
+            'name': [f'name_{i % 7}' for i in range(1000)],
+            'tags': [[i, i + 1] for i in range(1000)],
+            'value': [None if i % 3 else i / 2 for i in range(1000)]
+        })
+        pyarrow.parquet.write_table(self.table, self.path, row_group_size=100, compression='zstd', write_page_index=True)
+
+    def record_upload(self, buffer, response):
+        self.uploaded[response.path] = buffer.getvalue()
+
+    def parts(self):
+        return [self.uploaded[key] for key in sorted(self.uploaded, key=lambda key: int(key.rsplit('_', 1)[1]))]
+
+    def test_small_file_is_uploaded_byte_for_byte(self):
+        with patch('pyarrow.parquet.ParquetFile') as parquet_file:
+            self.load.upload_file(self.path, file_key='data')
+
+        parquet_file.assert_not_called()
+        with open(self.path, 'rb') as f:
+            self.assertEqual(self.parts(), [f.read()])
+        self.assertEqual(self.load.rows_uploaded, 1000)
+
+    def test_large_file_is_split_on_row_groups(self):
+        size = os.path.getsize(self.path)
+        self.load.upload_parquet_file(self.path, file_key='data', max_part_bytes=size // 3)
+
+        parts = [pyarrow.parquet.ParquetFile(io.BytesIO(part)) for part in self.parts()]
+        self.assertGreaterEqual(len(parts), 3)
+        self.assertTrue(all(len(part) <= size // 3 for part in self.parts()))
+        self.assertEqual(sum(part.metadata.num_row_groups for part in parts), 10)
+        self.assertTrue(pyarrow.concat_tables(part.read() for part in parts).equals(self.table))
+        self.assertEqual(self.load.rows_uploaded, 1000)
+        # the column chunks are copied, not encoded again
+        with open(self.path, 'rb') as f:
+            original = f.read()
+        for part in self.parts():
+            metadata = pyarrow.parquet.read_metadata(io.BytesIO(part))
+            for row_group in range(metadata.num_row_groups):
+                column = metadata.row_group(row_group).column(0)
+                self.assertEqual(column.compression, 'ZSTD')
+                start = column.dictionary_page_offset or column.data_page_offset
+                chunk = part[start:start + column.total_compressed_size]
+                self.assertIn(chunk, original)
+
+    def test_row_group_larger_than_part(self):
+        self.load.upload_parquet_file(self.path, file_key='data', max_part_bytes=1)
+        self.assertEqual([pyarrow.parquet.read_metadata(io.BytesIO(part)).num_rows for part in self.parts()], [100] * 10)
+
+    def test_invalid_files(self):
+        path = os.path.join(self.directory.name, 'data.csv')
+        with open(path, 'w') as f:
+            f.write('a,b\n1,2\n')
+        with self.assertRaises(ValueError):
+            self.load.upload_parquet_file(path)
+
+        self.load.modify_lambda = lambda df: df
+        with self.assertRaises(ValueError):
+            self.load.upload_parquet_file(self.path)
+
+    def test_chunksize_is_kept(self):
+        self.load.chunksize = 300
+        self.load.upload_file(self.path, file_key='data')
+        self.assertEqual([pyarrow.parquet.read_metadata(io.BytesIO(part)).num_rows for part in self.parts()], [300, 300, 300, 100])
+
+    def test_files_that_cannot_be_split_are_decoded(self):
+        with patch.object(dash, 'ParquetFileParts', side_effect=ValueError('invalid parquet footer')):
+            self.load.upload_file(self.path, file_key='data')
+        self.assertTrue(pyarrow.parquet.read_table(io.BytesIO(self.parts()[0])).equals(self.table))
+
+    def test_column_names_that_need_renaming_are_decoded(self):
+        pyarrow.parquet.write_table(pyarrow.table({'My Col': range(5)}), self.path)
+        self.load.upload_file(self.path, file_key='data')
+        self.assertEqual(pyarrow.parquet.read_table(io.BytesIO(self.parts()[0])).column_names, ['my_col'])
+
+
+class TestParquetWriterOptions(unittest.TestCase):
+
+    def test_defaults_match_write_table(self):
+        self.assertEqual(
+            dash.ParquetWriterOptions().write_table_kwargs(),
+            {'compression': 'snappy', 'use_dictionary': True, 'write_statistics': True}
+        )
+        self.assertEqual(dash.ParquetWriterOptions.from_value(None), dash.ParquetWriterOptions.profile('default'))
+
+    def test_profiles(self):
+        for name in dash.ParquetWriterOptions.PROFILES:
+            self.assertEqual(dash.ParquetWriterOptions.from_value(name), dash.ParquetWriterOptions.profile(name))
+        self.assertEqual(dash.ParquetWriterOptions.profile('balanced').write_table_kwargs()['compression'], 'zstd')
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            dash.ParquetWriterOptions(compression='lzo')
+        with self.assertRaises(ValueError):
+            dash.ParquetWriterOptions(compression='snappy', compression_level=3)
+        with self.assertRaises(ValueError):
+            dash.ParquetWriterOptions(row_group_size=0)
+        with self.assertRaises(ValueError):
+            dash.ParquetWriterOptions.profile('tiny')
+        with self.assertRaises(TypeError):
+            dash.ParquetWriterOptions.from_value({'compression': 'zstd'})
+
+    @patch('comotion.dash._upload_parquet_buffer_to_s3', side_effect=lambda buffer, response: pyarrow.parquet.ParquetFile(buffer).metadata)
+    @patch('comotion.dash.Load.generate_presigned_url_for_file_upload')
+    @patch('comodash_api_client_lowlevel.ApiClient')
+    def test_load_writes_with_options(self, mock_api_client, mock_generate_presigned_url, mock_upload):
+        mock_generate_presigned_url.return_value = FileUploadResponse(
+            presigned_url={}, sts_credentials={}, path='path/key', bucket='bucket'
+        )
+        options = dash.ParquetWriterOptions(
+            compression='gzip', compression_level=9, row_group_size=40,
+            use_dictionary=['status'], write_statistics=['id']
+        )
+        # options apply to files written for an existing load
+        load = Load(config=MagicMock(spec=DashConfig), load_id='load_1', parquet_writer_options=options)
+        data = pd.DataFrame({'ID': range(100), 'Status': ['open', 'closed'] * 50, 'name': [f'n{i}' for i in range(100)]})
+
+        metadata = load.upload_df(data.copy())
+        self.assertEqual(metadata.num_row_groups, 3)
+        row_group = metadata.row_group(0)
+        self.assertEqual(row_group.column(0).compression, 'GZIP')
+        self.assertTrue(row_group.column(0).is_stats_set)
+        self.assertFalse(row_group.column(2).is_stats_set)
+        self.assertIn('RLE_DICTIONARY', row_group.column(1).encodings)
+        self.assertNotIn('RLE_DICTIONARY', row_group.column(2).encodings)
+
+        metadata = load.upload_table(pyarrow.Table.from_pandas(data, preserve_index=False))[0]
+        self.assertEqual(metadata.row_group(0).column(0).compression, 'GZIP')
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), _QueryResultHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.config = DashConfig(Auth(orgname='test_org'))
+        self.config.host = 'http://127.0.0.1:%s' % self.server.server_port
+        self.config.access_token = jwt.encode({'exp': time.time() + 3600}, 'a-test-secret-key-of-at-least-32-bytes', algorithm='HS256')
+        self.directory = tempfile.TemporaryDirectory()
+        self.run_query = patch.object(dash.QueriesApi, 'run_query', return_value=QueryId(query_id='query_1')).start()
+
+    def tearDown(self):
+        patch.stopall()
+        self.directory.cleanup()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_normalize_sql(self):
+        normalize = dash.ResultCache.normalize_sql
+        self.assertEqual(
+            normalize("select  a,\n\tb -- comment\nfrom t /* block\n comment */ where c = 'x  -- y' ;"),
+            "select a, b from t where c = 'x  -- y'"
+        )
+        self.assertEqual(normalize('select "a  b" from t'), 'select "a  b" from t')
+
+    def make_config(self, auth, zone=None, subject=None):
+        config = DashConfig(auth, zone=zone)
+        config.access_token = jwt.encode({'exp': time.time() + 3600, 'sub': subject}, 'a-test-secret-key-of-at-least-32-bytes', algorithm='HS256')
+        return config
+
+    def test_key_includes_org_and_zone(self):
+        cache = dash.ResultCache(self.directory.name)
+        key = cache.key(self.config, 'select 1')
+        self.assertEqual(key, cache.key(self.config, ' select 1;'))
+        self.assertNotEqual(key, cache.key(self.make_config(Auth(orgname='test_org'), zone='zone_1'), 'select 1'))
+        self.assertNotEqual(key, cache.key(self.make_config(Auth(orgname='other_org')), 'select 1'))
+
+    def test_identities_do_not_share_entries(self):
+        cache = dash.ResultCache(self.directory.name)
+        alice = self.make_config(Auth(orgname='test_org'), subject='user-alice')
+        bob = self.make_config(Auth(orgname='test_org'), subject='user-bob')
+        application = self.make_config(Auth(
+            orgname='test_org', entity_type=Auth.APPLICATION,
+            application_client_id='etl_client', application_client_secret='secret'
+        ), subject='user-alice')
+        keys = {cache.key(config, 'select 1') for config in (alice, bob, application)}
+        self.assertEqual(len(keys), 3)
+        self.assertEqual(cache.key(alice, 'select 1'), cache.key(self.make_config(Auth(orgname='test_org'), subject='user-alice'), 'select 1'))
+
+        for config in (alice, bob):
+            config.host = self.config.host
+        Query(alice, query_text='select * from t', cache=cache).to_arrow()
+        self.assertTrue(Query(alice, query_text='select * from t', cache=cache).from_cache)
+        self.assertFalse(Query(bob, query_text='select * from t', cache=cache).from_cache)
+
+    def test_hit_skips_run_query(self):
+        for format in ('parquet', 'arrow'):
+            self.run_query.reset_mock()
+            cache = dash.ResultCache(join_path(self.directory.name, format), format=format)
+            query = Query(self.config, query_text='select * from t', cache=cache)
+            self.assertFalse(query.from_cache)
+            expected = query.to_pandas()
+            self.assertEqual(cache.stats(), {'hits': 0, 'misses': 1, 'bytes_saved': 0})
+
+            query = Query(self.config, query_text='select *\nfrom t;', cache=cache)
+            self.assertTrue(query.from_cache)
+            self.assertEqual(query.query_id, 'query_1')
+            self.assertEqual(self.run_query.call_count, 1)
+            with patch.object(Query, 'get_csv_for_streaming') as get_csv_for_streaming:
+                self.assertTrue(query.to_pandas().equals(expected))
+                table = query.to_arrow(dictionary_columns=['name'])
+                get_csv_for_streaming.assert_not_called()
+            self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('name').type))
+            self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'bytes_saved': len(RESULT_CSV)})
+
+    def test_expired_entries_are_not_used(self):
+        cache = dash.ResultCache(self.directory.name, ttl=60)
+        Query(self.config, query_text='select 1', cache=cache).to_arrow()
+        with patch.object(dash.time, 'time', return_value=time.time() + 61):
+            self.assertFalse(Query(self.config, query_text='select 1', cache=cache).from_cache)
+        self.assertEqual(os.listdir(self.directory.name), [])
+        self.assertEqual(self.run_query.call_count, 2)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = dash.ResultCache(self.directory.name)
+        Query(self.config, query_text='select 1', cache=cache).to_arrow()
+        size = os.path.getsize(join_path(self.directory.name, cache.key(self.config, 'select 1') + '.parquet'))
+        cache.max_size = size * 2
+        Query(self.config, query_text='select 2', cache=cache).to_arrow()
+        # using the first entry makes the second the least recently used
+        os.utime(join_path(self.directory.name, cache.key(self.config, 'select 2') + '.parquet'), (0, 0))
+        self.assertTrue(Query(self.config, query_text='select 1', cache=cache).from_cache)
+        Query(self.config, query_text='select 3', cache=cache).to_arrow()
+
+        self.assertTrue(Query(self.config, query_text='select 1', cache=cache).from_cache)
+        self.assertFalse(Query(self.config, query_text='select 2', cache=cache).from_cache)
+        self.assertTrue(Query(self.config, query_text='select 3', cache=cache).from_cache)
+
+    def test_invalid_cache(self):
+        with self.assertRaises(TypeError):
+            Query(self.config, query_text='select 1', cache='cache')
+        with self.assertRaises(ValueError):
+            dash.ResultCache(self.directory.name, format='csv')
+
+
+class _CompressingQueryResultHandler(_QueryResultHandler):
+    """Compresses the csv with the first encoding the client accepts, like a proxy in front of Dash would."""
+    body = RESULT_CSV + RESULT_CSV.split(b'\n', 1)[1] * 49
+    requested_encodings = []
+    truncate = False
+
+    def do_GET(self):
+        if not self.path.endswith('/csv'):
+            return super().do_GET()
+        accepted = [encoding.strip() for encoding in (self.headers.get('Accept-Encoding') or '').split(',')]
+        self.requested_encodings.append(self.headers.get('Accept-Encoding'))
+        body = self.body
+        encoding = None
+        if 'gzip' in accepted:
+            body, encoding = gzip.compress(body), 'gzip'
+        elif 'deflate' in accepted:
+            body, encoding = zlib.compress(body), 'deflate'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[:len(body) // 2] if self.truncate else body)
+
+
+class TestCompressedDownload(unittest.TestCase):
+
+    def setUp(self):
+        _CompressingQueryResultHandler.requested_encodings = []
+        self.server = HTTPServer(('127.0.0.1', 0), _CompressingQueryResultHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        config = DashConfig(Auth(orgname='test_org'))
+        config.host = 'http://127.0.0.1:%s' % self.server.server_port
+        config.access_token = jwt.encode({'exp': time.time() + 3600}, 'a-test-secret-key-of-at-least-32-bytes', algorithm='HS256')
+        self.query = Query(config=config, query_id='query_1')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_download_csv_compressed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'result.csv')
+            self.query.download_csv(path, compressed=True)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), _CompressingQueryResultHandler.body)
+            self.query.download_csv(path)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), _CompressingQueryResultHandler.body)
+        self.assertIn('gzip', _CompressingQueryResultHandler.requested_encodings[0])
+        self.assertIn('deflate', _CompressingQueryResultHandler.requested_encodings[0])
+        self.assertNotIn('gzip', _CompressingQueryResultHandler.requested_encodings[1] or '')
+
+    def test_completeness_is_checked_against_compressed_length(self):
+        with self.query.get_csv_for_streaming(compressed=True) as response:
+            self.assertEqual(response.read(), _CompressingQueryResultHandler.body)
+            self.assertEqual(response.tell(), int(response.getheader('Content-Length')))
+            self.assertLess(response.tell(), len(_CompressingQueryResultHandler.body))
+            dash._check_response_complete(response)
+
+        with patch.object(_CompressingQueryResultHandler, 'truncate', True):
+            with tempfile.TemporaryDirectory() as directory:
+                with self.assertRaises((IncompleteRead, urllib3.exceptions.HTTPError)):
+                    self.query.download_csv(os.path.join(directory, 'result.csv'), compressed=True)
+
+    def test_deflate(self):
+        with patch.object(dash, '_ACCEPT_COMPRESSED_HEADERS', {'Accept-Encoding': 'deflate'}):
+            table = self.query.to_arrow(compressed=True, dictionary_columns=False)
+        self.assertEqual(table.num_rows, 150)
+        self.assertEqual(_CompressingQueryResultHandler.requested_encodings, ['deflate'])
+
+    def test_compressed_readers(self):
+        self.assertEqual(len(self.query.to_pandas(compressed=True)), 150)
+        self.assertEqual(sum(batch.num_rows for batch in self.query.iter_record_batches(compressed=True)), 150)
+
+    def test_compressed_cannot_use_ranges(self):
+        with self.assertRaises(ValueError):
+            self.query.download_csv('result.csv', compressed=True, max_connections=2)
+        with self.assertRaises(ValueError):
+            self.query.download_csv('result.csv', compressed=True, resume=True)
+
+
+class TestQueryCoalescer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), _QueryResultHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.config = DashConfig(Auth(orgname='test_org'))
+        self.config.host = 'http://127.0.0.1:%s' % self.server.server_port
+        self.config.access_token = jwt.encode({'exp': time.time() + 3600}, 'a-test-secret-key-of-at-least-32-bytes', algorithm='HS256')
+        self.coalescer = dash.QueryCoalescer()
+        self.query_ids = iter(['query_1', 'query_2'])
+
+        def run_query(query_text_model):
+            time.sleep(0.2)
+            return QueryId(query_id=next(self.query_ids))
+
+        self.run_query = patch.object(dash.QueriesApi, 'run_query', side_effect=run_query).start()
+        self.get_query = patch.object(dash.QueriesApi, 'get_query', side_effect=self.get_query_info).start()
+
+    def tearDown(self):
+        patch.stopall()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_query_info(self, query_id):
+        time.sleep(0.2)
+        return QueryInfo(query='select 1', query_id=query_id, status=QueryStatus(state='SUCCEEDED'))
+
+    def start_queries(self, count, sql='select * from t'):
+        with ThreadPoolExecutor(count) as executor:
+            return list(executor.map(lambda _: Query(self.config, query_text=sql, coalescer=self.coalescer), range(count)))
+
+    def test_identical_queries_share_one_query(self):
+        queries = self.start_queries(5)
+        self.assertEqual(self.run_query.call_count, 1)
+        self.assertEqual({query.query_id for query in queries}, {'query_1'})
+        self.assertEqual(self.coalescer.coalesced, 4)
+        self.assertEqual(self.coalescer.in_flight(), 1)
+
+        read_arrow = Query._read_arrow
+
+        def slow_read_arrow(*args):
+            time.sleep(0.2)
+            return read_arrow(*args)
+
+        with ThreadPoolExecutor(5) as executor, patch.object(Query, '_read_arrow', side_effect=slow_read_arrow, autospec=True) as mock_read_arrow:
+            infos = list(executor.map(lambda query: query.wait_to_complete(), queries))
+            tables = list(executor.map(lambda query: query.to_arrow(), queries))
+        self.assertEqual(self.get_query.call_count, 1)
+        self.assertEqual(mock_read_arrow.call_count, 1)
+        self.assertTrue(all(info is infos[0] for info in infos))
+        self.assertTrue(all(table is tables[0] for table in tables))
+        self.assertEqual(tables[0].num_rows, 3)
+        # results are only shared by callers waiting at the same time, not kept for later ones
+        self.assertEqual(queries[0]._in_flight._calls, {})
+        self.assertIsNot(queries[1].to_arrow(), tables[0])
+        self.assertEqual(len(queries[1].to_pandas()), 3)
+
+        # once complete, the same sql starts a new query
+        self.assertEqual(self.coalescer.in_flight(), 0)
+        self.assertEqual(Query(self.config, query_text='select * from t', coalescer=self.coalescer).query_id, 'query_2')
+
+    def test_different_sql_is_not_coalesced(self):
+        first = Query(self.config, query_text='select 1', coalescer=self.coalescer)
+        second = Query(self.config, query_text='select 2', coalescer=self.coalescer)
+        self.assertEqual((first.query_id, second.query_id), ('query_1', 'query_2'))
+        self.assertEqual(Query(self.config, query_text=' select 1 ;', coalescer=self.coalescer).query_id, 'query_1')
+
+    def test_errors_starting_the_query_are_shared(self):
+        def run_query(query_text_model):
+            time.sleep(0.2)
+            raise ConnectionError()
+
+        self.run_query.side_effect = run_query
+        with ThreadPoolExecutor(3) as executor:
+            futures = [executor.submit(Query, self.config, query_text='select 1', coalescer=self.coalescer) for _ in range(3)]
+            for future in futures:
+                with self.assertRaises(ConnectionError):
+                    future.result()
+        self.assertEqual(self.run_query.call_count, 1)
+        self.assertEqual(self.coalescer.in_flight(), 0)
+
+    def test_invalid_coalescer(self):
+        with self.assertRaises(TypeError):
+            Query(self.config, query_text='select 1', coalescer='coalescer')
+
+    def test_reading_the_result_stops_sharing(self):
+        query = Query(self.config, query_text='select 1', coalescer=self.coalescer)
+        self.assertEqual(self.coalescer.in_flight(), 1)
+        query.to_arrow()
+        self.assertEqual(self.coalescer.in_flight(), 0)
+        self.get_query.assert_not_called()
+        self.assertEqual(Query(self.config, query_text='select 1', coalescer=self.coalescer).query_id, 'query_2')
+
+    def test_old_queries_are_not_shared(self):
+        self.coalescer = dash.QueryCoalescer(max_age=0)
+        first = Query(self.config, query_text='select 1', coalescer=self.coalescer)
+        time.sleep(0.01)
+        second = Query(self.config, query_text='select 1', coalescer=self.coalescer)
+        self.assertEqual((first.query_id, second.query_id), ('query_1', 'query_2'))
+        self.assertEqual(self.coalescer.coalesced, 0)
+
+    def test_followers_wait_with_their_own_timeout(self):
+        finished = time.monotonic() + 1
+
+        def get_query_info(query_id):
+            state = 'SUCCEEDED' if time.monotonic() >= finished else 'RUNNING'
+            return QueryInfo(query='select 1', query_id=query_id, status=QueryStatus(state=state))
+
+        self.get_query.side_effect = get_query_info
+        leader, short, long = self.start_queries(3)
+        strategy = dash.PollingStrategy(initial_interval=0.05, max_interval=0.05)
+        with ThreadPoolExecutor(3) as executor:
+            leader_wait = executor.submit(leader.wait_to_complete, strategy, 0.3)
+            time.sleep(0.05)
+            short_wait = executor.submit(short.wait_to_complete, strategy, 0.1)
+            long_wait = executor.submit(long.wait_to_complete, strategy, 5)
+
+            started = time.monotonic()
+            with self.assertRaises(dash.PollingTimeoutException):
+                short_wait.result()
+            self.assertLess(time.monotonic() - started, 0.2)
+            with self.assertRaises(dash.PollingTimeoutException):
+                leader_wait.result()
+            # the leader timed out first, so the follower with a longer timeout polls on
+            self.assertEqual(long_wait.result().status.state, 'SUCCEEDED')
+
+    def test_followers_start_their_own_query_if_the_leader_hangs(self):
+        self.coalescer = dash.QueryCoalescer(start_timeout=0.1)
+        release = threading.Event()
+
+        def run_query(query_text_model):
+            query_id = next(self.query_ids)
+            if query_id == 'query_1':
+                release.wait(5)
+            return QueryId(query_id=query_id)
+
+        self.run_query.side_effect = run_query
+        with ThreadPoolExecutor(2) as executor:
+            leader = executor.submit(Query, self.config, query_text='select 1', coalescer=self.coalescer)
+            time.sleep(0.05)
+            started = time.monotonic()
+            follower = Query(self.config, query_text='select 1', coalescer=self.coalescer)
+            self.assertLess(time.monotonic() - started, 1)
+            release.set()
+            self.assertEqual((leader.result().query_id, follower.query_id), ('query_1', 'query_2'))
+        self.assertIsNone(follower._in_flight)
+        self.assertEqual(self.run_query.call_count, 2)
+        self.assertEqual(self.coalescer.coalesced, 0)
+
+    def test_start_timeout_must_not_be_negative(self):
+        with self.assertRaises(ValueError):
+            dash.QueryCoalescer(start_timeout=-1)
+
+
+def _result_page(rows, next_token=None):
+    page = {
+        'resultSet': {'Rows': [{'Data': [{} if value is None else {'VarCharValue': value} for value in row]} for row in rows]},
+        'ResultSetMetaData': {'ColumnInfo': [{'Name': name, 'Type': column_type} for name, column_type in RESULT_COLUMNS]}
+    }
+    if next_token:
+        page['NextToken'] = next_token
+    return page
+
+
+RESULT_PAGES = {
+    None: _result_page([
+        [name for name, _ in RESULT_COLUMNS],
+        ['2013-04-10 00:00:00.000', 'string value', '123', '2013-04-10', '23.23', '23.24', 'C'],
+    ], next_token='page_2'),
+    'page_2': _result_page([[None, '', None, None, None, 'NaN', None]], next_token='page_3'),
+    'page_3': _result_page([['2013-04-10 01:02:03.456', 'another', '-5', '2020-01-01', '1', '1.5', 'D']]),
+}
+
+
+class _QueryResultPagesHandler(BaseHTTPRequestHandler):
+    requested_tokens = []
+
+    def do_GET(self):
+        from urllib.parse import urlparse, parse_qs
+        next_token = parse_qs(urlparse(self.path).query).get('next_token', [None])[0]
+        self.requested_tokens.append(next_token)
+        if next_token not in RESULT_PAGES:
+            self.send_response(500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps(RESULT_PAGES[next_token]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestQueryResultPages(unittest.TestCase):
+
+    def setUp(self):
+        _QueryResultPagesHandler.requested_tokens = []
+        self.server = HTTPServer(('127.0.0.1', 0), _QueryResultPagesHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        config = DashConfig(Auth(orgname='test_org'))
+        config.host = 'http://127.0.0.1:%s' % self.server.server_port
+        config.access_token = jwt.encode({'exp': time.time() + 3600}, 'a-test-secret-key-of-at-least-32-bytes', algorithm='HS256')
+        self.query = Query(config=config, query_id='query_1')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_result_page(self):
+        page, next_token = self.query.get_result_page()
+        self.assertEqual(next_token, 'page_2')
+        self.assertEqual(len(page.result_set.rows), 2)
+
+        page, next_token = self.query.get_result_page('page_3')
+        self.assertIsNone(next_token)
+
+    def test_get_result_types(self):
+        with patch.object(dash.QueryResultModel, 'from_dict') as from_dict:
+            result_types = self.query.get_result_types()
+        from_dict.assert_not_called()
+        self.assertEqual(result_types.columns, RESULT_COLUMNS)
+        self.assertEqual(_QueryResultPagesHandler.requested_tokens, [None])
+
+    def test_iter_result_pages_follows_next_token(self):
+        for prefetch in (0, 1, 3):
+            _QueryResultPagesHandler.requested_tokens = []
+            pages = list(self.query.iter_result_pages(prefetch=prefetch))
+            self.assertEqual(len(pages), 3)
+            self.assertEqual(pages[2].result_set.rows[0].data[1].var_char_value, 'another')
+            self.assertEqual(_QueryResultPagesHandler.requested_tokens, [None, 'page_2', 'page_3'])
+
+    def test_iter_result_pages_raises_errors_from_background_thread(self):
+        with patch.dict(RESULT_PAGES, {'page_2': _result_page([], next_token='missing')}):
+            pages = self.query.iter_result_pages(prefetch=2)
+            self.assertEqual(len(next(pages).result_set.rows), 2)
+            next(pages)
+            with self.assertRaises(ApiException):
+                next(pages)
+
+    def test_iter_result_pages_stops_early(self):
+        pages = self.query.iter_result_pages(prefetch=1)
+        next(pages)
+        pages.close()
+        with self.assertRaises(ValueError):
+            next(self.query.iter_result_pages(prefetch=-1))
+
+    def test_iter_result_page_columns(self):
+        pages = list(self.query.iter_result_page_columns(prefetch=2))
+        self.assertEqual([page.num_rows for page in pages], [1, 1, 1])
+        self.assertEqual(pages[2].columns[1], ['another'])
+
+    def test_iter_rows(self):
+        rows = list(self.query.iter_rows())
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0], (
+            datetime.datetime(2013, 4, 10), 'string value', 123, datetime.date(2013, 4, 10), 23.23, 23.24, 'C'
+        ))
+        self.assertEqual(rows[1][:3], (None, '', None))
+        self.assertTrue(math.isnan(rows[1][5]))
+        self.assertEqual(rows[2][0], datetime.datetime(2013, 4, 10, 1, 2, 3, 456000))
+        self.assertEqual(rows[2][2], -5)
+
+
+class TestResultPage(unittest.TestCase):
+
+    def setUp(self):
+        self.page = dash.ResultPage.from_json(json.dumps(RESULT_PAGES[None]).encode(), skip_header=True)
+
+    def test_from_json(self):
+        self.assertEqual(self.page.column_names, [name for name, _ in RESULT_COLUMNS])
+        self.assertEqual(self.page.num_rows, 1)
+        self.assertEqual(self.page.columns[1], ['string value'])
+        self.assertEqual(self.page.next_token, 'page_2')
+
+        page = dash.ResultPage.from_json(json.dumps(RESULT_PAGES['page_2']))
+        self.assertEqual(page.columns[0], [None])
+        self.assertIsNone(dash.ResultPage.from_json(json.dumps(RESULT_PAGES['page_3'])).next_token)
+
+    def test_next_token_key_is_not_guessed(self):
+        page = dict(RESULT_PAGES['page_3'], nextToken='page_4')
+        with self.assertRaises(ValueError):
+            dash.ResultPage.from_json(json.dumps(page))
+
+    def test_decodes_without_orjson(self):
+        with patch.object(dash, 'orjson', None):
+            page = dash.ResultPage.from_json(json.dumps(RESULT_PAGES[None]), skip_header=True)
+        self.assertEqual(page.columns, self.page.columns)
+
+    def test_empty_page(self):
+        page = dash.ResultPage.from_json(json.dumps(_result_page([])))
+        self.assertEqual(page.num_rows, 0)
+        self.assertEqual(page.to_arrow().num_rows, 0)
+
+    def test_to_arrow(self):
+        table = dash.ResultPage.from_json(json.dumps(RESULT_PAGES['page_2'])).to_arrow()
+        self.assertEqual(table.schema, dash.ResultColumnTypes(RESULT_COLUMNS).arrow_schema())
+        row = table.to_pylist()[0]
+        self.assertIsNone(row['amount'])
+        self.assertEqual(row['name'], '')
+        self.assertTrue(math.isnan(row['score']))
+        self.assertEqual(self.page.to_arrow().to_pylist()[0]['created'], datetime.datetime(2013, 4, 10))
+
+    def test_to_pydict(self):
+        values = self.page.to_pydict()
+        self.assertEqual(values['amount'], [123])
+        self.assertEqual(values['day'], [datetime.date(2013, 4, 10)])
+
+
+class TestResultColumnTypes(unittest.TestCase):
+
+    def setUp(self):
+        self.result_types = dash.ResultColumnTypes(RESULT_COLUMNS)
+
+    def test_from_query_result(self):
+        from comodash_api_client_lowlevel.models.query_result import QueryResult
+        query_result = QueryResult.from_dict({
+            'ResultSetMetaData': {'ColumnInfo': [{'Name': 'a', 'Type': 'bigint'}, {'Name': 'b', 'Type': 'varchar'}]}
+        })
+        result_types = dash.ResultColumnTypes.from_query_result(query_result)
+        self.assertEqual(result_types.columns, [('a', 'bigint'), ('b', 'varchar')])
+
+    def test_pandas_read_csv_kwargs(self):
+        self.assertEqual(self.result_types.pandas_read_csv_kwargs(), {
+            'dtype': {'name': 'string', 'amount': 'Int64', 'price': 'float64', 'score': 'float64', 'flag': 'string'},
+            'parse_dates': ['created', 'day']
+        })
+
+    def test_dictionary_columns_must_be_strings(self):
+        with self.assertRaises(ValueError):
+            self.result_types.arrow_schema(dictionary_columns=['amount'])
+
+    def test_dictionary_encode(self):
+        table = pyarrow.table({'name': ['a', 'b', 'c', 'd'], 'flag': ['x', 'x', 'y', None], 'amount': [1, 1, 1, 1]})
+        encoded = dash.ResultColumnTypes([('name', 'varchar'), ('flag', 'char'), ('amount', 'bigint')]).dictionary_encode(table)
+        self.assertEqual(encoded.schema.field('name').type, pyarrow.string())
+        self.assertTrue(pyarrow.types.is_dictionary(encoded.schema.field('flag').type))
+        self.assertEqual(encoded.schema.field('amount').type, pyarrow.int64())
+        self.assertEqual(encoded.column('flag').to_pylist(), ['x', 'x', 'y', None])
@@ -60,6 +60,7 @@ class TestIntegrationTests(unittest.TestCase):
             urllib3.PoolManager.request is used by the lowlevel api to make calls
             `requests` class is used by Auth class
         """
+        comotion.auth.Auth.token_cache.clear()
         os.environ['KEYRING_CRYPTFILE_PASSWORD']='mypassword'
         kr = PlaintextKeyring()
         kr.set_password('comotion auth api latest username (https://auth.comotion.us)','test1','myusername')
@@ -143,7 +144,7 @@ class TestIntegrationTests(unittest.TestCase):
     ###############################################################################################
 
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_get_access_token(self, mock_requests_post, mock_urllib3_request):
         self._generic_integration_test(
             mock_requests_post=mock_requests_post,
@@ -157,7 +158,8 @@ class TestIntegrationTests(unittest.TestCase):
                             'grant_type': 'refresh_token', 
                             'refresh_token': 'myrefreshtoken', 
                             'client_id': 'comotion_cli'
-                        }
+                        },
+                        timeout=(10, 30)
                     ),                    
                     'response': mock.MagicMock(
                         text='{"access_token": "myaccesstoken"}', 
@@ -170,7 +172,7 @@ class TestIntegrationTests(unittest.TestCase):
     
 
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_get_access_token_error(self, mock_requests_post, mock_urllib3_request):
         self._generic_integration_test(
             mock_requests_post=mock_requests_post,
@@ -184,7 +186,8 @@ class TestIntegrationTests(unittest.TestCase):
                             'grant_type': 'refresh_token', 
                             'refresh_token': 'myrefreshtoken', 
                             'client_id': 'comotion_cli'
-                        }
+                        },
+                        timeout=(10, 30)
                     ),                    
                     'response': mock.MagicMock(
                         text='{"error": "invalid_grant", "error_description": "this is my description"}', 
@@ -196,7 +199,7 @@ class TestIntegrationTests(unittest.TestCase):
         )
     
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_get_access_token_other_error(self, mock_requests_post, mock_urllib3_request):
         self._generic_integration_test(
             mock_requests_post=mock_requests_post,
@@ -210,7 +213,8 @@ class TestIntegrationTests(unittest.TestCase):
                             'grant_type': 'refresh_token', 
                             'refresh_token': 'myrefreshtoken', 
                             'client_id': 'comotion_cli'
-                        }
+                        },
+                        timeout=(10, 30)
                     ),                    
                     'response': mock.MagicMock(
                         text='{"error": "not_invalid_grant", "error_description": "this is my description"}', 
@@ -222,7 +226,7 @@ class TestIntegrationTests(unittest.TestCase):
         )
 
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_get_access_token_other_error_no_type(self, mock_requests_post, mock_urllib3_request):
         self._generic_integration_test(
             mock_requests_post=mock_requests_post,
@@ -236,7 +240,8 @@ class TestIntegrationTests(unittest.TestCase):
                             'grant_type': 'refresh_token', 
                             'refresh_token': 'myrefreshtoken', 
                             'client_id': 'comotion_cli'
-                        }
+                        },
+                        timeout=(10, 30)
                     ),                    
                     'response': mock.MagicMock(
                         text='{"noterror": "invalid_grant", "error_description": "this is my description"}', 
@@ -248,7 +253,7 @@ class TestIntegrationTests(unittest.TestCase):
         )
 
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_get_access_token_other_error_no_json(self, mock_requests_post, mock_urllib3_request):
         self._generic_integration_test(
             mock_requests_post=mock_requests_post,
@@ -262,7 +267,8 @@ class TestIntegrationTests(unittest.TestCase):
                             'grant_type': 'refresh_token', 
                             'refresh_token': 'myrefreshtoken', 
                             'client_id': 'comotion_cli'
-                        }
+                        },
+                        timeout=(10, 30)
                     ),                    
                     'response': mock.MagicMock(
                         text='{slkdfjslkdj', 
@@ -279,7 +285,7 @@ class TestIntegrationTests(unittest.TestCase):
         
 
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_start_query_generic(self, mock_requests_post, mock_urllib3_request):
         self._generic_integration_test(
             mock_requests_post=mock_requests_post,
@@ -313,7 +319,7 @@ class TestIntegrationTests(unittest.TestCase):
     # urllib3.PoolManager.request is used by the lowlevel api to make calls
     # requests class is used by Auth class
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_stop_query(self, mock_requests_post, mock_urllib3_request):
         self._generic_integration_test(
             mock_requests_post=mock_requests_post,
@@ -347,7 +353,7 @@ class TestIntegrationTests(unittest.TestCase):
     # urllib3.PoolManager.request is used by the lowlevel api to make calls
     # requests class is used by Auth class
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_get_query_state(self, mock_requests_post, mock_urllib3_request):
         self._generic_integration_test(
             mock_requests_post=mock_requests_post,
@@ -380,7 +386,7 @@ class TestIntegrationTests(unittest.TestCase):
     # urllib3.PoolManager.request is used by the lowlevel api to make calls
     # requests class is used by Auth class
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_get_query_state_error(self, mock_requests_post, mock_urllib3_request):
         self._generic_integration_test(
             mock_requests_post=mock_requests_post,
@@ -412,7 +418,7 @@ class TestIntegrationTests(unittest.TestCase):
     # urllib3.PoolManager.request is used by the lowlevel api to make calls
     # requests class is used by Auth class
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_download_csv_success(self, mock_requests_post, mock_urllib3_request):
         # with mock.patch('io.open',  new_callable=mock.mock_open) as mock_io_open:
             download_response = mock.MagicMock(
@@ -553,7 +559,7 @@ finalising file...
 
 
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_create_load(self, mock_requests_post, mock_urllib3_request):
         # Define the CLI arguments for creating a load
         cli_args = ['dash', 'create-load', '--load-type', 'APPEND_ONLY', 'my_table_name']
@@ -595,7 +601,7 @@ finalising file...
         )
     
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_create_load_with_partitions_and_service_client_id(self, mock_requests_post, mock_urllib3_request):
         # Define the CLI arguments for creating a load
         cli_args = ['dash', 'create-load', '--load-type', 'APPEND_ONLY', '--load-as-service-client', 'myserviceclient','-pabc','-pdef', 'my_table_name']
@@ -637,7 +643,7 @@ finalising file...
         )
 
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     @mock.patch('boto3.Session')
     @mock.patch('awswrangler.s3.upload')
     @mock.patch('click.open_file')
@@ -722,7 +728,7 @@ finalising file...
         )
 
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_commit_load(self, mock_requests_post, mock_urllib3_request):
         # Define the CLI arguments for creating a load
         cli_args = ['dash', 'commit-load', '-l', 'myloadid', '-c', 'my','checksum','-c', 'my2','secondchecksum']
@@ -764,7 +770,7 @@ finalising file...
         )
     
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_get_load_status(self, mock_requests_post, mock_urllib3_request):
         # Define the CLI arguments for creating a load
         cli_args = ['dash', 'get-load-info', '-l', 'myloadid']
@@ -805,7 +811,7 @@ finalising file...
         )
     
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_get_load_status_fail(self, mock_requests_post, mock_urllib3_request):
         # Define the CLI arguments for creating a load
         cli_args = ['dash', 'get-load-info', '-l', 'myloadid']
@@ -848,7 +854,7 @@ finalising file...
     
     #this test is to test that the lower level sdk throws an exception when http is not 200
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_get_load_status_failed_http400(self, mock_requests_post, mock_urllib3_request):
         # Define the CLI arguments for creating a load
         cli_args = ['dash', 'get-load-info', '-l', 'myloadid']
@@ -880,7 +886,7 @@ finalising file...
 
     #this test is to test that the lower level sdk throws an exception when http is not 200
     @mock.patch('urllib3.PoolManager.request')
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_dash_get_load_status_failed_http500(self, mock_requests_post, mock_urllib3_request):
         # Define the CLI arguments for creating a load
         cli_args = ['dash', 'get-load-info', '-l', 'myloadid']
@@ -0,0 +1,89 @@
+import io
+import os
+import struct
+import tempfile
+import unittest
+
+import pyarrow
+import pyarrow.parquet
+
+from comotion import _parquet
+from comotion._parquet import ParquetFileParts
+
+
+class TestParquetFileParts(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'data.parquet')
+        self.table = pyarrow.table({
+            'id': range(1000),
+            'name': [f'name_{i % 7}' for i in range(1000)],
+            'tags': [[i, i + 1] for i in range(1000)],
+            'value': [None if i % 3 else i / 2 for i in range(1000)],
+            'flag': [i % 2 == 0 for i in range(1000)]
+        })
+
+    def write(self, **write_table_kwargs):
+        pyarrow.parquet.write_table(self.table, self.path, row_group_size=100, **write_table_kwargs)
+        return ParquetFileParts(self.path)
+
+    def assert_parts_round_trip(self, parquet_file):
+        parts = parquet_file.parts(parquet_file.size // 4)
+        self.assertGreaterEqual(len(parts), 4)
+        files = [pyarrow.parquet.ParquetFile(parquet_file.read_part(part)) for part in parts]
+        self.assertEqual([part.metadata.num_rows for part in files], [parquet_file.part_rows(part) for part in parts])
+        self.assertTrue(pyarrow.concat_tables(part.read() for part in files).equals(self.table))
+        return files
+
+    def test_footer_round_trip(self):
+        for write_table_kwargs in ({}, {'write_page_index': True}, {'data_page_version': '2.0'}):
+            self.write(**write_table_kwargs)
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            footer_length = struct.unpack('<I', data[-8:-4])[0]
+            footer = data[-8 - footer_length:-8]
+            fields, position = _parquet.thrift_read_struct(footer)
+            self.assertEqual(position, len(footer))
+            out = bytearray()
+            _parquet.thrift_write_struct(out, fields)
+            self.assertEqual(bytes(out), footer)
+
+    def test_compressions(self):
+        for compression in ('zstd', 'gzip', 'snappy', 'none'):
+            files = self.assert_parts_round_trip(self.write(compression=compression))
+            self.assertEqual(files[0].metadata.row_group(0).column(0).compression, compression.upper().replace('NONE', 'UNCOMPRESSED'))
+
+    def test_without_dictionary(self):
+        files = self.assert_parts_round_trip(self.write(use_dictionary=False))
+        self.assertNotIn('RLE_DICTIONARY', files[0].metadata.row_group(0).column(1).encodings)
+        self.assertIsNone(files[0].metadata.row_group(0).column(1).dictionary_page_offset)
+
+    def test_page_index_is_not_copied(self):
+        files = self.assert_parts_round_trip(self.write(write_page_index=True))
+        self.assertFalse(files[0].metadata.row_group(0).column(0).has_offset_index)
+
+    def test_data_page_v2(self):
+        self.assert_parts_round_trip(self.write(data_page_version='2.0', compression='zstd'))
+
+    def test_whole_file_is_one_part(self):
+        parquet_file = self.write()
+        self.assertEqual(parquet_file.parts(parquet_file.size), [None])
+        with open(self.path, 'rb') as f:
+            self.assertEqual(parquet_file.read_part(None).getvalue(), f.read())
+        self.assertEqual(parquet_file.column_names(), self.table.column_names)
+
+    def test_invalid_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'a,b\n1,2\n')
+        with self.assertRaises(ValueError):
+            ParquetFileParts(self.path)
+
+        self.write()
+        with open(self.path, 'r+b') as f:
+            # a footer length longer than the file
+            f.seek(-8, io.SEEK_END)
+            f.write(struct.pack('<I', 1 << 30))
+        with self.assertRaises(ValueError):
+            ParquetFileParts(self.path)